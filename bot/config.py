@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Загрузка переменных окружения из .env файла
@@ -13,6 +13,30 @@ class Config:
     BOT_TOKEN: str = os.getenv('BOT_TOKEN', '')
     ADMIN_IDS: List[int] = [int(id_) for id_ in os.getenv('ADMIN_IDS', '').split(',') if id_.strip()]
 
+    # Режим получения апдейтов: 'polling' (разработка) или 'webhook'
+    BOT_RUN_MODE: str = os.getenv('BOT_RUN_MODE', 'polling').lower()
+
+    # Bot API из синхронных контекстов (Celery)
+    TELEGRAM_POOL_SIZE: int = int(os.getenv('TELEGRAM_POOL_SIZE', '10'))  # keep-alive соединений на процесс
+    TELEGRAM_TIMEOUT: int = int(os.getenv('TELEGRAM_TIMEOUT', '10'))  # секунд на запрос
+    TELEGRAM_UPLOAD_TIMEOUT: int = int(os.getenv('TELEGRAM_UPLOAD_TIMEOUT', '120'))  # секунд на загрузку файла
+    TELEGRAM_MAX_RETRIES: int = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))  # повторов при 429/5xx
+    TELEGRAM_BACKOFF_BASE: float = float(os.getenv('TELEGRAM_BACKOFF_BASE', '1'))  # базовая задержка повтора, сек.
+
+    # Лимиты исходящих сообщений (с запасом от лимитов Telegram 30/сек, 20/мин в группу, 1/сек в личку)
+    TELEGRAM_GLOBAL_RATE: float = float(os.getenv('TELEGRAM_GLOBAL_RATE', '25'))  # сообщений в секунду всего
+    TELEGRAM_GROUP_RATE: float = float(os.getenv('TELEGRAM_GROUP_RATE', '18'))  # сообщений в минуту в группу/канал
+    TELEGRAM_PRIVATE_RATE: float = float(os.getenv('TELEGRAM_PRIVATE_RATE', '1'))  # сообщений в секунду в личный чат
+
+    # Webhook
+    WEBHOOK_BASE_URL: str = os.getenv('WEBHOOK_BASE_URL', '')  # публичный https адрес, например https://bot.example.com
+    WEBHOOK_PATH: str = os.getenv('WEBHOOK_PATH', '/telegram/webhook')
+    WEBHOOK_SECRET: str = os.getenv('WEBHOOK_SECRET', '')
+    WEBHOOK_HOST: str = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT: int = int(os.getenv('WEBHOOK_PORT', '8080'))
+    WEBHOOK_MAX_CONCURRENCY: int = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', '100'))  # апдейтов в обработке одновременно
+    WEBHOOK_DRAIN_TIMEOUT: int = int(os.getenv('WEBHOOK_DRAIN_TIMEOUT', '30'))  # секунд на завершение апдейтов при остановке
+
     # Database
     DB_HOST: str = os.getenv('DB_HOST', 'localhost')
     DB_PORT: str = os.getenv('DB_PORT', '5432')
@@ -20,10 +44,52 @@ class Config:
     DB_USER: str = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD: str = os.getenv('DB_PASSWORD', 'postgres')
 
+    # Database connection pool
+    DB_POOL_SIZE: int = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW: int = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT: int = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # секунд ожидания свободного соединения
+    DB_POOL_RECYCLE: int = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # секунд жизни соединения
+    DB_POOL_PRE_PING: bool = os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true'
+
     # Redis
     REDIS_HOST: str = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT: int = int(os.getenv('REDIS_PORT', '6379'))
 
+    # FSM storage ('memory' - для разработки, 'redis' - переживает рестарты и несколько реплик)
+    FSM_STORAGE: str = os.getenv('FSM_STORAGE', 'memory').lower()
+    FSM_REDIS_DB: int = int(os.getenv('FSM_REDIS_DB', '1'))
+    FSM_KEY_PREFIX: str = os.getenv('FSM_KEY_PREFIX', 'fsm')
+    FSM_STATE_TTL: int = int(os.getenv('FSM_STATE_TTL', str(3 * 24 * 3600)))  # секунд до удаления брошенного состояния
+
+    # Планировщик публикаций
+    SCHEDULER_RECONCILE_INTERVAL: int = int(os.getenv('SCHEDULER_RECONCILE_INTERVAL', '600'))  # сверка индекса с БД, сек.
+    SLOT_CATCHUP_INTERVAL: int = int(os.getenv('SLOT_CATCHUP_INTERVAL', '300'))  # интервал между догоняющими публикациями, сек.
+    SLOT_CATCHUP_WINDOW: int = int(os.getenv('SLOT_CATCHUP_WINDOW', '24'))  # за сколько часов догонять пропущенные слоты
+    SLOT_CLAIM_TIMEOUT: int = int(os.getenv('SLOT_CLAIM_TIMEOUT', '900'))  # через сколько секунд занятый, но не обслуженный слот можно занять снова
+
+    # Отчеты (экспорт статистики в фоне)
+    REPORT_CACHE_TTL: int = int(os.getenv('REPORT_CACHE_TTL', '600'))  # сколько секунд отдавать готовый отчет повторно
+
+    # Списки постов (постраничный вывод)
+    PAGINATION_COUNT_TTL: int = int(os.getenv('PAGINATION_COUNT_TTL', '15'))  # сколько секунд кэшировать "Всего: N"
+
+    # Настройки бота (таблица settings)
+    SETTINGS_CACHE_TTL: int = int(os.getenv('SETTINGS_CACHE_TTL', '60'))  # сколько секунд процесс держит настройки в памяти
+
+    # Кэш пользователей по Telegram ID
+    USER_CACHE_SIZE: int = int(os.getenv('USER_CACHE_SIZE', '10000'))  # записей в памяти процесса
+    USER_CACHE_TTL: int = int(os.getenv('USER_CACHE_TTL', '300'))  # секунд жизни записи
+    USER_CACHE_REDIS: bool = os.getenv('USER_CACHE_REDIS', 'False').lower() == 'true'  # дублировать кэш в Redis (несколько экземпляров бота)
+
+    # Проверка дубликатов постов
+    DUPLICATE_CANDIDATES: int = int(os.getenv('DUPLICATE_CANDIDATES', '50'))  # сколько похожих постов выбирать из БД для сравнения
+    IMAGE_HASH_DISTANCE: int = int(os.getenv('IMAGE_HASH_DISTANCE', '4'))  # макс. расстояние Хэмминга хэшей похожих фото (из 64 бит)
+
+    # Анализ изображений в пуле процессов
+    IMAGE_WORKERS: int = int(os.getenv('IMAGE_WORKERS', '2'))  # процессов в пуле
+    IMAGE_QUEUE_SIZE: int = int(os.getenv('IMAGE_QUEUE_SIZE', '50'))  # сколько задач может быть в пуле, остальные отклоняются
+    IMAGE_TIMEOUT: float = float(os.getenv('IMAGE_TIMEOUT', '10'))  # секунд ожидания результата
+
     # Payment Systems
     YOOKASSA_SHOP_ID: str = os.getenv('YOOKASSA_SHOP_ID', '')
     YOOKASSA_SECRET_KEY: str = os.getenv('YOOKASSA_SECRET_KEY', '')
@@ -32,6 +98,9 @@ class Config:
     DEBUG: bool = os.getenv('DEBUG', 'False').lower() == 'true'
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO')
 
+    # Monitoring (Prometheus, 0 - выключено)
+    METRICS_PORT: int = int(os.getenv('METRICS_PORT', '0'))
+
     # Channel (заполняется через бота)
     CHANNEL_ID: str = os.getenv('CHANNEL_ID', '')
     CHANNEL_USERNAME: str = os.getenv('CHANNEL_USERNAME', '')
@@ -47,9 +116,10 @@ class Config:
         return f"postgresql://{cls.DB_USER}:{cls.DB_PASSWORD}@{cls.DB_HOST}:{cls.DB_PORT}/{cls.DB_NAME}"
 
     @classmethod
-    def get_redis_url(cls) -> str:
-        """Получить URL подключения к Redis"""
-        return f"redis://{cls.REDIS_HOST}:{cls.REDIS_PORT}"
+    def get_redis_url(cls, db: Optional[int] = None) -> str:
+        """Получить URL подключения к Redis (опционально - к конкретной базе)"""
+        url = f"redis://{cls.REDIS_HOST}:{cls.REDIS_PORT}"
+        return f"{url}/{db}" if db is not None else url
 
 
 # Создание экземпляра конфигурации
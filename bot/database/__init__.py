@@ -1,5 +1,6 @@
-from .models import Base, User, Post, Payment, Setting, AdminLog
-from .database import engine, SessionLocal, get_db, init_db
+from .models import Base, User, Post, Payment, Setting, PublishSlot, DailyStat, AdminLog
+from .crud import PostSummary
+from .database import engine, SessionLocal, get_db, init_db, async_engine, AsyncSessionLocal, get_async_db
 
 __all__ = [
     'Base',
@@ -7,9 +8,15 @@ __all__ = [
     'Post',
     'Payment',
     'Setting',
+    'PublishSlot',
+    'DailyStat',
     'AdminLog',
+    'PostSummary',
     'engine',
     'SessionLocal',
     'get_db',
     'init_db',
+    'async_engine',
+    'AsyncSessionLocal',
+    'get_async_db',
 ]
@@ -0,0 +1,387 @@
+"""
+Асинхронные CRUD операции (asyncpg) для обработчиков бота.
+
+Повторяют функции из crud.py, но не блокируют event loop aiogram.
+Синхронный crud.py остается для Celery задач.
+"""
+
+from typing import Optional, List, Dict, Sequence
+from sqlalchemy import select, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, aliased
+from .models import User, Post, Payment, Setting, AdminLog
+from .crud import (
+    QUEUE_LOCK_ID,
+    LSH_FIELDS,
+    IMAGE_FIELDS,
+    _next_queue_position,
+    PostSummary,
+    post_summary_query,
+    queue_summary_query,
+    scheduled_summary_query,
+    to_summaries,
+)
+from .pagination import Page, paginate, count_cached, get_cached_counts, store_cached_counts
+from .settings import get_settings, publish_settings_changed_async
+from .identity import identity_of, remember_user, forget_user
+from .lsh_index import index_post_async, unindex_post_async
+from .image_index import index_image_async, unindex_image_async
+
+
+# === USER CRUD ===
+
+async def get_user_by_telegram_id(db: AsyncSession, telegram_id: int) -> Optional[User]:
+    """Получить пользователя по Telegram ID"""
+    result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, telegram_id: int, username: str = None, full_name: str = None, contact: str = None, role: str = 'advertiser') -> User:
+    """Создать нового пользователя"""
+    user = User(
+        telegram_id=telegram_id,
+        username=username,
+        full_name=full_name,
+        contact=contact,
+        role=role
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    await remember_user(identity_of(user))
+    return user
+
+
+async def update_user(db: AsyncSession, user: User, **kwargs) -> User:
+    """Обновить пользователя (кэш пользователей сбрасывается)"""
+    for key, value in kwargs.items():
+        if hasattr(user, key):
+            setattr(user, key, value)
+    await db.commit()
+    await db.refresh(user)
+    await forget_user(user.telegram_id)
+    return user
+
+
+# === POST CRUD ===
+
+async def create_post(db: AsyncSession, user_id: int, **kwargs) -> Post:
+    """Создать новый пост"""
+    post = Post(user_id=user_id, **kwargs)
+    db.add(post)
+    await db.commit()
+    await db.refresh(post)
+    await index_post_async(post)
+    await index_image_async(post)
+    return post
+
+
+async def get_post(db: AsyncSession, post_id: int, with_user: bool = False) -> Optional[Post]:
+    """Получить пост по ID (with_user - сразу загрузить автора)"""
+    query = select(Post).where(Post.id == post_id)
+    if with_user:
+        query = query.options(joinedload(Post.user))
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def get_user_posts(db: AsyncSession, user_id: int, status: Optional[str] = None) -> List[Post]:
+    """Получить посты пользователя, опционально фильтруя по статусу"""
+    query = select(Post).where(Post.user_id == user_id)
+    if status:
+        query = query.where(Post.status == status)
+    result = await db.execute(query.order_by(desc(Post.created_at)))
+    return list(result.scalars().all())
+
+
+def _with_author(query):
+    """
+    Загрузить автора поста тем же запросом (JOIN)
+
+    Для списков нужны только username и full_name - остальные поля
+    пользователя не читаются.
+    """
+    return query.options(joinedload(Post.user).load_only(User.username, User.full_name))
+
+
+async def count_posts(db: AsyncSession, status: str) -> int:
+    """Количество постов со статусом (кэшируется вместе со списками)"""
+    return await count_cached(db, select(Post).where(Post.status == status), f"posts:{status}")
+
+
+async def get_posts_in_queue(db: AsyncSession, limit: Optional[int] = None, with_user: bool = True) -> List[Post]:
+    """Получить посты в очереди по порядку (with_user - вместе с авторами)"""
+    query = select(Post).where(Post.status == 'queue').order_by(asc(Post.queue_position), asc(Post.id))
+    if with_user:
+        query = _with_author(query)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_scheduled_posts(db: AsyncSession, limit: Optional[int] = None, with_user: bool = True) -> List[Post]:
+    """Получить запланированные посты по времени (with_user - вместе с авторами)"""
+    query = select(Post).where(Post.status == 'scheduled').order_by(asc(Post.scheduled_time), asc(Post.id))
+    if with_user:
+        query = _with_author(query)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_queue_summaries(db: AsyncSession, limit: Optional[int] = None, with_author: bool = True) -> List[PostSummary]:
+    """Получить строки списка очереди (только выводимые поля)"""
+    return to_summaries(await db.execute(queue_summary_query(with_author).limit(limit)))
+
+
+async def get_scheduled_summaries(db: AsyncSession, limit: Optional[int] = None, with_author: bool = True) -> List[PostSummary]:
+    """Получить строки списка запланированных постов (только выводимые поля)"""
+    return to_summaries(await db.execute(scheduled_summary_query(with_author).limit(limit)))
+
+
+async def get_queue_page(db: AsyncSession, page: int = 1, cursor: Optional[str] = None, page_size: int = 5) -> Page:
+    """Страница очереди публикаций (PostSummary с автором), по порядку очереди"""
+    return await paginate(
+        db,
+        post_summary_query().where(Post.status == 'queue'),
+        order_by=[Post.queue_position, Post.id],
+        page=page, cursor=cursor, page_size=page_size,
+        count_key='posts:queue', row_factory=PostSummary.from_row,
+    )
+
+
+async def get_scheduled_page(db: AsyncSession, page: int = 1, cursor: Optional[str] = None, page_size: int = 5) -> Page:
+    """Страница запланированных постов (PostSummary с автором), по времени публикации"""
+    return await paginate(
+        db,
+        post_summary_query().where(Post.status == 'scheduled'),
+        order_by=[Post.scheduled_time, Post.id],
+        page=page, cursor=cursor, page_size=page_size,
+        count_key='posts:scheduled', row_factory=PostSummary.from_row,
+    )
+
+
+# Статусы постов в разделе "Мои публикации"
+USER_POST_STATUSES = ('queue', 'scheduled', 'published')
+
+
+def _user_posts_count_key(user_id: int, status: str) -> str:
+    return f"user:{user_id}:posts:{status}"
+
+
+async def count_user_posts_by_status(
+    db: AsyncSession,
+    user_id: int,
+    statuses: Sequence[str] = USER_POST_STATUSES
+) -> Dict[str, int]:
+    """
+    Количество постов пользователя по статусам
+
+    Кэш общий со списками get_user_posts_page; статусы, которых нет
+    в кэше, считаются одним запросом с GROUP BY.
+
+    Returns:
+        {статус: количество} для всех statuses (в том числе нулевые)
+    """
+    keys = {status: _user_posts_count_key(user_id, status) for status in statuses}
+    cached = await get_cached_counts(list(keys.values()))
+    counts = {status: cached[key] for status, key in keys.items() if key in cached}
+
+    missing = [status for status in statuses if status not in counts]
+    if missing:
+        result = await db.execute(
+            select(Post.status, func.count())
+            .where(Post.user_id == user_id, Post.status.in_(missing))
+            .group_by(Post.status)
+        )
+        fetched = dict.fromkeys(missing, 0)
+        fetched.update(result.all())
+        await store_cached_counts({keys[status]: total for status, total in fetched.items()})
+        counts.update(fetched)
+
+    return counts
+
+
+async def get_user_posts_page(
+    db: AsyncSession,
+    user_id: int,
+    status: str,
+    page: int = 1,
+    cursor: Optional[str] = None,
+    page_size: int = 5
+) -> Page:
+    """
+    Страница постов пользователя с указанным статусом (PostSummary без автора)
+
+    Очередь - по порядку очереди, запланированные - по времени публикации,
+    опубликованные - сначала новые.
+    """
+    query = post_summary_query(with_author=False).where(Post.user_id == user_id, Post.status == status)
+    count_key = _user_posts_count_key(user_id, status)
+
+    if status == 'published':
+        # У старых записей published_at может быть пустым
+        published = func.coalesce(Post.published_at, Post.created_at)
+        return await paginate(
+            db, query, order_by=[published, Post.id],
+            page=page, cursor=cursor, page_size=page_size, count_key=count_key,
+            descending=True, key=lambda post: (post.published_at or post.created_at, post.id),
+            row_factory=PostSummary.from_row,
+        )
+
+    sort_column = Post.queue_position if status == 'queue' else Post.scheduled_time
+    return await paginate(
+        db, query, order_by=[sort_column, Post.id],
+        page=page, cursor=cursor, page_size=page_size, count_key=count_key,
+        row_factory=PostSummary.from_row,
+    )
+
+
+async def update_post(db: AsyncSession, post: Post, **kwargs) -> Post:
+    """Обновить пост (индексы дубликатов обновляются при смене статуса, текста или фото)"""
+    for key, value in kwargs.items():
+        if hasattr(post, key):
+            setattr(post, key, value)
+    await db.commit()
+    await db.refresh(post)
+    if kwargs.keys() & LSH_FIELDS:
+        await index_post_async(post)
+    if kwargs.keys() & IMAGE_FIELDS:
+        await index_image_async(post)
+    return post
+
+
+async def delete_post(db: AsyncSession, post: Post):
+    """Удалить пост"""
+    await db.delete(post)
+    await db.commit()
+    await unindex_post_async(post.id)
+    await unindex_image_async(post.id)
+
+
+async def enqueue_post(db: AsyncSession, user_id: int, **kwargs) -> Post:
+    """
+    Создать пост сразу в очереди
+
+    Номер в очереди вычисляется в том же INSERT под транзакционной
+    advisory-блокировкой, поэтому параллельные постановки получают
+    уникальные номера без пропусков.
+    """
+    await db.execute(select(func.pg_advisory_xact_lock(QUEUE_LOCK_ID)))
+    post = Post(user_id=user_id, status='queue', queue_position=_next_queue_position(), **kwargs)
+    db.add(post)
+    await db.commit()
+    await db.refresh(post)
+    await index_post_async(post)
+    await index_image_async(post)
+    return post
+
+
+async def get_queue_rank(db: AsyncSession, post: Post) -> Optional[int]:
+    """
+    Место поста в очереди (1 - следующий на публикацию)
+
+    queue_position задает только порядок, место считается по индексу
+    очереди, поэтому публикация не требует перенумерации остальных постов.
+    """
+    if post.status != 'queue' or post.queue_position is None:
+        return None
+    return await db.scalar(
+        select(func.count(Post.id)).where(
+            Post.status == 'queue',
+            Post.queue_position <= post.queue_position
+        )
+    )
+
+
+async def get_queue_ranks(db: AsyncSession, posts: List[Post]) -> Dict[int, int]:
+    """Места в очереди для нескольких постов одним запросом: {post_id: место}"""
+    post_ids = [post.id for post in posts if post.status == 'queue']
+    if not post_ids:
+        return {}
+
+    ahead = aliased(Post)
+    rank = (
+        select(func.count(ahead.id))
+        .where(ahead.status == 'queue', ahead.queue_position <= Post.queue_position)
+        .correlate(Post)
+        .scalar_subquery()
+    )
+    result = await db.execute(select(Post.id, rank).where(Post.id.in_(post_ids), Post.status == 'queue'))
+    return dict(result.all())
+
+
+# === PAYMENT CRUD ===
+
+async def create_payment(db: AsyncSession, user_id: int, post_id: Optional[int], amount: float, **kwargs) -> Payment:
+    """Создать новый платеж"""
+    payment = Payment(
+        user_id=user_id,
+        post_id=post_id,
+        amount=amount,
+        **kwargs
+    )
+    db.add(payment)
+    await db.commit()
+    await db.refresh(payment)
+    return payment
+
+
+async def get_payment(db: AsyncSession, payment_id: int) -> Optional[Payment]:
+    """Получить платеж по ID"""
+    result = await db.execute(select(Payment).where(Payment.id == payment_id))
+    return result.scalars().first()
+
+
+async def get_payment_by_payment_id(db: AsyncSession, payment_id: str) -> Optional[Payment]:
+    """Получить платеж по ID из платежной системы"""
+    result = await db.execute(select(Payment).where(Payment.payment_id == payment_id))
+    return result.scalars().first()
+
+
+async def update_payment(db: AsyncSession, payment: Payment, **kwargs) -> Payment:
+    """Обновить платеж"""
+    for key, value in kwargs.items():
+        if hasattr(payment, key):
+            setattr(payment, key, value)
+    await db.commit()
+    await db.refresh(payment)
+    return payment
+
+
+# === SETTING CRUD ===
+
+async def get_setting(db: AsyncSession, key: str) -> Optional[Setting]:
+    """Получить настройку по ключу"""
+    result = await db.execute(select(Setting).where(Setting.key == key))
+    return result.scalars().first()
+
+
+async def get_setting_value(db: AsyncSession, key: str, default: str = None) -> Optional[str]:
+    """Получить значение настройки по ключу (из кэша настроек)"""
+    return (await get_settings(db)).get(key, default)
+
+
+async def update_setting(db: AsyncSession, key: str, value: str) -> Setting:
+    """Обновить настройку"""
+    setting = await get_setting(db, key)
+    if setting:
+        setting.value = value
+    else:
+        setting = Setting(key=key, value=value)
+        db.add(setting)
+    await db.commit()
+    await db.refresh(setting)
+    await publish_settings_changed_async(key)
+    return setting
+
+
+# === ADMIN LOG CRUD ===
+
+async def create_admin_log(db: AsyncSession, admin_id: int, action: str, details: dict = None):
+    """Создать запись в логе администратора"""
+    log = AdminLog(
+        admin_id=admin_id,
+        action=action,
+        details=details
+    )
+    db.add(log)
+    await db.commit()
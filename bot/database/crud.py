@@ -1,7 +1,15 @@
-from typing import Optional, List
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Set, Iterable
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
-from .models import User, Post, Payment, Setting, AdminLog
+from sqlalchemy import select, desc, asc, func, and_, or_, not_
+from sqlalchemy.dialects.postgresql import insert
+from bot.config import config
+from .models import User, Post, Payment, Setting, PublishSlot, AdminLog
+from .settings import get_settings_sync, publish_settings_changed
+from .identity import forget_user_sync
+from .lsh_index import SIGNATURE_FIELDS, index_post, unindex_post
+from .image_index import index_image, unindex_image
 
 
 # === USER CRUD ===
@@ -27,23 +35,35 @@ def create_user(db: Session, telegram_id: int, username: str = None, full_name:
 
 
 def update_user(db: Session, user: User, **kwargs) -> User:
-    """Обновить пользователя"""
+    """Обновить пользователя (запись в кэше пользователей в Redis сбрасывается)"""
     for key, value in kwargs.items():
         if hasattr(user, key):
             setattr(user, key, value)
     db.commit()
     db.refresh(user)
+    forget_user_sync(user.telegram_id)
     return user
 
 
 # === POST CRUD ===
 
+# Ключ advisory-блокировки постановки в очередь
+QUEUE_LOCK_ID = 7_001
+
+
+def _next_queue_position():
+    """Следующий номер в очереди (подзапрос, вычисляется в момент INSERT)"""
+    return select(func.coalesce(func.max(Post.queue_position), 0) + 1).scalar_subquery()
+
+
 def create_post(db: Session, user_id: int, **kwargs) -> Post:
     """Создать новый пост"""
     post = Post(user_id=user_id, **kwargs)
     db.add(post)
     db.commit()
     db.refresh(post)
+    index_post(post)
+    index_image(post)
     return post
 
 
@@ -70,13 +90,82 @@ def get_scheduled_posts(db: Session) -> List[Post]:
     return db.query(Post).filter(Post.status == 'scheduled').order_by(asc(Post.scheduled_time)).all()
 
 
+def get_scheduled_post_times(db: Session) -> List[tuple]:
+    """Получить (id, scheduled_time) запланированных постов без загрузки самих постов"""
+    return db.query(Post.id, Post.scheduled_time).filter(Post.status == 'scheduled').all()
+
+
+def get_first_post_in_queue(db: Session) -> Optional[Post]:
+    """Получить первый пост в очереди"""
+    return db.query(Post).filter(Post.status == 'queue').order_by(asc(Post.queue_position)).first()
+
+
+def lock_first_post_in_queue(db: Session) -> Optional[Post]:
+    """
+    Первый пост в очереди с блокировкой строки до конца транзакции
+
+    Посты, заблокированные другими транзакциями (параллельный слот),
+    пропускаются: два слота не опубликуют один и тот же пост.
+    """
+    return (
+        db.query(Post)
+        .filter(Post.status == 'queue')
+        .order_by(asc(Post.queue_position))
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+
+
+def lock_scheduled_post(db: Session, post_id: int) -> Optional[Post]:
+    """
+    Приоритетный пост с блокировкой строки до конца транзакции
+
+    Возвращает None, если пост уже не 'scheduled' или его публикует
+    другая задача (строка заблокирована): пост не уйдет в канал дважды.
+    """
+    return (
+        db.query(Post)
+        .filter(Post.id == post_id, Post.status == 'scheduled')
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+
+
+# Изменение этих полей меняет запись поста в LSH-индексе и индексе изображений
+LSH_FIELDS = {'status', *SIGNATURE_FIELDS}
+IMAGE_FIELDS = {'status', 'image_hash'}
+
+
 def update_post(db: Session, post: Post, **kwargs) -> Post:
-    """Обновить пост"""
+    """Обновить пост (индексы дубликатов обновляются при смене статуса, текста или фото)"""
     for key, value in kwargs.items():
         if hasattr(post, key):
             setattr(post, key, value)
     db.commit()
     db.refresh(post)
+    if kwargs.keys() & LSH_FIELDS:
+        index_post(post)
+    if kwargs.keys() & IMAGE_FIELDS:
+        index_image(post)
+    return post
+
+
+def mark_post_published(db: Session, post: Post, slot_id: Optional[int] = None, **kwargs) -> Post:
+    """
+    Отметить пост опубликованным
+
+    Статус поста, данные отправленного сообщения (kwargs) и результат
+    слота очереди записываются одним commit.
+    """
+    post.status = 'published'
+    for key, value in kwargs.items():
+        setattr(post, key, value)
+    if slot_id is not None:
+        _set_publish_slot_result(db, slot_id, 'published', post.id)
+    db.commit()
+    db.refresh(post)
+    index_post(post)
+    index_image(post)
     return post
 
 
@@ -84,20 +173,115 @@ def delete_post(db: Session, post: Post):
     """Удалить пост"""
     db.delete(post)
     db.commit()
+    unindex_post(post.id)
+    unindex_image(post.id)
 
 
-def get_next_queue_position(db: Session) -> int:
-    """Получить следующую позицию в очереди"""
-    last_post = db.query(Post).filter(Post.status == 'queue').order_by(desc(Post.queue_position)).first()
-    return (last_post.queue_position + 1) if last_post and last_post.queue_position else 1
-
+def enqueue_post(db: Session, user_id: int, **kwargs) -> Post:
+    """
+    Создать пост сразу в очереди
 
-def recalculate_queue_positions(db: Session):
-    """Пересчитать позиции в очереди"""
-    posts = db.query(Post).filter(Post.status == 'queue').order_by(asc(Post.queue_position)).all()
-    for idx, post in enumerate(posts, start=1):
-        post.queue_position = idx
+    Номер в очереди вычисляется в том же INSERT под транзакционной
+    advisory-блокировкой, поэтому параллельные постановки получают
+    уникальные номера без пропусков.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(QUEUE_LOCK_ID)))
+    post = Post(user_id=user_id, status='queue', queue_position=_next_queue_position(), **kwargs)
+    db.add(post)
     db.commit()
+    db.refresh(post)
+    index_post(post)
+    index_image(post)
+    return post
+
+
+# === POST SUMMARIES ===
+
+@dataclass(slots=True, frozen=True)
+class PostSummary:
+    """
+    Строка списка постов: только поля, которые выводятся в списках
+
+    Тяжелые поля поста (ad_formats, social_networks, conditions) не читаются.
+    """
+    id: int
+    product_name: str
+    status: str
+    queue_position: Optional[int]
+    scheduled_time: Optional[datetime]
+    published_at: Optional[datetime]
+    created_at: datetime
+    username: Optional[str] = None
+    full_name: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row) -> 'PostSummary':
+        """Строка post_summary_query() в PostSummary"""
+        return cls(*row)
+
+    @property
+    def author(self) -> str:
+        """Подпись автора для списков"""
+        return self.username or self.full_name or ''
+
+
+SUMMARY_COLUMNS = (
+    Post.id,
+    Post.product_name,
+    Post.status,
+    Post.queue_position,
+    Post.scheduled_time,
+    Post.published_at,
+    Post.created_at,
+)
+
+
+def post_summary_query(with_author: bool = True):
+    """SELECT полей PostSummary (with_author - имя автора через JOIN)"""
+    if with_author:
+        return select(*SUMMARY_COLUMNS, User.username, User.full_name).join(User, Post.user_id == User.id)
+    return select(*SUMMARY_COLUMNS)
+
+
+def to_summaries(rows: Iterable) -> List[PostSummary]:
+    """Строки post_summary_query() в список PostSummary"""
+    return [PostSummary.from_row(row) for row in rows]
+
+
+def queue_summary_query(with_author: bool = True):
+    """Посты в очереди по порядку"""
+    return (
+        post_summary_query(with_author)
+        .where(Post.status == 'queue')
+        .order_by(asc(Post.queue_position), asc(Post.id))
+    )
+
+
+def scheduled_summary_query(with_author: bool = True):
+    """Запланированные посты по времени публикации"""
+    return (
+        post_summary_query(with_author)
+        .where(Post.status == 'scheduled')
+        .order_by(asc(Post.scheduled_time), asc(Post.id))
+    )
+
+
+def get_queue_summaries(db: Session, limit: Optional[int] = None, with_author: bool = True) -> List[PostSummary]:
+    """Получить строки списка очереди"""
+    return to_summaries(db.execute(queue_summary_query(with_author).limit(limit)))
+
+
+def get_scheduled_summaries(db: Session, limit: Optional[int] = None, with_author: bool = True) -> List[PostSummary]:
+    """Получить строки списка запланированных постов"""
+    return to_summaries(db.execute(scheduled_summary_query(with_author).limit(limit)))
+
+
+def get_user_post_summaries(db: Session, user_id: int, status: Optional[str] = None) -> List[PostSummary]:
+    """Получить строки списка постов пользователя (сначала новые)"""
+    query = post_summary_query(with_author=False).where(Post.user_id == user_id)
+    if status:
+        query = query.where(Post.status == status)
+    return to_summaries(db.execute(query.order_by(desc(Post.created_at))))
 
 
 # === PAYMENT CRUD ===
@@ -144,9 +328,8 @@ def get_setting(db: Session, key: str) -> Optional[Setting]:
 
 
 def get_setting_value(db: Session, key: str, default: str = None) -> Optional[str]:
-    """Получить значение настройки по ключу"""
-    setting = get_setting(db, key)
-    return setting.value if setting else default
+    """Получить значение настройки по ключу (из кэша настроек)"""
+    return get_settings_sync(db).get(key, default)
 
 
 def update_setting(db: Session, key: str, value: str) -> Setting:
@@ -161,9 +344,76 @@ def update_setting(db: Session, key: str, value: str) -> Setting:
         db.add(setting)
         db.commit()
         db.refresh(setting)
+    publish_settings_changed(key)
     return setting
 
 
+# === PUBLISH SLOT CRUD ===
+
+def claim_publish_slot(db: Session, slot_time: datetime) -> Optional[int]:
+    """
+    Занять слот публикации
+
+    Слот занимается ровно один раз: повторный вызов для того же слота
+    вернет None. Заново можно занять слот со статусом 'failed' и слот,
+    занятый дольше SLOT_CLAIM_TIMEOUT секунд назад задачей, которая
+    так его и не обслужила (например, упал воркер).
+
+    Returns:
+        ID записи журнала или None, если слот уже обслужен
+    """
+    now = datetime.now()
+    stmt = insert(PublishSlot).values(slot_time=slot_time, status='claimed', claimed_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PublishSlot.slot_time],
+        set_={'status': 'claimed', 'claimed_at': now, 'post_id': None, 'served_at': None},
+        where=or_(PublishSlot.status == 'failed', _stale_claim(now)),
+    ).returning(PublishSlot.id)
+
+    slot_id = db.execute(stmt).scalar()
+    db.commit()
+    return slot_id
+
+
+def _stale_claim(now: datetime):
+    # Слот занят, но задача не отметила результат за SLOT_CLAIM_TIMEOUT
+    return and_(
+        PublishSlot.status == 'claimed',
+        or_(
+            PublishSlot.claimed_at.is_(None),
+            PublishSlot.claimed_at < now - timedelta(seconds=config.SLOT_CLAIM_TIMEOUT)
+        )
+    )
+
+
+def _set_publish_slot_result(db: Session, slot_id: int, status: str, post_id: Optional[int]):
+    db.query(PublishSlot).filter(PublishSlot.id == slot_id).update(
+        {'status': status, 'post_id': post_id, 'served_at': datetime.now()},
+        synchronize_session=False
+    )
+
+
+def complete_publish_slot(db: Session, slot_id: int, status: str, post_id: Optional[int] = None):
+    """Отметить результат обслуживания слота ('published', 'empty', 'failed')"""
+    _set_publish_slot_result(db, slot_id, status, post_id)
+    db.commit()
+
+
+def get_first_publish_slot_time(db: Session) -> Optional[datetime]:
+    """Время первого слота в журнале"""
+    return db.query(func.min(PublishSlot.slot_time)).scalar()
+
+
+def get_publish_slot_times(db: Session, since: datetime) -> Set[datetime]:
+    """Времена слотов начиная с since, которые не нужно обслуживать повторно"""
+    rows = db.query(PublishSlot.slot_time).filter(
+        PublishSlot.slot_time >= since,
+        PublishSlot.status != 'failed',
+        not_(_stale_claim(datetime.now()))
+    ).all()
+    return {row.slot_time for row in rows}
+
+
 # === ADMIN LOG CRUD ===
 
 def create_admin_log(db: Session, admin_id: int, action: str, details: dict = None):
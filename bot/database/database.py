@@ -1,6 +1,11 @@
 import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from bot.config import config
+from bot.utils.metrics import DB_POOL_CHECKOUT_WAIT
 from .models import Base, Setting
 
 # Получение параметров подключения из переменных окружения
@@ -12,13 +17,50 @@ DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
 
 # Строка подключения к базе данных
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+class TimedQueuePool(QueuePool):
+    """Пул соединений, замеряющий время ожидания свободного соединения"""
+
+    metric_label = 'sync'
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metric_label).observe(time.perf_counter() - started)
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """Асинхронный вариант TimedQueuePool для asyncpg"""
+
+    metric_label = 'async'
+
+
+# Параметры пула соединений (из Config)
+POOL_OPTIONS = {
+    'pool_size': config.DB_POOL_SIZE,
+    'max_overflow': config.DB_MAX_OVERFLOW,
+    'pool_timeout': config.DB_POOL_TIMEOUT,
+    'pool_recycle': config.DB_POOL_RECYCLE,
+    'pool_pre_ping': config.DB_POOL_PRE_PING,
+}
 
 # Создание движка базы данных
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(DATABASE_URL, echo=False, poolclass=TimedQueuePool, **POOL_OPTIONS)
 
 # Создание фабрики сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок (asyncpg) для обработчиков бота
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS)
+
+# Фабрика асинхронных сессий
+# expire_on_commit=False - объекты остаются доступными после commit без повторного запроса
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db() -> Session:
     """
@@ -31,12 +73,40 @@ def get_db() -> Session:
         db.close()
 
 
+async def get_async_db() -> AsyncSession:
+    """
+    Получение асинхронной сессии базы данных
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Кандидаты в дубликаты выбираются по схожести названия (product_name % :name).
+# Расширения pg_trgm может не быть или у роли может не хватать прав на его
+# установку: тогда бот работает без индекса (см. bot/database/duplicates.py)
+TRIGRAM_INDEX_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_posts_product_name_trgm ON posts USING gin (product_name gin_trgm_ops)",
+)
+
+
+def create_trigram_index():
+    """Создать триграммный индекс названий постов (ошибка не прерывает запуск)"""
+    try:
+        with engine.begin() as conn:
+            for ddl in TRIGRAM_INDEX_DDL:
+                conn.execute(text(ddl))
+    except Exception as e:
+        print(f"⚠️ Триграммный индекс не создан, проверка дубликатов будет медленнее: {e}")
+
+
 def init_db():
     """
     Инициализация базы данных - создание таблиц и заполнение настроек
     """
     # Создание всех таблиц
     Base.metadata.create_all(bind=engine)
+    create_trigram_index()
 
     # Заполнение настроек по умолчанию
     db = SessionLocal()
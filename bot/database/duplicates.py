@@ -0,0 +1,150 @@
+"""
+Поиск дубликатов постов
+
+check_duplicate сравнивает новый пост с каждым постом из переданного списка.
+Здесь список - не все посты, а кандидаты, выбранные в БД по триграммному
+GIN-индексу названия (product_name % :name, расширение pg_trgm): не больше
+DUPLICATE_CANDIDATES самых похожих по названию постов. Оценка и веса -
+прежние (check_duplicate), порог - настройка duplicate_threshold.
+
+Отбора по одному названию достаточно: оценка - среднее схожести названия,
+маркетплейса и тематики, и при пороге 80% дубликат невозможен, если названия
+похожи меньше чем на 40%. Тематика обычно одна из предустановленных, поэтому
+условие по ней кандидатов не сужает.
+
+Повторно поданные предложения с переставленными словами или эмодзи
+добавляются в кандидаты по LSH-индексу MinHash-подписей (lsh_index).
+Оценка Жаккара из индекса только отбирает кандидатов: все кандидаты
+оцениваются rapidfuzz, название - еще и без учета порядка слов и знаков.
+
+Похожие фото ищутся отдельно, по хэшу (posts.image_hash) в индексе
+изображений (image_index), без загрузки самих фото.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Select, Text, select, func, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import config
+from bot.utils.duplicate_checker import IMAGE_HASH_BITS, score_candidates
+from .image_index import find_similar_images_async
+from .lsh_index import DUPLICATE_STATUSES, find_similar_async
+from .models import Post
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_COLUMNS = (
+    Post.id,
+    Post.user_id,
+    Post.status,
+    Post.product_name,
+    Post.marketplace,
+    Post.blog_theme,
+    Post.created_at,
+)
+
+
+def candidates_query(product_name: str, limit: int) -> Select:
+    """Посты с похожим названием (по индексу ix_posts_product_name_trgm), самые похожие первыми"""
+    name = literal(product_name, Text)
+    return (
+        select(*CANDIDATE_COLUMNS)
+        .where(Post.product_name.op('%')(name), Post.status.in_(DUPLICATE_STATUSES))
+        .order_by(func.similarity(Post.product_name, name).desc())
+        .limit(limit)
+    )
+
+
+async def _fetch_candidates(db: AsyncSession, product_name: str, post_ids: List[int]) -> List[dict]:
+    candidates: Dict[int, dict] = {}
+
+    try:
+        # Точка сохранения: ошибка запроса не откатывает транзакцию сессии
+        async with db.begin_nested():
+            result = await db.execute(candidates_query(product_name, config.DUPLICATE_CANDIDATES))
+            candidates.update((row['id'], dict(row)) for row in result.mappings())
+    except Exception as e:
+        # Например, pg_trgm не установлен: проверка не должна мешать созданию поста
+        logger.warning(f"Не удалось выбрать кандидатов в дубликаты: {e}")
+
+    missing = [post_id for post_id in post_ids if post_id not in candidates]
+    if missing:
+        result = await db.execute(
+            select(*CANDIDATE_COLUMNS).where(Post.id.in_(missing), Post.status.in_(DUPLICATE_STATUSES))
+        )
+        candidates.update((row['id'], dict(row)) for row in result.mappings())
+
+    return list(candidates.values())
+
+
+async def find_duplicate(
+    db: AsyncSession,
+    post_data: dict,
+    threshold: Optional[float] = None
+) -> Tuple[bool, Optional[dict], float]:
+    """
+    Проверить новый пост на дубликаты среди опубликованных и ожидающих
+
+    Args:
+        post_data: Данные нового поста (product_name, marketplace, blog_theme, conditions)
+        threshold: Порог схожести, % (None - настройка duplicate_threshold)
+
+    Returns:
+        Tuple (is_duplicate, similar_post, similarity_score), как check_duplicate
+    """
+    product_name = (post_data.get('product_name') or '').strip()
+    if not product_name:
+        return False, None, 0.0
+
+    if threshold is None:
+        threshold = (await get_settings(db)).duplicate_threshold
+
+    similar = await find_similar_async(post_data)
+    candidates = await _fetch_candidates(db, product_name, list(similar))
+    if not candidates:
+        return False, None, 0.0
+
+    # Оценка check_duplicate; переставленные слова и эмодзи в названии не снижают схожесть
+    scores = np.maximum(
+        score_candidates(post_data, candidates),
+        score_candidates(post_data, candidates, reordered=True)
+    )
+    best = int(np.argmax(scores))
+    if scores[best] <= 0:
+        return False, None, 0.0
+    return bool(scores[best] >= threshold), candidates[best], float(scores[best])
+
+
+async def find_image_duplicate(
+    db: AsyncSession,
+    image_hash: int,
+    exclude: Optional[int] = None
+) -> Tuple[bool, Optional[dict], float]:
+    """
+    Найти пост с похожим фото (хэш отличается не больше чем на IMAGE_HASH_DISTANCE бит)
+
+    Args:
+        image_hash: Хэш фото нового поста (compute_image_hash)
+        exclude: id поста, который не учитывать (сам пост)
+
+    Returns:
+        Tuple (is_duplicate, similar_post, similarity_score), как find_duplicate
+    """
+    similar = await find_similar_images_async(image_hash, exclude=exclude)
+    if not similar:
+        return False, None, 0.0
+
+    result = await db.execute(
+        select(*CANDIDATE_COLUMNS).where(Post.id.in_(list(similar)), Post.status.in_(DUPLICATE_STATUSES))
+    )
+    posts = {row['id']: dict(row) for row in result.mappings()}
+
+    # similar упорядочен по расстоянию: первый найденный в БД - самый похожий
+    for post_id, distance in similar.items():
+        if post_id in posts:
+            return True, posts[post_id], (1 - distance / IMAGE_HASH_BITS) * 100
+    return False, None, 0.0
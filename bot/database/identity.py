@@ -0,0 +1,237 @@
+"""
+Кэш пользователей по Telegram ID
+
+Почти каждый апдейт начинается с поиска пользователя по telegram_id.
+UserIdentity - легкая копия нужных обработчикам полей (id, роль, имя),
+которая хранится в LRU-кэше процесса USER_CACHE_TTL секунд и, если
+включен USER_CACHE_REDIS, дублируется в Redis (hash user:tg:<telegram_id>)
+для других экземпляров бота.
+
+При смене роли (update_user) запись сбрасывается в кэше процесса и в Redis,
+а telegram_id рассылается в канал USERS_CHANNEL: остальные процессы бота
+(listen_user_changes) убирают запись из своего кэша.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import config
+from bot.utils.redis_client import get_redis, get_async_redis
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+USER_KEY_PREFIX = 'user:tg'
+
+# Канал Redis: telegram_id пользователя, которого нужно сбросить из кэша
+USERS_CHANNEL = 'users:invalidate'
+
+# Пауза перед повторной подпиской после ошибки Redis, сек.
+RESUBSCRIBE_DELAY = 5.0
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """Пользователь бота (только поля, нужные обработчикам)"""
+    id: int
+    telegram_id: int
+    role: Optional[str]
+    username: Optional[str]
+    full_name: Optional[str]
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == 'admin'
+
+
+class _LRUCache:
+    """LRU-кэш с временем жизни записей"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._items[key] = (value, time.monotonic() + self.ttl)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key):
+        self._items.pop(key, None)
+
+    def clear(self):
+        self._items.clear()
+
+
+_cache = _LRUCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL)
+
+_IDENTITY_COLUMNS = (User.id, User.telegram_id, User.role, User.username, User.full_name)
+
+
+def user_key(telegram_id: int) -> str:
+    return f"{USER_KEY_PREFIX}:{telegram_id}"
+
+
+def identity_of(user: User) -> UserIdentity:
+    """UserIdentity из ORM-объекта пользователя"""
+    return UserIdentity(
+        id=user.id,
+        telegram_id=user.telegram_id,
+        role=user.role,
+        username=user.username,
+        full_name=user.full_name,
+    )
+
+
+async def _get_mirrored(telegram_id: int) -> Optional[UserIdentity]:
+    try:
+        data = await get_async_redis().hgetall(user_key(telegram_id))
+    except Exception as e:
+        logger.warning(f"Кэш пользователей в Redis недоступен: {e}")
+        return None
+    if not data:
+        return None
+    return UserIdentity(
+        id=int(data['id']),
+        telegram_id=telegram_id,
+        role=data.get('role') or None,
+        username=data.get('username') or None,
+        full_name=data.get('full_name') or None,
+    )
+
+
+async def _mirror(identity: UserIdentity):
+    try:
+        key = user_key(identity.telegram_id)
+        mapping = {field: '' if value is None else value for field, value in asdict(identity).items()}
+        async with get_async_redis().pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, config.USER_CACHE_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить пользователя в Redis: {e}")
+
+
+async def remember_user(identity: UserIdentity):
+    """Положить пользователя в кэш (после создания или изменения)"""
+    _cache.set(identity.telegram_id, identity)
+    if config.USER_CACHE_REDIS:
+        await _mirror(identity)
+
+
+async def forget_user(telegram_id: int):
+    """Сбросить пользователя из кэша у себя, в Redis и в других процессах (например, после смены роли)"""
+    _cache.pop(telegram_id)
+    try:
+        redis = get_async_redis()
+        if config.USER_CACHE_REDIS:
+            await redis.delete(user_key(telegram_id))
+        await redis.publish(USERS_CHANNEL, telegram_id)
+    except Exception as e:
+        logger.warning(f"Не удалось разослать сброс пользователя {telegram_id}: {e}")
+
+
+def forget_user_sync(telegram_id: int):
+    """Сбросить пользователя в Redis и в процессах бота из синхронного кода (Celery)"""
+    try:
+        redis = get_redis()
+        if config.USER_CACHE_REDIS:
+            redis.delete(user_key(telegram_id))
+        redis.publish(USERS_CHANNEL, telegram_id)
+    except Exception as e:
+        logger.warning(f"Не удалось разослать сброс пользователя {telegram_id}: {e}")
+
+
+async def listen_user_changes():
+    """
+    Подписка бота на сбросы кэша пользователей (запускается задачей asyncio)
+
+    После каждой (пере)подписки кэш процесса очищается: сообщения, пришедшие
+    пока подписки не было, потеряны.
+    """
+    while True:
+        pubsub = get_async_redis().pubsub()
+        try:
+            await pubsub.subscribe(USERS_CHANNEL)
+            _cache.clear()
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    _cache.pop(int(message['data']))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Подписка на сброс кэша пользователей прервана: {e}")
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+        finally:
+            await pubsub.aclose()
+
+
+async def resolve_user(db: AsyncSession, telegram_id: int) -> Optional[UserIdentity]:
+    """
+    Пользователь по Telegram ID: кэш процесса, затем Redis, затем БД
+
+    Returns:
+        None, если пользователь не зарегистрирован (не кэшируется)
+    """
+    identity = _cache.get(telegram_id)
+    if identity is not None:
+        return identity
+
+    if config.USER_CACHE_REDIS:
+        identity = await _get_mirrored(telegram_id)
+        if identity is not None:
+            _cache.set(telegram_id, identity)
+            return identity
+
+    row = (await db.execute(select(*_IDENTITY_COLUMNS).where(User.telegram_id == telegram_id))).first()
+    if row is None:
+        return None
+
+    identity = UserIdentity(*row)
+    await remember_user(identity)
+    return identity
+
+
+async def sync_user_names(
+    db: AsyncSession,
+    identity: UserIdentity,
+    username: Optional[str],
+    full_name: Optional[str]
+) -> UserIdentity:
+    """
+    Обновить username и full_name, если они изменились в Telegram
+
+    Пишет в БД только при расхождении с кэшированными значениями.
+    """
+    if identity.username == username and identity.full_name == full_name:
+        return identity
+
+    await db.execute(
+        update(User).where(User.id == identity.id).values(username=username, full_name=full_name)
+    )
+    await db.commit()
+
+    identity = UserIdentity(identity.id, identity.telegram_id, identity.role, username, full_name)
+    await remember_user(identity)
+    return identity
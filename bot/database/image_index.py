@@ -0,0 +1,213 @@
+"""
+Индекс хэшей изображений постов в Redis (multi-index hashing)
+
+64-битный хэш (posts.image_hash) делится на IMAGE_HASH_DISTANCE + 1 частей.
+Если два хэша отличаются не больше чем в IMAGE_HASH_DISTANCE битах, хотя бы
+одна часть у них совпадает, поэтому кандидаты - посты из множеств
+совпавших частей, а точное расстояние считается только для них:
+
+    img:hashes                          - hash: post_id -> image_hash
+    img:chunk:<частей>:<номер>:<часть>  - set id постов
+
+Скачивать фото для сравнения не нужно. Индекс обновляется вместе
+с LSH-индексом текста; заполнить его для существующих постов
+(и после изменения IMAGE_HASH_DISTANCE):
+
+    python -m bot.database.image_index rebuild
+"""
+
+import argparse
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from bot.config import config
+from bot.utils.duplicate_checker import IMAGE_HASH_BITS, hash_distance
+from bot.utils.redis_client import get_redis, get_async_redis
+from .lsh_index import DUPLICATE_STATUSES
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+IMAGE_KEY_PREFIX = 'img'
+HASHES_KEY = f"{IMAGE_KEY_PREFIX}:hashes"
+
+
+def chunk_keys(image_hash: int, distance: Optional[int] = None) -> List[str]:
+    """Ключи множеств частей хэша (частей на одну больше допустимого расстояния)"""
+    count = (config.IMAGE_HASH_DISTANCE if distance is None else distance) + 1
+    value = image_hash & ((1 << IMAGE_HASH_BITS) - 1)
+    keys = []
+    start = 0
+    for number in range(count):
+        end = IMAGE_HASH_BITS * (number + 1) // count
+        part = (value >> start) & ((1 << (end - start)) - 1)
+        keys.append(f"{IMAGE_KEY_PREFIX}:chunk:{count}:{number}:{part:x}")
+        start = end
+    return keys
+
+
+def _add(pipe, post_id: int, image_hash: int):
+    pipe.hset(HASHES_KEY, post_id, image_hash)
+    for key in chunk_keys(image_hash):
+        pipe.sadd(key, post_id)
+
+
+def _remove(pipe, post_id: int, old_hash: Optional[str]):
+    if old_hash is not None:
+        for key in chunk_keys(int(old_hash)):
+            pipe.srem(key, post_id)
+    pipe.hdel(HASHES_KEY, post_id)
+
+
+def _indexed_hash(post: Post) -> Optional[int]:
+    return post.image_hash if post.status in DUPLICATE_STATUSES else None
+
+
+# === СИНХРОННЫЙ ИНДЕКС (Celery) ===
+
+def index_image(post: Post):
+    """Добавить хэш фото поста в индекс или убрать его (вызывать после commit)"""
+    try:
+        r = get_redis()
+        old_hash = r.hget(HASHES_KEY, post.id)
+        image_hash = _indexed_hash(post)
+        if old_hash is None and image_hash is None:
+            return
+        with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post.id, old_hash)
+            if image_hash is not None:
+                _add(pipe, post.id, image_hash)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось обновить индекс изображений для поста {post.id}: {e}")
+
+
+def unindex_image(post_id: int):
+    """Убрать хэш фото поста из индекса"""
+    try:
+        r = get_redis()
+        old_hash = r.hget(HASHES_KEY, post_id)
+        if old_hash is None:
+            return
+        with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post_id, old_hash)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось убрать пост {post_id} из индекса изображений: {e}")
+
+
+def clear_image_index():
+    """Удалить все ключи индекса"""
+    r = get_redis()
+    keys = []
+    for key in r.scan_iter(f"{IMAGE_KEY_PREFIX}:*", count=1000):
+        keys.append(key)
+        if len(keys) >= 1000:
+            r.delete(*keys)
+            keys = []
+    if keys:
+        r.delete(*keys)
+
+
+def rebuild_image_index(db: Session, batch_size: int = 1000) -> int:
+    """Построить индекс заново по всем постам с фото в DUPLICATE_STATUSES"""
+    clear_image_index()
+    r = get_redis()
+    query = (
+        select(Post.id, Post.image_hash)
+        .where(Post.image_hash.is_not(None), Post.status.in_(DUPLICATE_STATUSES))
+        .execution_options(yield_per=batch_size)
+    )
+    indexed = 0
+    for rows in db.execute(query).partitions():
+        with r.pipeline(transaction=False) as pipe:
+            for post_id, image_hash in rows:
+                _add(pipe, post_id, image_hash)
+            pipe.execute()
+        indexed += len(rows)
+    return indexed
+
+
+# === АСИНХРОННЫЙ ИНДЕКС (обработчики бота) ===
+
+async def index_image_async(post: Post):
+    """Асинхронная версия index_image"""
+    try:
+        r = get_async_redis()
+        old_hash = await r.hget(HASHES_KEY, post.id)
+        image_hash = _indexed_hash(post)
+        if old_hash is None and image_hash is None:
+            return
+        async with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post.id, old_hash)
+            if image_hash is not None:
+                _add(pipe, post.id, image_hash)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось обновить индекс изображений для поста {post.id}: {e}")
+
+
+async def unindex_image_async(post_id: int):
+    """Асинхронная версия unindex_image"""
+    try:
+        r = get_async_redis()
+        old_hash = await r.hget(HASHES_KEY, post_id)
+        if old_hash is None:
+            return
+        async with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post_id, old_hash)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось убрать пост {post_id} из индекса изображений: {e}")
+
+
+async def find_similar_images_async(image_hash: int, exclude: Optional[int] = None) -> Dict[int, int]:
+    """
+    Посты с фото, хэш которого отличается не больше чем на IMAGE_HASH_DISTANCE бит
+
+    Returns:
+        {post_id: расстояние Хэмминга} по возрастанию расстояния;
+        пустой словарь, если Redis недоступен
+    """
+    try:
+        r = get_async_redis()
+        async with r.pipeline(transaction=False) as pipe:
+            for key in chunk_keys(image_hash):
+                pipe.smembers(key)
+            members = await pipe.execute()
+
+        post_ids = sorted({int(post_id) for chunk in members for post_id in chunk} - {exclude})
+        if not post_ids:
+            return {}
+        stored = await r.hmget(HASHES_KEY, post_ids)
+    except Exception as e:
+        logger.warning(f"Индекс изображений недоступен: {e}")
+        return {}
+
+    # Совпавшая часть - только кандидат: точное расстояние по всем 64 битам
+    distances = [
+        (post_id, hash_distance(image_hash, int(value)))
+        for post_id, value in zip(post_ids, stored)
+        if value is not None
+    ]
+    return dict(sorted(
+        ((post_id, distance) for post_id, distance in distances if distance <= config.IMAGE_HASH_DISTANCE),
+        key=lambda item: item[1]
+    ))
+
+
+if __name__ == '__main__':
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description='Индекс хэшей изображений')
+    parser.add_argument('command', choices=['rebuild'])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Проиндексировано изображений: {rebuild_image_index(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,215 @@
+"""
+LSH-индекс почти-дубликатов постов в Redis
+
+Для каждого поста в статусах DUPLICATE_STATUSES хранятся:
+    lsh:sig:<post_id>           - MinHash-подпись (hex)
+    lsh:band:<полоса>:<хэш>     - set id постов с такой полосой подписи
+
+Поиск кандидатов читает BANDS множеств независимо от числа постов.
+Индекс обновляется при создании поста, смене статуса (публикация,
+отклонение) и удалении; заполнить его для существующих постов:
+
+    python -m bot.database.lsh_index rebuild
+"""
+
+import argparse
+import logging
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from bot.config import config
+from bot.utils.minhash import band_hashes, estimate_jaccard, from_hex, post_signature, to_hex
+from bot.utils.redis_client import get_redis, get_async_redis
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+LSH_KEY_PREFIX = 'lsh'
+
+# С какими постами сравнивается новый (черновики и отклоненные не учитываются)
+DUPLICATE_STATUSES = ('queue', 'scheduled', 'published')
+
+# Поля поста, из которых строится подпись
+SIGNATURE_FIELDS = ('product_name', 'blog_theme', 'conditions')
+
+
+def signature_key(post_id: int) -> str:
+    return f"{LSH_KEY_PREFIX}:sig:{post_id}"
+
+
+def band_keys(bands: List[str]) -> List[str]:
+    return [f"{LSH_KEY_PREFIX}:band:{band}:{value}" for band, value in enumerate(bands)]
+
+
+def _post_data(post: Post) -> dict:
+    return {field: getattr(post, field) for field in SIGNATURE_FIELDS}
+
+
+def _add(pipe, post_id: int, sig: np.ndarray):
+    pipe.set(signature_key(post_id), to_hex(sig))
+    for key in band_keys(band_hashes(sig)):
+        pipe.sadd(key, post_id)
+
+
+def _remove(pipe, post_id: int, old_sig: Optional[str]):
+    if old_sig:
+        for key in band_keys(band_hashes(from_hex(old_sig))):
+            pipe.srem(key, post_id)
+    pipe.delete(signature_key(post_id))
+
+
+def _rank(band_members: List[set], exclude: Optional[int], limit: int) -> List[int]:
+    # Чем больше совпавших полос, тем выше ожидаемая схожесть
+    hits = Counter(int(post_id) for members in band_members for post_id in members)
+    hits.pop(exclude, None)
+    return [post_id for post_id, _ in hits.most_common(limit)]
+
+
+# === СИНХРОННЫЙ ИНДЕКС (Celery) ===
+
+def index_post(post: Post):
+    """Добавить пост в индекс, если он в DUPLICATE_STATUSES, иначе убрать (вызывать после commit)"""
+    try:
+        r = get_redis()
+        old_sig = r.get(signature_key(post.id))
+        sig = post_signature(_post_data(post)) if post.status in DUPLICATE_STATUSES else None
+        with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post.id, old_sig)
+            if sig is not None:
+                _add(pipe, post.id, sig)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось обновить LSH-индекс для поста {post.id}: {e}")
+
+
+def unindex_post(post_id: int):
+    """Убрать пост из индекса"""
+    try:
+        r = get_redis()
+        old_sig = r.get(signature_key(post_id))
+        with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post_id, old_sig)
+            pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось убрать пост {post_id} из LSH-индекса: {e}")
+
+
+def clear_index():
+    """Удалить все ключи индекса"""
+    r = get_redis()
+    keys = []
+    for key in r.scan_iter(f"{LSH_KEY_PREFIX}:*", count=1000):
+        keys.append(key)
+        if len(keys) >= 1000:
+            r.delete(*keys)
+            keys = []
+    if keys:
+        r.delete(*keys)
+
+
+def rebuild_index(db: Session, batch_size: int = 1000) -> int:
+    """Построить индекс заново по всем постам в DUPLICATE_STATUSES"""
+    clear_index()
+    r = get_redis()
+    columns = (Post.id, *(getattr(Post, field) for field in SIGNATURE_FIELDS))
+    query = select(*columns).where(Post.status.in_(DUPLICATE_STATUSES)).execution_options(yield_per=batch_size)
+
+    indexed = 0
+    for rows in db.execute(query).partitions():
+        with r.pipeline(transaction=False) as pipe:
+            for post_id, *values in rows:
+                sig = post_signature(dict(zip(SIGNATURE_FIELDS, values)))
+                if sig is not None:
+                    _add(pipe, post_id, sig)
+                    indexed += 1
+            pipe.execute()
+    return indexed
+
+
+# === АСИНХРОННЫЙ ИНДЕКС (обработчики бота) ===
+
+async def index_post_async(post: Post):
+    """Асинхронная версия index_post"""
+    try:
+        r = get_async_redis()
+        old_sig = await r.get(signature_key(post.id))
+        sig = post_signature(_post_data(post)) if post.status in DUPLICATE_STATUSES else None
+        async with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post.id, old_sig)
+            if sig is not None:
+                _add(pipe, post.id, sig)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось обновить LSH-индекс для поста {post.id}: {e}")
+
+
+async def unindex_post_async(post_id: int):
+    """Асинхронная версия unindex_post"""
+    try:
+        r = get_async_redis()
+        old_sig = await r.get(signature_key(post_id))
+        async with r.pipeline(transaction=True) as pipe:
+            _remove(pipe, post_id, old_sig)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось убрать пост {post_id} из LSH-индекса: {e}")
+
+
+async def find_similar_async(
+    post_data: dict,
+    limit: Optional[int] = None,
+    exclude: Optional[int] = None
+) -> Dict[int, float]:
+    """
+    Кандидаты в почти-дубликаты по LSH-индексу
+
+    Args:
+        post_data: Данные нового поста (product_name, blog_theme, conditions)
+        limit: Сколько кандидатов вернуть (по умолчанию DUPLICATE_CANDIDATES)
+        exclude: id поста, который не считать кандидатом (сам пост)
+
+    Returns:
+        {post_id: оценка коэффициента Жаккара (0-1)}; пустой словарь, если Redis недоступен
+    """
+    sig = post_signature(post_data)
+    if sig is None:
+        return {}
+
+    try:
+        r = get_async_redis()
+        async with r.pipeline(transaction=False) as pipe:
+            for key in band_keys(band_hashes(sig)):
+                pipe.smembers(key)
+            band_members = await pipe.execute()
+
+        post_ids = _rank(band_members, exclude, limit or config.DUPLICATE_CANDIDATES)
+        if not post_ids:
+            return {}
+        stored = await r.mget([signature_key(post_id) for post_id in post_ids])
+    except Exception as e:
+        logger.warning(f"LSH-индекс недоступен: {e}")
+        return {}
+
+    return {
+        post_id: estimate_jaccard(sig, from_hex(value))
+        for post_id, value in zip(post_ids, stored)
+        if value
+    }
+
+
+if __name__ == '__main__':
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description='LSH-индекс почти-дубликатов')
+    parser.add_argument('command', choices=['rebuild'])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        print(f"Проиндексировано постов: {rebuild_index(db)}")
+    finally:
+        db.close()
@@ -1,7 +1,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, BigInteger, Boolean,
-    DECIMAL, TIMESTAMP, Text, ForeignKey, ARRAY, JSON
+    DECIMAL, TIMESTAMP, Date, Text, ForeignKey, ARRAY, JSON, Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -21,7 +21,7 @@ class User(Base):
     role = Column(String(50), default='advertiser', index=True)  # 'admin' или 'advertiser'
     balance = Column(DECIMAL(10, 2), default=0.00)
     is_active = Column(Boolean, default=True)
-    created_at = Column(TIMESTAMP, default=func.now())
+    created_at = Column(TIMESTAMP, default=func.now(), index=True)
     updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
 
     # Relationships
@@ -42,6 +42,7 @@ class Post(Base):
 
     # Контент поста
     image_file_id = Column(String(255))
+    image_hash = Column(BigInteger)  # aHash фото, 64 бита (со знаком) - для поиска похожих фото
     product_name = Column(Text, nullable=False)
     has_payment = Column(String(50))  # 'Нет', 'Есть', 'Обсуждается'
     payment_amount = Column(String(100))
@@ -53,10 +54,10 @@ class Post(Base):
     conditions = Column(Text)
 
     # Метаданные
-    queue_position = Column(Integer, index=True)
+    queue_position = Column(Integer, index=True)  # порядок постановки в очередь (не перенумеровывается)
     scheduled_time = Column(TIMESTAMP, index=True)  # для приоритетных постов
-    published_at = Column(TIMESTAMP)
-    created_at = Column(TIMESTAMP, default=func.now())
+    published_at = Column(TIMESTAMP, index=True)
+    created_at = Column(TIMESTAMP, default=func.now(), index=True)
     updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
 
     # Платежная информация
@@ -72,6 +73,13 @@ class Post(Base):
     user = relationship('User', back_populates='posts')
     payments = relationship('Payment', back_populates='post')
 
+    __table_args__ = (
+        # Порядок очереди и место поста в ней считаются по этому индексу
+        Index('ix_posts_queue_order', 'queue_position', postgresql_where=(status == 'queue')),
+        # Триграммный индекс названий (ix_posts_product_name_trgm) требует pg_trgm
+        # и создается отдельно в init_db - см. TRIGRAM_INDEX_DDL
+    )
+
     def __repr__(self):
         return f"<Post(id={self.id}, product_name={self.product_name}, status={self.status})>"
 
@@ -92,7 +100,7 @@ class Payment(Base):
 
     status = Column(String(50), default='pending', index=True)  # 'pending', 'succeeded', 'failed', 'cancelled'
 
-    created_at = Column(TIMESTAMP, default=func.now())
+    created_at = Column(TIMESTAMP, default=func.now(), index=True)
     paid_at = Column(TIMESTAMP)
 
     # Relationships
@@ -116,6 +124,39 @@ class Setting(Base):
         return f"<Setting(key={self.key}, value={self.value})>"
 
 
+class PublishSlot(Base):
+    """Журнал обслуженных слотов публикации из очереди"""
+    __tablename__ = 'publish_slots'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    slot_time = Column(TIMESTAMP, unique=True, nullable=False)
+    status = Column(String(50), default='claimed', index=True)  # 'claimed', 'published', 'empty', 'failed'
+    post_id = Column(Integer, ForeignKey('posts.id', ondelete='SET NULL'))
+    created_at = Column(TIMESTAMP, default=func.now())
+    claimed_at = Column(TIMESTAMP, default=func.now())  # когда слот заняли последний раз
+    served_at = Column(TIMESTAMP)
+
+    def __repr__(self):
+        return f"<PublishSlot(slot_time={self.slot_time}, status={self.status})>"
+
+
+class DailyStat(Base):
+    """Дневная сводка для статистики по периодам (заполняется задачей Celery)"""
+    __tablename__ = 'daily_stats'
+
+    day = Column(Date, primary_key=True)
+    new_users = Column(Integer, default=0, nullable=False)
+    new_posts = Column(Integer, default=0, nullable=False)
+    posts_by_status = Column(JSON)  # созданные за день посты по текущему статусу: {'queue': 3, 'published': 5}
+    published_posts = Column(Integer, default=0, nullable=False)
+    payments = Column(Integer, default=0, nullable=False)
+    revenue = Column(DECIMAL(12, 2), default=0, nullable=False)
+    updated_at = Column(TIMESTAMP, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DailyStat(day={self.day}, new_posts={self.new_posts}, revenue={self.revenue})>"
+
+
 class AdminLog(Base):
     __tablename__ = 'admin_logs'
 
@@ -0,0 +1,242 @@
+"""
+Keyset-пагинация списков постов
+
+Страница выбирается условием по ключу сортировки крайней строки соседней
+страницы (WHERE (key, id) > (:last_key, :last_id)), а не OFFSET: из БД
+читается page_size + 1 строк при любом номере страницы. Ключ строки
+(курсор) передается в callback_data кнопок навигации.
+
+Общее количество строк для "стр. X/Y" считается отдельным запросом
+и кэшируется в Redis на PAGINATION_COUNT_TTL секунд.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import config
+from bot.utils.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEY_PREFIX = 'count'
+
+# Направление курсора: строки после ключа (вперед) или перед ним (назад)
+AFTER = 'a'
+BEFORE = 'b'
+
+_EPOCH = datetime(1970, 1, 1)
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+@dataclass
+class Page:
+    """Страница списка"""
+    items: List[Any]
+    number: int
+    total: int
+    pages: int
+    offset: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def _to_base36(value: int) -> str:
+    digits = ''
+    while True:
+        value, rest = divmod(value, 36)
+        digits = _DIGITS[rest] + digits
+        if not value:
+            return digits
+
+
+def _encode_value(value) -> str:
+    # Даты - микросекунды от эпохи в base36 с префиксом 't' (короче isoformat)
+    if isinstance(value, datetime):
+        return 't' + _to_base36((value - _EPOCH) // timedelta(microseconds=1))
+    return str(int(value))
+
+
+def _decode_value(value: str):
+    if value.startswith('t'):
+        return _EPOCH + timedelta(microseconds=int(value[1:], 36))
+    return int(value)
+
+
+def encode_cursor(direction: str, key: Sequence) -> str:
+    """Курсор для callback_data: направление + значения ключа через точку"""
+    return direction + '.'.join(_encode_value(value) for value in key)
+
+
+def decode_cursor(cursor: str) -> Tuple[str, list]:
+    """
+    Разобрать курсор из callback_data
+
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    direction, key = cursor[:1], cursor[1:]
+    if direction not in (AFTER, BEFORE) or not key:
+        raise ValueError(f"Некорректный курсор: {cursor!r}")
+    return direction, [_decode_value(value) for value in key.split('.')]
+
+
+def parse_page_callback(data: str) -> Tuple[int, Optional[str]]:
+    """
+    Номер страницы и курсор из callback_data вида "<префикс>:<стр>[:<курсор>]"
+    """
+    parts = data.split(':')
+    page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+    cursor = parts[2] if len(parts) > 2 and parts[2] else None
+    return max(page, 1), cursor
+
+
+async def count_cached(db: AsyncSession, query: Select, count_key: Optional[str] = None) -> int:
+    """
+    Количество строк запроса с кэшем в Redis
+
+    Args:
+        query: Запрос списка (сортировка и опции загрузки не учитываются)
+        count_key: Ключ кэша (None - без кэша)
+    """
+    key = f"{COUNT_KEY_PREFIX}:{count_key}" if count_key else None
+    if key:
+        try:
+            cached = await get_async_redis().get(key)
+            if cached is not None:
+                return int(cached)
+        except Exception as e:
+            logger.warning(f"Кэш количества недоступен: {e}")
+
+    total = await db.scalar(
+        select(func.count()).select_from(query.order_by(None).subquery())
+    )
+
+    if key:
+        try:
+            await get_async_redis().set(key, total, ex=config.PAGINATION_COUNT_TTL)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить количество в кэш: {e}")
+    return total
+
+
+async def get_cached_counts(count_keys: List[str]) -> Dict[str, int]:
+    """Количества из кэша count_cached по ключам (отсутствующих в кэше ключей в ответе нет)"""
+    try:
+        values = await get_async_redis().mget([f"{COUNT_KEY_PREFIX}:{key}" for key in count_keys])
+    except Exception as e:
+        logger.warning(f"Кэш количества недоступен: {e}")
+        return {}
+    return {key: int(value) for key, value in zip(count_keys, values) if value is not None}
+
+
+async def store_cached_counts(counts: Dict[str, int]):
+    """Сохранить количества в кэш count_cached"""
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            for key, total in counts.items():
+                pipe.set(f"{COUNT_KEY_PREFIX}:{key}", total, ex=config.PAGINATION_COUNT_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Не удалось сохранить количество в кэш: {e}")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    order_by: Sequence,
+    page: int = 1,
+    cursor: Optional[str] = None,
+    page_size: int = 5,
+    count_key: Optional[str] = None,
+    descending: bool = False,
+    key: Optional[Callable[[Any], Sequence]] = None,
+    row_factory: Optional[Callable[[Any], Any]] = None
+) -> Page:
+    """
+    Страница списка по ключу сортировки
+
+    Args:
+        db: Сессия базы данных
+        query: Запрос списка без сортировки, например select(Post).where(...)
+        order_by: Колонки ключа сортировки; последняя должна быть уникальной
+            (обычно Post.id), чтобы порядок строк был однозначным
+        page: Номер страницы (только для отображения и сквозной нумерации)
+        cursor: Курсор из callback_data (None - первая страница)
+        page_size: Строк на странице
+        count_key: Ключ кэша общего количества
+        descending: Сортировка по убыванию
+        key: Значения order_by для строки (по умолчанию - одноименные
+            атрибуты; нужен, если в order_by есть выражения)
+        row_factory: Преобразование строки результата для запросов по колонкам
+            (None - запрос одной ORM-сущности, строки - ее объекты)
+
+    Returns:
+        Page; next_cursor/prev_cursor - None, если соседней страницы нет
+    """
+    direction, boundary = AFTER, None
+    if cursor:
+        try:
+            direction, boundary = decode_cursor(cursor)
+        except ValueError:
+            logger.warning(f"Некорректный курсор пагинации: {cursor!r}")
+
+    # Назад читаем в обратном порядке от ключа и затем разворачиваем
+    backward = direction == BEFORE and boundary is not None
+    reverse = descending != backward
+    columns = tuple_(*order_by)
+
+    stmt = query
+    if boundary is not None:
+        bound = tuple_(*boundary)
+        stmt = stmt.where(columns < bound if reverse else columns > bound)
+    stmt = stmt.order_by(*(column.desc() if reverse else column.asc() for column in order_by))
+    result = await db.execute(stmt.limit(page_size + 1))
+    rows = [row_factory(row) for row in result] if row_factory else list(result.scalars().all())
+
+    more = len(rows) > page_size
+    items = rows[:page_size]
+    if backward:
+        items.reverse()
+
+    # Строки соседней страницы удалены - начинаем с первой
+    if not items and boundary is not None:
+        return await paginate(
+            db, query, order_by, page_size=page_size, count_key=count_key,
+            descending=descending, key=key, row_factory=row_factory
+        )
+
+    # Номер страницы из callback_data сверяем с тем, есть ли строки перед ней
+    if backward:
+        has_next, has_prev = True, more
+    else:
+        has_next, has_prev = more, boundary is not None
+    page = max(page, 2) if has_prev else 1
+
+    def row_key(item) -> Sequence:
+        if key:
+            return key(item)
+        return [getattr(item, column.key) for column in order_by]
+
+    offset = (page - 1) * page_size
+
+    # На последней странице количество известно без запроса;
+    # кэш количества может отставать от фактического списка
+    if not has_next:
+        total = offset + len(items)
+    else:
+        total = max(await count_cached(db, query, count_key), offset + len(items) + 1)
+
+    return Page(
+        items=items,
+        number=page,
+        total=total,
+        pages=(total - 1) // page_size + 1 if total else 1,
+        offset=offset,
+        next_cursor=encode_cursor(AFTER, row_key(items[-1])) if has_next and items else None,
+        prev_cursor=encode_cursor(BEFORE, row_key(items[0])) if has_prev and items else None,
+    )
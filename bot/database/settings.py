@@ -0,0 +1,229 @@
+"""
+Кэш настроек (таблица settings)
+
+Все настройки читаются одним запросом и хранятся в памяти процесса
+SETTINGS_CACHE_TTL секунд. Значения разбираются один раз при загрузке:
+Settings.posts_per_day, schedule_times, queue_price, priority_price,
+duplicate_threshold.
+
+update_setting сбрасывает кэш своего процесса и публикует сообщение в канал
+Redis settings:invalidate - бот и воркеры Celery, подписанные на канал,
+сбрасывают свой кэш. Если сообщение потерялось, устаревание ограничено TTL.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from bot.config import config
+from bot.utils.redis_client import get_redis, get_async_redis
+from .models import Setting
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_CHANNEL = 'settings:invalidate'
+
+# Пауза перед повторной подпиской после ошибки Redis (сек.)
+RESUBSCRIBE_DELAY = 5.0
+
+DEFAULT_SCHEDULE_TIMES = '10:00,13:00,16:00,19:00,22:00'
+DEFAULT_POSTS_PER_DAY = 5
+DEFAULT_QUEUE_PRICE = Decimal('0')
+DEFAULT_PRIORITY_PRICE = Decimal('500')
+DEFAULT_DUPLICATE_THRESHOLD = 80.0
+
+
+def parse_schedule_times(schedule_times: str) -> List[str]:
+    """Разобрать строку настройки schedule_times в список 'HH:MM'"""
+    return [t.strip() for t in schedule_times.split(',') if t.strip()]
+
+
+def _parse_int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_float(value: Optional[str], default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_price(value: Optional[str], default: Decimal) -> Decimal:
+    try:
+        return Decimal(value)
+    except (TypeError, ValueError, InvalidOperation):
+        return default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Снимок таблицы settings с разобранными значениями"""
+    values: Dict[str, Optional[str]] = field(default_factory=dict)
+    updated_at: Dict[str, Optional[datetime]] = field(default_factory=dict)
+    channel_id: Optional[str] = None
+    channel_username: Optional[str] = None
+    posts_per_day: int = DEFAULT_POSTS_PER_DAY
+    schedule_times: Tuple[str, ...] = tuple(parse_schedule_times(DEFAULT_SCHEDULE_TIMES))
+    queue_price: Decimal = DEFAULT_QUEUE_PRICE
+    priority_price: Decimal = DEFAULT_PRIORITY_PRICE
+    duplicate_threshold: float = DEFAULT_DUPLICATE_THRESHOLD
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> 'Settings':
+        """Собрать снимок из строк (key, value, updated_at)"""
+        values, updated_at = {}, {}
+        for key, value, updated in rows:
+            values[key] = value
+            updated_at[key] = updated
+
+        return cls(
+            values=values,
+            updated_at=updated_at,
+            channel_id=values.get('channel_id') or None,
+            channel_username=values.get('channel_username') or None,
+            posts_per_day=_parse_int(values.get('posts_per_day'), DEFAULT_POSTS_PER_DAY),
+            schedule_times=tuple(parse_schedule_times(values.get('schedule_times') or DEFAULT_SCHEDULE_TIMES)),
+            queue_price=_parse_price(values.get('queue_price'), DEFAULT_QUEUE_PRICE),
+            priority_price=_parse_price(values.get('priority_price'), DEFAULT_PRIORITY_PRICE),
+            duplicate_threshold=_parse_float(values.get('duplicate_threshold'), DEFAULT_DUPLICATE_THRESHOLD),
+        )
+
+    def get(self, key: str, default: str = None) -> Optional[str]:
+        """Исходное строковое значение (как get_setting_value)"""
+        return self.values[key] if key in self.values else default
+
+
+_QUERY = select(Setting.key, Setting.value, Setting.updated_at)
+
+_settings: Optional[Settings] = None
+_loaded_at = 0.0
+# Увеличивается при сбросе: загрузка, начатая до сброса, не попадет в кэш
+_generation = 0
+
+
+def _cached() -> Optional[Settings]:
+    if _settings is not None and time.monotonic() - _loaded_at < config.SETTINGS_CACHE_TTL:
+        return _settings
+    return None
+
+
+def _store(settings: Settings, generation: int):
+    global _settings, _loaded_at
+    if generation == _generation:
+        _settings, _loaded_at = settings, time.monotonic()
+
+
+def get_settings_sync(db: Session, fresh: bool = False) -> Settings:
+    """
+    Настройки из кэша процесса (синхронная сессия - Celery)
+
+    Args:
+        fresh: Прочитать из БД в обход кэша (и обновить кэш)
+    """
+    settings = None if fresh else _cached()
+    if settings is None:
+        generation = _generation
+        settings = Settings.from_rows(db.execute(_QUERY).all())
+        _store(settings, generation)
+    return settings
+
+
+async def get_settings(db: AsyncSession) -> Settings:
+    """Настройки из кэша процесса (обработчики бота)"""
+    settings = _cached()
+    if settings is None:
+        generation = _generation
+        settings = Settings.from_rows((await db.execute(_QUERY)).all())
+        _store(settings, generation)
+    return settings
+
+
+def invalidate_settings():
+    """Сбросить кэш настроек текущего процесса"""
+    global _settings, _generation
+    _generation += 1
+    _settings = None
+
+
+def publish_settings_changed(key: str):
+    """Сбросить кэш у себя и сообщить остальным процессам (вызывать после commit)"""
+    invalidate_settings()
+    try:
+        get_redis().publish(SETTINGS_CHANNEL, key)
+    except Exception as e:
+        logger.warning(f"Не удалось разослать сброс кэша настроек: {e}")
+
+
+async def publish_settings_changed_async(key: str):
+    """Асинхронная версия publish_settings_changed"""
+    invalidate_settings()
+    try:
+        await get_async_redis().publish(SETTINGS_CHANNEL, key)
+    except Exception as e:
+        logger.warning(f"Не удалось разослать сброс кэша настроек: {e}")
+
+
+async def listen_settings_changes():
+    """
+    Подписка бота на сбросы кэша настроек (запускается задачей asyncio)
+
+    После каждой (пере)подписки кэш сбрасывается: сообщения, пришедшие
+    пока подписки не было, потеряны.
+    """
+    while True:
+        pubsub = get_async_redis().pubsub()
+        try:
+            await pubsub.subscribe(SETTINGS_CHANNEL)
+            invalidate_settings()
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    invalidate_settings()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Подписка на сброс кэша настроек прервана: {e}")
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+        finally:
+            await pubsub.aclose()
+
+
+def _listen_settings_changes_sync():
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            pubsub.subscribe(SETTINGS_CHANNEL)
+            invalidate_settings()
+            for message in pubsub.listen():
+                if message['type'] == 'message':
+                    invalidate_settings()
+        except Exception as e:
+            logger.warning(f"Подписка на сброс кэша настроек прервана: {e}")
+            time.sleep(RESUBSCRIBE_DELAY)
+        finally:
+            pubsub.close()
+
+
+_listener_pid: Optional[int] = None
+
+
+def start_settings_listener():
+    """Запустить подписку на сбросы в фоновом потоке (один раз на процесс)"""
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    _listener_pid = os.getpid()
+    threading.Thread(target=_listen_settings_changes_sync, name='settings-listener', daemon=True).start()
@@ -0,0 +1,174 @@
+"""
+Статистика для админ-панели
+
+Каждый экран статистики получает данные одним запросом с агрегатами
+(COUNT(*) FILTER, SUM) на стороне PostgreSQL - строки таблиц в Python
+не загружаются. Статистика по периодам читается из дневной сводки
+daily_stats (bot.tasks.stats), текущий день досчитывается по индексам.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select, func, true, and_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import User, Post, Payment, DailyStat
+
+# Статус оплаченного платежа
+PAID_STATUS = 'completed'
+
+
+def _count(*conditions):
+    """COUNT(*) FILTER (WHERE ...)"""
+    if not conditions:
+        return func.count()
+    return func.count().filter(*conditions)
+
+
+def _revenue(*conditions):
+    """Сумма оплаченных платежей с условием (0, если платежей нет)"""
+    return func.coalesce(func.sum(Payment.amount).filter(*conditions), 0)
+
+
+def _period(column, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Условие since <= column < until (None - без ограничения)"""
+    conditions = []
+    if since:
+        conditions.append(column >= since)
+    if until:
+        conditions.append(column < until)
+    return and_(true(), *conditions)
+
+
+def _user_totals(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    return select(
+        _count().label('total_users'),
+        _count(User.role == 'advertiser').label('advertisers'),
+        _count(_period(User.created_at, since, until)).label('new_users'),
+    ).subquery()
+
+
+def _post_totals(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    return select(
+        _count().label('total_posts'),
+        _count(Post.status == 'published').label('published'),
+        _count(Post.status == 'queue').label('in_queue'),
+        _count(Post.status == 'scheduled').label('scheduled'),
+        _count(_period(Post.created_at, since, until)).label('new_posts'),
+        _count(Post.status == 'published', _period(Post.published_at, since, until)).label('published_since'),
+    ).subquery()
+
+
+def _payment_totals(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    return select(
+        _count(_period(Payment.created_at, since, until)).label('payments'),
+        _revenue(_period(Payment.created_at, since, until)).label('revenue'),
+    ).where(Payment.status == PAID_STATUS).subquery()
+
+
+def overview_stats_query(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Запрос сводки по пользователям, постам и платежам (одна строка)
+
+    Поля total_users, advertisers, total_posts, published, in_queue,
+    scheduled - за все время; new_users, new_posts, published_since,
+    payments, revenue - за период [since, until).
+    """
+    users = _user_totals(since, until)
+    posts = _post_totals(since, until)
+    payments = _payment_totals(since, until)
+
+    # Каждый подзапрос возвращает одну строку - соединяем без условия
+    return select(users, posts, payments).select_from(users.join(posts, true()).join(payments, true()))
+
+
+async def get_overview_stats(db: AsyncSession, since: Optional[datetime] = None) -> Row:
+    """
+    Сводка по пользователям, постам и платежам одним запросом
+
+    Args:
+        since: Начало периода для new_users, new_posts, published_since,
+            payments и revenue (None - за все время)
+
+    Returns:
+        Строка с полями из overview_stats_query
+    """
+    result = await db.execute(overview_stats_query(since))
+    return result.one()
+
+
+async def get_financial_stats(db: AsyncSession, now: Optional[datetime] = None) -> Row:
+    """
+    Платежи и доход за все время, 30 и 7 дней одним запросом
+
+    Returns:
+        Строка с полями payments_all, revenue_all, payments_month,
+        revenue_month, payments_week, revenue_week
+    """
+    now = now or datetime.now()
+    month_ago = now - timedelta(days=30)
+    week_ago = now - timedelta(days=7)
+
+    result = await db.execute(
+        select(
+            _count().label('payments_all'),
+            _revenue(true()).label('revenue_all'),
+            _count(Payment.created_at >= month_ago).label('payments_month'),
+            _revenue(Payment.created_at >= month_ago).label('revenue_month'),
+            _count(Payment.created_at >= week_ago).label('payments_week'),
+            _revenue(Payment.created_at >= week_ago).label('revenue_week'),
+        ).where(Payment.status == PAID_STATUS)
+    )
+    return result.one()
+
+
+async def get_period_stats(db: AsyncSession, since: Optional[date] = None) -> Row:
+    """
+    Статистика за период по дневной сводке
+
+    Прошедшие дни суммируются из daily_stats (не больше одной строки
+    на день), сегодняшний день считается по исходным таблицам.
+
+    Args:
+        since: Первый день периода (None - за все время)
+
+    Returns:
+        Строка с полями new_users, new_posts, published_posts, payments, revenue
+    """
+    today = date.today()
+    today_start = datetime.combine(today, datetime.min.time())
+
+    rollup = (
+        select(
+            func.coalesce(func.sum(DailyStat.new_users), 0).label('new_users'),
+            func.coalesce(func.sum(DailyStat.new_posts), 0).label('new_posts'),
+            func.coalesce(func.sum(DailyStat.published_posts), 0).label('published_posts'),
+            func.coalesce(func.sum(DailyStat.payments), 0).label('payments'),
+            func.coalesce(func.sum(DailyStat.revenue), 0).label('revenue'),
+        )
+        .where(_period(DailyStat.day, since, today))
+        .subquery()
+    )
+
+    today_users = select(func.count()).where(User.created_at >= today_start).scalar_subquery()
+    today_posts = select(func.count()).where(Post.created_at >= today_start).scalar_subquery()
+    today_published = select(func.count()).where(
+        Post.status == 'published', Post.published_at >= today_start
+    ).scalar_subquery()
+    today_payments = select(
+        _count().label('payments'),
+        _revenue(true()).label('revenue'),
+    ).where(Payment.status == PAID_STATUS, Payment.created_at >= today_start).subquery()
+
+    result = await db.execute(
+        select(
+            (rollup.c.new_users + today_users).label('new_users'),
+            (rollup.c.new_posts + today_posts).label('new_posts'),
+            (rollup.c.published_posts + today_published).label('published_posts'),
+            (rollup.c.payments + today_payments.c.payments).label('payments'),
+            (rollup.c.revenue + today_payments.c.revenue).label('revenue'),
+        ).select_from(rollup.join(today_payments, true()))
+    )
+    return result.one()
@@ -1,10 +1,15 @@
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database import get_db
-from bot.database.crud import get_user_by_telegram_id
+from bot.database.async_crud import count_user_posts_by_status, get_queue_rank, get_queue_ranks, get_user_posts_page
+from bot.database.identity import UserIdentity
+from bot.database.pagination import parse_page_callback
 from bot.database.models import Post
+from bot.keyboards.common import get_back_keyboard
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 router = Router()
@@ -13,447 +18,375 @@ router = Router()
 # ===== МОИ ПУБЛИКАЦИИ =====
 
 @router.message(F.text == "📋 Мои публикации")
-async def my_publications_handler(message: Message):
+async def my_publications_handler(message: Message, db: AsyncSession, user: Optional[UserIdentity]):
     """Просмотр публикаций пользователя"""
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, message.from_user.id)
-
-        if not user:
-            await message.answer("❌ Ошибка: пользователь не найден. Отправьте /start для регистрации.")
-            return
-
-        # Получаем все посты пользователя кроме черновиков
-        posts = db.query(Post).filter(
-            Post.user_id == user.id,
-            Post.status.in_(['queue', 'scheduled', 'published'])
-        ).order_by(Post.created_at.desc()).all()
+    if not user:
+        await message.answer("❌ Ошибка: пользователь не найден. Отправьте /start для регистрации.")
+        return
 
-        if not posts:
-            text = (
-                "📋 <b>Мои публикации</b>\n\n"
-                "У вас пока нет публикаций.\n\n"
-                "Создайте пост, чтобы он появился здесь!"
-            )
-            await message.answer(text, parse_mode="HTML")
-            return
+    # Количество постов пользователя по статусам (кроме черновиков)
+    counts = await count_user_posts_by_status(db, user.id)
 
-        # Группируем посты по статусу
-        queue_posts = [p for p in posts if p.status == 'queue']
-        scheduled_posts = [p for p in posts if p.status == 'scheduled']
-        published_posts = [p for p in posts if p.status == 'published']
+    if not any(counts.values()):
+        text = (
+            "📋 <b>Мои публикации</b>\n\n"
+            "У вас пока нет публикаций.\n\n"
+            "Создайте пост, чтобы он появился здесь!"
+        )
+        await message.answer(text, parse_mode="HTML")
+        return
 
-        text = "📋 <b>Мои публикации</b>\n\n"
+    queue_count = counts.get('queue', 0)
+    scheduled_count = counts.get('scheduled', 0)
+    published_count = counts.get('published', 0)
 
-        if queue_posts:
-            text += f"🕐 <b>В очереди:</b> {len(queue_posts)} постов\n"
+    text = "📋 <b>Мои публикации</b>\n\n"
 
-        if scheduled_posts:
-            text += f"⚡ <b>Запланировано:</b> {len(scheduled_posts)} постов\n"
+    if queue_count:
+        text += f"🕐 <b>В очереди:</b> {queue_count} постов\n"
 
-        if published_posts:
-            text += f"✅ <b>Опубликовано:</b> {len(published_posts)} постов\n"
+    if scheduled_count:
+        text += f"⚡ <b>Запланировано:</b> {scheduled_count} постов\n"
 
-        text += "\nВыберите раздел:"
+    if published_count:
+        text += f"✅ <b>Опубликовано:</b> {published_count} постов\n"
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text=f"🕐 В очереди ({len(queue_posts)})", callback_data="my_posts_queue:1")] if queue_posts else [],
-            [InlineKeyboardButton(text=f"⚡ Запланировано ({len(scheduled_posts)})", callback_data="my_posts_scheduled:1")] if scheduled_posts else [],
-            [InlineKeyboardButton(text=f"✅ Опубликовано ({len(published_posts)})", callback_data="my_posts_published:1")] if published_posts else [],
-        ])
+    text += "\nВыберите раздел:"
 
-        await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"🕐 В очереди ({queue_count})", callback_data="my_posts_queue:1")] if queue_count else [],
+        [InlineKeyboardButton(text=f"⚡ Запланировано ({scheduled_count})", callback_data="my_posts_scheduled:1")] if scheduled_count else [],
+        [InlineKeyboardButton(text=f"✅ Опубликовано ({published_count})", callback_data="my_posts_published:1")] if published_count else [],
+    ])
 
-    finally:
-        db.close()
+    await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("my_posts_queue:"))
-async def my_posts_queue_handler(callback: CallbackQuery):
+async def my_posts_queue_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Посты в очереди"""
-    page = int(callback.data.split(':')[1])
-    page_size = 5
-
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        posts = db.query(Post).filter(
-            Post.user_id == user.id,
-            Post.status == 'queue'
-        ).order_by(Post.queue_position).all()
-
-        if not posts:
-            await callback.answer("Нет постов в очереди", show_alert=True)
-            return
-
-        total_pages = (len(posts) - 1) // page_size + 1
-        page = max(1, min(page, total_pages))
-
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        page_posts = posts[start_idx:end_idx]
-
-        posts_text = ""
-        for post in page_posts:
-            posts_text += (
-                f"\n📝 <b>{post.product_name[:40]}</b>\n"
-                f"   ID: {post.id}\n"
-                f"   Позиция: №{post.queue_position}\n"
-                f"   Создан: {post.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-            )
-
-        text = (
-            f"🕐 <b>Посты в очереди (стр. {page}/{total_pages})</b>\n\n"
-            f"Всего: {len(posts)} постов\n"
-            f"{posts_text}\n"
-            "Нажмите на ID для просмотра деталей."
+    page, cursor = parse_page_callback(callback.data)
+
+    result = await get_user_posts_page(db, user.id, 'queue', page, cursor)
+    page_posts = result.items
+
+    if not page_posts:
+        await callback.answer("Нет постов в очереди", show_alert=True)
+        return
+    queue_ranks = await get_queue_ranks(db, page_posts)
+
+    posts_text = ""
+    for post in page_posts:
+        posts_text += (
+            f"\n📝 <b>{post.product_name[:40]}</b>\n"
+            f"   ID: {post.id}\n"
+            f"   Позиция: №{queue_ranks.get(post.id, '?')}\n"
+            f"   Создан: {post.created_at.strftime('%d.%m.%Y %H:%M')}\n"
         )
 
-        buttons = []
-        for post in page_posts:
-            buttons.append([InlineKeyboardButton(
-                text=f"ID {post.id}: {post.product_name[:25]}...",
-                callback_data=f"my_post_detail:{post.id}"
-            )])
-
-        # Навигация
-        nav_buttons = []
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"my_posts_queue:{page-1}"))
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"my_posts_queue:{page+1}"))
-
-        if nav_buttons:
-            buttons.append(nav_buttons)
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
-
-    finally:
-        db.close()
+    text = (
+        f"🕐 <b>Посты в очереди (стр. {result.number}/{result.pages})</b>\n\n"
+        f"Всего: {result.total} постов\n"
+        f"{posts_text}\n"
+        "Нажмите на ID для просмотра деталей."
+    )
+
+    buttons = []
+    for post in page_posts:
+        buttons.append([InlineKeyboardButton(
+            text=f"ID {post.id}: {post.product_name[:25]}...",
+            callback_data=f"my_post_detail:{post.id}"
+        )])
+
+    # Навигация (курсор - ключ крайнего поста страницы)
+    nav_buttons = []
+    if result.prev_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="◀️", callback_data=f"my_posts_queue:{result.number - 1}:{result.prev_cursor}"
+        ))
+    if result.next_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="▶️", callback_data=f"my_posts_queue:{result.number + 1}:{result.next_cursor}"
+        ))
+
+    if nav_buttons:
+        buttons.append(nav_buttons)
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("my_posts_scheduled:"))
-async def my_posts_scheduled_handler(callback: CallbackQuery):
+async def my_posts_scheduled_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Запланированные посты"""
-    page = int(callback.data.split(':')[1])
-    page_size = 5
-
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        posts = db.query(Post).filter(
-            Post.user_id == user.id,
-            Post.status == 'scheduled'
-        ).order_by(Post.scheduled_time).all()
-
-        if not posts:
-            await callback.answer("Нет запланированных постов", show_alert=True)
-            return
-
-        total_pages = (len(posts) - 1) // page_size + 1
-        page = max(1, min(page, total_pages))
-
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        page_posts = posts[start_idx:end_idx]
-
-        posts_text = ""
-        for post in page_posts:
-            scheduled_time = post.scheduled_time.strftime('%d.%m.%Y %H:%M') if post.scheduled_time else 'Не указано'
-            posts_text += (
-                f"\n📝 <b>{post.product_name[:40]}</b>\n"
-                f"   ID: {post.id}\n"
-                f"   Запланировано: {scheduled_time}\n"
-                f"   Создан: {post.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-            )
-
-        text = (
-            f"⚡ <b>Запланированные посты (стр. {page}/{total_pages})</b>\n\n"
-            f"Всего: {len(posts)} постов\n"
-            f"{posts_text}\n"
-            "Нажмите на ID для просмотра деталей."
+    page, cursor = parse_page_callback(callback.data)
+
+    result = await get_user_posts_page(db, user.id, 'scheduled', page, cursor)
+    page_posts = result.items
+
+    if not page_posts:
+        await callback.answer("Нет запланированных постов", show_alert=True)
+        return
+
+    posts_text = ""
+    for post in page_posts:
+        scheduled_time = post.scheduled_time.strftime('%d.%m.%Y %H:%M') if post.scheduled_time else 'Не указано'
+        posts_text += (
+            f"\n📝 <b>{post.product_name[:40]}</b>\n"
+            f"   ID: {post.id}\n"
+            f"   Запланировано: {scheduled_time}\n"
+            f"   Создан: {post.created_at.strftime('%d.%m.%Y %H:%M')}\n"
         )
 
-        buttons = []
-        for post in page_posts:
-            buttons.append([InlineKeyboardButton(
-                text=f"ID {post.id}: {post.product_name[:25]}...",
-                callback_data=f"my_post_detail:{post.id}"
-            )])
-
-        # Навигация
-        nav_buttons = []
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"my_posts_scheduled:{page-1}"))
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"my_posts_scheduled:{page+1}"))
-
-        if nav_buttons:
-            buttons.append(nav_buttons)
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
-
-    finally:
-        db.close()
+    text = (
+        f"⚡ <b>Запланированные посты (стр. {result.number}/{result.pages})</b>\n\n"
+        f"Всего: {result.total} постов\n"
+        f"{posts_text}\n"
+        "Нажмите на ID для просмотра деталей."
+    )
+
+    buttons = []
+    for post in page_posts:
+        buttons.append([InlineKeyboardButton(
+            text=f"ID {post.id}: {post.product_name[:25]}...",
+            callback_data=f"my_post_detail:{post.id}"
+        )])
+
+    # Навигация (курсор - ключ крайнего поста страницы)
+    nav_buttons = []
+    if result.prev_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="◀️", callback_data=f"my_posts_scheduled:{result.number - 1}:{result.prev_cursor}"
+        ))
+    if result.next_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="▶️", callback_data=f"my_posts_scheduled:{result.number + 1}:{result.next_cursor}"
+        ))
+
+    if nav_buttons:
+        buttons.append(nav_buttons)
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("my_posts_published:"))
-async def my_posts_published_handler(callback: CallbackQuery):
+async def my_posts_published_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Опубликованные посты"""
-    page = int(callback.data.split(':')[1])
-    page_size = 5
-
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        posts = db.query(Post).filter(
-            Post.user_id == user.id,
-            Post.status == 'published'
-        ).order_by(Post.published_at.desc()).all()
-
-        if not posts:
-            await callback.answer("Нет опубликованных постов", show_alert=True)
-            return
-
-        total_pages = (len(posts) - 1) // page_size + 1
-        page = max(1, min(page, total_pages))
-
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        page_posts = posts[start_idx:end_idx]
-
-        posts_text = ""
-        for post in page_posts:
-            published_time = post.published_at.strftime('%d.%m.%Y %H:%M') if post.published_at else 'Не указано'
-            posts_text += (
-                f"\n📝 <b>{post.product_name[:40]}</b>\n"
-                f"   ID: {post.id}\n"
-                f"   Опубликовано: {published_time}\n"
-                f"   Создан: {post.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-            )
-
-        text = (
-            f"✅ <b>Опубликованные посты (стр. {page}/{total_pages})</b>\n\n"
-            f"Всего: {len(posts)} постов\n"
-            f"{posts_text}\n"
-            "Нажмите на ID для просмотра деталей."
+    page, cursor = parse_page_callback(callback.data)
+
+    result = await get_user_posts_page(db, user.id, 'published', page, cursor)
+    page_posts = result.items
+
+    if not page_posts:
+        await callback.answer("Нет опубликованных постов", show_alert=True)
+        return
+
+    posts_text = ""
+    for post in page_posts:
+        published_time = post.published_at.strftime('%d.%m.%Y %H:%M') if post.published_at else 'Не указано'
+        posts_text += (
+            f"\n📝 <b>{post.product_name[:40]}</b>\n"
+            f"   ID: {post.id}\n"
+            f"   Опубликовано: {published_time}\n"
+            f"   Создан: {post.created_at.strftime('%d.%m.%Y %H:%M')}\n"
         )
 
-        buttons = []
-        for post in page_posts:
-            buttons.append([InlineKeyboardButton(
-                text=f"ID {post.id}: {post.product_name[:25]}...",
-                callback_data=f"my_post_detail:{post.id}"
-            )])
-
-        # Навигация
-        nav_buttons = []
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(text="◀️", callback_data=f"my_posts_published:{page-1}"))
-        if page < total_pages:
-            nav_buttons.append(InlineKeyboardButton(text="▶️", callback_data=f"my_posts_published:{page+1}"))
-
-        if nav_buttons:
-            buttons.append(nav_buttons)
-
-        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
-
-    finally:
-        db.close()
+    text = (
+        f"✅ <b>Опубликованные посты (стр. {result.number}/{result.pages})</b>\n\n"
+        f"Всего: {result.total} постов\n"
+        f"{posts_text}\n"
+        "Нажмите на ID для просмотра деталей."
+    )
+
+    buttons = []
+    for post in page_posts:
+        buttons.append([InlineKeyboardButton(
+            text=f"ID {post.id}: {post.product_name[:25]}...",
+            callback_data=f"my_post_detail:{post.id}"
+        )])
+
+    # Навигация (курсор - ключ крайнего поста страницы)
+    nav_buttons = []
+    if result.prev_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="◀️", callback_data=f"my_posts_published:{result.number - 1}:{result.prev_cursor}"
+        ))
+    if result.next_cursor:
+        nav_buttons.append(InlineKeyboardButton(
+            text="▶️", callback_data=f"my_posts_published:{result.number + 1}:{result.next_cursor}"
+        ))
+
+    if nav_buttons:
+        buttons.append(nav_buttons)
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("my_post_detail:"))
-async def my_post_detail_handler(callback: CallbackQuery):
+async def my_post_detail_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Детали поста пользователя"""
     post_id = int(callback.data.split(':')[1])
 
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        post = db.query(Post).filter(
-            Post.id == post_id,
-            Post.user_id == user.id
-        ).first()
-
-        if not post:
-            await callback.answer("Пост не найден", show_alert=True)
-            return
-
-        status_emoji = {
-            'queue': '🕐',
-            'scheduled': '⚡',
-            'published': '✅',
-            'draft': '💾'
-        }
+    post = (await db.scalars(select(Post).where(
+        Post.id == post_id,
+        Post.user_id == user.id
+    ))).first()
 
-        text = (
-            f"{status_emoji.get(post.status, '📝')} <b>Пост #{post.id}</b>\n\n"
-            f"<b>Товар:</b> {post.product_name}\n"
-            f"<b>Статус:</b> {post.status}\n"
-        )
+    if not post:
+        await callback.answer("Пост не найден", show_alert=True)
+        return
 
-        if post.queue_position:
-            text += f"<b>Позиция в очереди:</b> №{post.queue_position}\n"
+    status_emoji = {
+        'queue': '🕐',
+        'scheduled': '⚡',
+        'published': '✅',
+        'draft': '💾'
+    }
 
-        if post.scheduled_time:
-            text += f"<b>Запланировано:</b> {post.scheduled_time.strftime('%d.%m.%Y %H:%M')}\n"
+    text = (
+        f"{status_emoji.get(post.status, '📝')} <b>Пост #{post.id}</b>\n\n"
+        f"<b>Товар:</b> {post.product_name}\n"
+        f"<b>Статус:</b> {post.status}\n"
+    )
 
-        if post.published_at:
-            text += f"<b>Опубликовано:</b> {post.published_at.strftime('%d.%m.%Y %H:%M')}\n"
+    queue_rank = await get_queue_rank(db, post)
+    if queue_rank:
+        text += f"<b>Позиция в очереди:</b> №{queue_rank}\n"
 
-        text += (
-            f"\n<b>Доплата:</b> {post.has_payment or 'Нет'}\n"
-            f"<b>Маркетплейс:</b> {post.marketplace}\n"
-            f"<b>Тематика:</b> {post.blog_theme}\n"
-            f"<b>Соцсети:</b> {', '.join(post.social_networks) if post.social_networks else 'Не указано'}\n"
-            f"<b>Условия:</b> {post.conditions}\n\n"
-            f"<b>Создан:</b> {post.created_at.strftime('%d.%m.%Y %H:%M')}"
-        )
+    if post.scheduled_time:
+        text += f"<b>Запланировано:</b> {post.scheduled_time.strftime('%d.%m.%Y %H:%M')}\n"
+
+    if post.published_at:
+        text += f"<b>Опубликовано:</b> {post.published_at.strftime('%d.%m.%Y %H:%M')}\n"
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="◀️ Назад к списку", callback_data=f"my_posts_{post.status}:1")]
-        ])
+    text += (
+        f"\n<b>Доплата:</b> {post.has_payment or 'Нет'}\n"
+        f"<b>Маркетплейс:</b> {post.marketplace}\n"
+        f"<b>Тематика:</b> {post.blog_theme}\n"
+        f"<b>Соцсети:</b> {', '.join(post.social_networks) if post.social_networks else 'Не указано'}\n"
+        f"<b>Условия:</b> {post.conditions}\n\n"
+        f"<b>Создан:</b> {post.created_at.strftime('%d.%m.%Y %H:%M')}"
+    )
 
-        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="◀️ Назад к списку", callback_data=f"my_posts_{post.status}:1")]
+    ])
 
-    finally:
-        db.close()
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 # ===== МОИ ЧЕРНОВИКИ =====
 
 @router.message(F.text == "💾 Мои черновики")
-async def my_drafts_handler(message: Message):
+async def my_drafts_handler(message: Message, db: AsyncSession, user: Optional[UserIdentity]):
     """Просмотр черновиков пользователя"""
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, message.from_user.id)
-
-        if not user:
-            await message.answer("❌ Ошибка: пользователь не найден. Отправьте /start для регистрации.")
-            return
-
-        drafts = db.query(Post).filter(
-            Post.user_id == user.id,
-            Post.status == 'draft'
-        ).order_by(Post.created_at.desc()).all()
+    if not user:
+        await message.answer("❌ Ошибка: пользователь не найден. Отправьте /start для регистрации.")
+        return
 
-        if not drafts:
-            text = (
-                "💾 <b>Мои черновики</b>\n\n"
-                "У вас нет сохраненных черновиков.\n\n"
-                "Черновики создаются когда вы сохраняете незавершенный пост."
-            )
-            await message.answer(text, parse_mode="HTML")
-            return
+    drafts = (await db.scalars(select(Post).where(
+        Post.user_id == user.id,
+        Post.status == 'draft'
+    ).order_by(Post.created_at.desc()))).all()
 
-        text = f"💾 <b>Мои черновики</b>\n\nВсего черновиков: {len(drafts)}\n\n"
+    if not drafts:
+        text = (
+            "💾 <b>Мои черновики</b>\n\n"
+            "У вас нет сохраненных черновиков.\n\n"
+            "Черновики создаются когда вы сохраняете незавершенный пост."
+        )
+        await message.answer(text, parse_mode="HTML")
+        return
 
-        for idx, draft in enumerate(drafts[:10], 1):
-            text += (
-                f"{idx}. <b>{draft.product_name[:30]}</b>\n"
-                f"   ID: {draft.id}\n"
-                f"   Создан: {draft.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
-            )
+    text = f"💾 <b>Мои черновики</b>\n\nВсего черновиков: {len(drafts)}\n\n"
 
-        if len(drafts) > 10:
-            text += f"... и еще {len(drafts) - 10} черновиков\n\n"
+    for idx, draft in enumerate(drafts[:10], 1):
+        text += (
+            f"{idx}. <b>{draft.product_name[:30]}</b>\n"
+            f"   ID: {draft.id}\n"
+            f"   Создан: {draft.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
+        )
 
-        text += "Выберите черновик для просмотра:"
+    if len(drafts) > 10:
+        text += f"... и еще {len(drafts) - 10} черновиков\n\n"
 
-        buttons = []
-        for draft in drafts[:10]:
-            buttons.append([InlineKeyboardButton(
-                text=f"ID {draft.id}: {draft.product_name[:30]}...",
-                callback_data=f"draft_detail:{draft.id}"
-            )])
+    text += "Выберите черновик для просмотра:"
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
-        await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+    buttons = []
+    for draft in drafts[:10]:
+        buttons.append([InlineKeyboardButton(
+            text=f"ID {draft.id}: {draft.product_name[:30]}...",
+            callback_data=f"draft_detail:{draft.id}"
+        )])
 
-    finally:
-        db.close()
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+    await message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("draft_detail:"))
-async def draft_detail_handler(callback: CallbackQuery):
+async def draft_detail_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Детали черновика"""
     draft_id = int(callback.data.split(':')[1])
 
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        draft = db.query(Post).filter(
-            Post.id == draft_id,
-            Post.user_id == user.id,
-            Post.status == 'draft'
-        ).first()
-
-        if not draft:
-            await callback.answer("Черновик не найден", show_alert=True)
-            return
+    draft = (await db.scalars(select(Post).where(
+        Post.id == draft_id,
+        Post.user_id == user.id,
+        Post.status == 'draft'
+    ))).first()
 
-        text = (
-            f"💾 <b>Черновик #{draft.id}</b>\n\n"
-            f"<b>Товар:</b> {draft.product_name}\n"
-            f"<b>Доплата:</b> {draft.has_payment or 'Нет'}\n"
-            f"<b>Маркетплейс:</b> {draft.marketplace}\n"
-            f"<b>Тематика:</b> {draft.blog_theme}\n"
-            f"<b>Соцсети:</b> {', '.join(draft.social_networks) if draft.social_networks else 'Не указано'}\n"
-            f"<b>Условия:</b> {draft.conditions}\n\n"
-            f"<b>Создан:</b> {draft.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
-            "⚠️ Функционал завершения черновиков будет добавлен позже."
-        )
+    if not draft:
+        await callback.answer("Черновик не найден", show_alert=True)
+        return
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🗑 Удалить черновик", callback_data=f"delete_draft:{draft.id}")],
-            [InlineKeyboardButton(text="◀️ К черновикам", callback_data="back_to_drafts")]
-        ])
+    text = (
+        f"💾 <b>Черновик #{draft.id}</b>\n\n"
+        f"<b>Товар:</b> {draft.product_name}\n"
+        f"<b>Доплата:</b> {draft.has_payment or 'Нет'}\n"
+        f"<b>Маркетплейс:</b> {draft.marketplace}\n"
+        f"<b>Тематика:</b> {draft.blog_theme}\n"
+        f"<b>Соцсети:</b> {', '.join(draft.social_networks) if draft.social_networks else 'Не указано'}\n"
+        f"<b>Условия:</b> {draft.conditions}\n\n"
+        f"<b>Создан:</b> {draft.created_at.strftime('%d.%m.%Y %H:%M')}\n\n"
+        "⚠️ Функционал завершения черновиков будет добавлен позже."
+    )
 
-        await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🗑 Удалить черновик", callback_data=f"delete_draft:{draft.id}")],
+        [InlineKeyboardButton(text="◀️ К черновикам", callback_data="back_to_drafts")]
+    ])
 
-    finally:
-        db.close()
+    await callback.message.edit_text(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(F.data.startswith("delete_draft:"))
-async def delete_draft_handler(callback: CallbackQuery):
+async def delete_draft_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Удаление черновика"""
     draft_id = int(callback.data.split(':')[1])
 
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        draft = db.query(Post).filter(
-            Post.id == draft_id,
-            Post.user_id == user.id,
-            Post.status == 'draft'
-        ).first()
-
-        if not draft:
-            await callback.answer("Черновик не найден", show_alert=True)
-            return
-
-        db.delete(draft)
-        db.commit()
-
-        await callback.answer("✅ Черновик удален", show_alert=True)
-        await callback.message.edit_text(
-            "✅ Черновик успешно удален.",
-            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="◀️ К черновикам", callback_data="back_to_drafts")]
-            ])
-        )
+    draft = (await db.scalars(select(Post).where(
+        Post.id == draft_id,
+        Post.user_id == user.id,
+        Post.status == 'draft'
+    ))).first()
+
+    if not draft:
+        await callback.answer("Черновик не найден", show_alert=True)
+        return
+
+    await db.delete(draft)
+    await db.commit()
 
-    finally:
-        db.close()
+    await callback.answer("✅ Черновик удален", show_alert=True)
+    await callback.message.edit_text(
+        "✅ Черновик успешно удален.",
+        reply_markup=get_back_keyboard("back_to_drafts", "◀️ К черновикам")
+    )
 
 
 @router.callback_query(F.data == "back_to_drafts")
-async def back_to_drafts_handler(callback: CallbackQuery):
+async def back_to_drafts_handler(callback: CallbackQuery, db: AsyncSession, user: Optional[UserIdentity]):
     """Возврат к списку черновиков"""
     await callback.message.delete()
     # Имитация нажатия кнопки "Мои черновики"
@@ -461,4 +394,4 @@ async def back_to_drafts_handler(callback: CallbackQuery):
     # Создаем фейковое сообщение для вызова обработчика
     fake_message = callback.message
     fake_message.text = "💾 Мои черновики"
-    await my_drafts_handler(fake_message)
+    await my_drafts_handler(fake_message, db, user)
@@ -1,10 +1,15 @@
+import logging
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.database import get_db
-from bot.database.crud import create_post, get_user_by_telegram_id, get_next_queue_position, get_setting_value
+from bot.database.async_crud import create_post, enqueue_post, get_queue_rank
+from bot.database.identity import UserIdentity
+from bot.database.settings import get_settings
+from bot.database.duplicates import find_duplicate, find_image_duplicate
 from bot.states.post_states import PostCreation
 from bot.keyboards.post_creator import (
     get_skip_cancel_keyboard,
@@ -15,47 +20,43 @@ from bot.keyboards.post_creator import (
     get_social_networks_keyboard,
     get_conditions_keyboard,
     get_preview_keyboard,
-    get_back_cancel_keyboard
+    get_back_cancel_keyboard,
+    get_priority_unavailable_keyboard
 )
 from bot.keyboards.main_menu import get_main_menu_keyboard, get_admin_menu_keyboard
+from bot.utils.image_executor import analyze_image_async
 from bot.config import config
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 
 # ===== НАЧАЛО СОЗДАНИЯ ПОСТА =====
 
 @router.message(F.text == "📝 Создать пост")
-async def create_post_start(message: Message, state: FSMContext):
+async def create_post_start(message: Message, state: FSMContext, db: AsyncSession, user: Optional[UserIdentity]):
     """Начало создания поста"""
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, message.from_user.id)
-
-        if not user:
-            await message.answer("❌ Ошибка: пользователь не найден. Отправьте /start для регистрации.")
-            return
-
-        # ВАЖНО: Очистка любого предыдущего состояния
-        current_state = await state.get_state()
-        if current_state:
-            await state.clear()
+    if not user:
+        await message.answer("❌ Ошибка: пользователь не найден. Отправьте /start для регистрации.")
+        return
 
-        text = (
-            "📝 <b>Создание нового поста</b>\n\n"
-            "Шаг 1 из 8: Загрузка изображения\n\n"
-            "Отправьте изображение товара или услуги.\n\n"
-            "Требования:\n"
-            "• Формат: JPG, PNG\n"
-            "• Размер: до 10 МБ\n"
-            "• Качество: хорошее освещение, четкое изображение"
-        )
+    # ВАЖНО: Очистка любого предыдущего состояния
+    current_state = await state.get_state()
+    if current_state:
+        await state.clear()
 
-        await message.answer(text, reply_markup=get_skip_cancel_keyboard(), parse_mode="HTML")
-        await state.set_state(PostCreation.image)
+    text = (
+        "📝 <b>Создание нового поста</b>\n\n"
+        "Шаг 1 из 8: Загрузка изображения\n\n"
+        "Отправьте изображение товара или услуги.\n\n"
+        "Требования:\n"
+        "• Формат: JPG, PNG\n"
+        "• Размер: до 10 МБ\n"
+        "• Качество: хорошее освещение, четкое изображение"
+    )
 
-    finally:
-        db.close()
+    await message.answer(text, reply_markup=get_skip_cancel_keyboard(), parse_mode="HTML")
+    await state.set_state(PostCreation.image)
 
 
 # ===== ШАГ 1: ИЗОБРАЖЕНИЕ =====
@@ -65,7 +66,19 @@ async def process_image(message: Message, state: FSMContext):
     """Обработка изображения"""
     photo = message.photo[-1]
 
-    await state.update_data(image_file_id=photo.file_id)
+    # Хэш для поиска похожих фото считается в пуле процессов, не блокируя бота.
+    # aHash уменьшает фото до 8x8, поэтому хватает самой маленькой копии
+    # (как у уже сохраненных хэшей); размеры берутся из метаданных без загрузки
+    image_hash = None
+    try:
+        info = await analyze_image_async((await message.bot.download(message.photo[0])).getvalue())
+        if info:
+            image_hash = info.image_hash
+            logger.debug(f"Фото {photo.width}x{photo.height}, хэш {image_hash}")
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить изображение для проверки: {e}")
+
+    await state.update_data(image_file_id=photo.file_id, image_hash=image_hash)
 
     text = (
         "✅ Изображение загружено!\n\n"
@@ -406,7 +419,7 @@ async def process_social_networks(callback: CallbackQuery, state: FSMContext):
 # ===== ШАГ 8: УСЛОВИЯ СОТРУДНИЧЕСТВА =====
 
 @router.callback_query(PostCreation.conditions, F.data.startswith("cond_"))
-async def process_conditions(callback: CallbackQuery, state: FSMContext):
+async def process_conditions(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Обработка условий сотрудничества"""
 
     data = await state.get_data()
@@ -439,7 +452,7 @@ async def process_conditions(callback: CallbackQuery, state: FSMContext):
         await state.update_data(conditions=conditions_str)
 
         # Переход к предпросмотру
-        await show_preview(callback, state)
+        await show_preview(callback, state, db)
 
     else:
         condition = condition_map.get(callback.data)
@@ -456,19 +469,19 @@ async def process_conditions(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(PostCreation.conditions_custom, F.text)
-async def process_conditions_custom(message: Message, state: FSMContext):
+async def process_conditions_custom(message: Message, state: FSMContext, db: AsyncSession):
     """Обработка своих условий"""
     conditions = message.text.strip()
 
     await state.update_data(conditions=conditions)
 
     # Переход к предпросмотру
-    await show_preview(message, state)
+    await show_preview(message, state, db)
 
 
 # ===== ПРЕДПРОСМОТР =====
 
-async def show_preview(message_or_callback, state: FSMContext):
+async def show_preview(message_or_callback, state: FSMContext, db: AsyncSession):
     """Показ предпросмотра поста"""
     data = await state.get_data()
 
@@ -484,8 +497,6 @@ async def show_preview(message_or_callback, state: FSMContext):
     is_admin = config.is_admin(telegram_id)
 
     # Отладка
-    import logging
-    logger = logging.getLogger(__name__)
     logger.info(f"DEBUG: telegram_id={telegram_id}, type={type(message_or_callback).__name__}, is_admin={is_admin}, ADMIN_IDS={config.ADMIN_IDS}")
 
     # Формирование текста предпросмотра
@@ -503,6 +514,22 @@ async def show_preview(message_or_callback, state: FSMContext):
     text += f"<b>Социальные сети:</b> {data.get('social_networks', 'Не указано')}\n"
     text += f"<b>Условия:</b>\n• {data.get('conditions', 'Не указано')}\n\n"
 
+    # Проверка на дубликаты (порог - настройка duplicate_threshold)
+    is_duplicate, similar_post, similarity = await find_duplicate(db, data)
+    if is_duplicate:
+        text += (
+            f"⚠️ Похожий пост уже есть: <b>{similar_post['product_name']}</b> "
+            f"(схожесть {similarity:.0f}%)\n\n"
+        )
+
+    if data.get('image_hash') is not None:
+        is_duplicate, similar_post, similarity = await find_image_duplicate(db, data['image_hash'])
+        if is_duplicate:
+            text += (
+                f"⚠️ Похожее фото уже есть в посте <b>{similar_post['product_name']}</b> "
+                f"(схожесть {similarity:.0f}%)\n\n"
+            )
+
     text += "Выберите тип публикации:"
 
     await state.set_state(PostCreation.preview)
@@ -547,269 +574,181 @@ async def show_preview(message_or_callback, state: FSMContext):
 # ===== ПУБЛИКАЦИЯ =====
 
 @router.callback_query(PostCreation.preview, F.data == "publish_queue")
-async def publish_to_queue(callback: CallbackQuery, state: FSMContext):
+async def publish_to_queue(callback: CallbackQuery, state: FSMContext, db: AsyncSession, user: Optional[UserIdentity]):
     """Публикация в очередь"""
     await callback.answer()
 
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        data = await state.get_data()
-
-        # Получение следующей позиции в очереди
-        queue_position = get_next_queue_position(db)
-
-        # Создание поста
-        # Преобразуем social_networks в список
-        social_networks_str = data.get('social_networks', '')
-        social_networks_list = [sn.strip() for sn in social_networks_str.split(',') if sn.strip()]
+    data = await state.get_data()
 
-        post_data = {
-            'user_id': user.id,
-            'product_name': data.get('product_name'),
-            'has_payment': data.get('payment'),  # Исправлено: payment -> has_payment
-            'payment_amount': data.get('payment_amount'),
-            'marketplace': data.get('marketplace'),
-            'expected_date': data.get('expected_date'),
-            'blog_theme': data.get('blog_theme'),
-            'social_networks': social_networks_list,  # Передаем как список
-            'ad_formats': data.get('ad_formats'),
-            'conditions': data.get('conditions'),
-            'image_file_id': data.get('image_file_id'),
-            'status': 'queue',
-            'queue_position': queue_position
-        }
+    # Создание поста
+    # Преобразуем social_networks в список
+    social_networks_str = data.get('social_networks', '')
+    social_networks_list = [sn.strip() for sn in social_networks_str.split(',') if sn.strip()]
+
+    post_data = {
+        'user_id': user.id,
+        'product_name': data.get('product_name'),
+        'has_payment': data.get('payment'),  # Исправлено: payment -> has_payment
+        'payment_amount': data.get('payment_amount'),
+        'marketplace': data.get('marketplace'),
+        'expected_date': data.get('expected_date'),
+        'blog_theme': data.get('blog_theme'),
+        'social_networks': social_networks_list,  # Передаем как список
+        'ad_formats': data.get('ad_formats'),
+        'conditions': data.get('conditions'),
+        'image_file_id': data.get('image_file_id'),
+        'image_hash': data.get('image_hash')
+    }
 
-        post = create_post(db, **post_data)
+    post = await enqueue_post(db, **post_data)
+    queue_position = await get_queue_rank(db, post)
 
-        # Получение цены очереди
-        queue_price = get_setting_value(db, 'queue_price', '0')
+    # Цена очереди и расписание (кэш настроек)
+    settings = await get_settings(db)
+    queue_price = settings.queue_price
 
-        # Расчет примерного времени публикации
-        from datetime import datetime, timedelta
-        posts_per_day = int(get_setting_value(db, 'posts_per_day', '5'))
-        schedule_times = get_setting_value(db, 'schedule_times', '10:00,13:00,16:00,19:00,22:00')
+    # Расчет примерного времени публикации
+    from datetime import datetime, timedelta
+    posts_per_day = settings.posts_per_day
 
-        # Вычисляем на какой день попадает пост
-        days_ahead = (queue_position - 1) // posts_per_day
-        post_index_in_day = (queue_position - 1) % posts_per_day
+    # Вычисляем на какой день попадает пост
+    days_ahead = (queue_position - 1) // posts_per_day
+    post_index_in_day = (queue_position - 1) % posts_per_day
 
-        # Получаем время публикации
-        times_list = [t.strip() for t in schedule_times.split(',')]
-        if post_index_in_day < len(times_list):
-            pub_time = times_list[post_index_in_day]
-        else:
-            pub_time = times_list[-1]
+    # Получаем время публикации
+    times_list = settings.schedule_times
+    if post_index_in_day < len(times_list):
+        pub_time = times_list[post_index_in_day]
+    else:
+        pub_time = times_list[-1]
 
-        # Рассчитываем дату
-        pub_date = datetime.now().date() + timedelta(days=days_ahead)
-        estimated_time = f"{pub_date.strftime('%d.%m.%Y')} в {pub_time}"
+    # Рассчитываем дату
+    pub_date = datetime.now().date() + timedelta(days=days_ahead)
+    estimated_time = f"{pub_date.strftime('%d.%m.%Y')} в {pub_time}"
 
-        text = (
-            "✅ <b>Пост добавлен в очередь!</b>\n\n"
-            f"Позиция в очереди: №{queue_position}\n"
-            f"Примерное время публикации: {estimated_time}\n"
-            f"Стоимость публикации: {queue_price}₽\n\n"
-            "📢 Пост будет автоматически опубликован в канале по расписанию.\n"
-            "Вы можете отслеживать статус в разделе 'Мои публикации'."
-        )
+    text = (
+        "✅ <b>Пост добавлен в очередь!</b>\n\n"
+        f"Позиция в очереди: №{queue_position}\n"
+        f"Примерное время публикации: {estimated_time}\n"
+        f"Стоимость публикации: {queue_price}₽\n\n"
+        "📢 Пост будет автоматически опубликован в канале по расписанию.\n"
+        "Вы можете отслеживать статус в разделе 'Мои публикации'."
+    )
 
-        # Определяем клавиатуру в зависимости от роли
-        keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
+    # Определяем клавиатуру в зависимости от роли
+    keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
 
-        await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+    await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
-        # Удаляем предыдущее сообщение с предпросмотром
-        try:
-            await callback.message.delete()
-        except:
-            pass
-
-        await state.clear()
+    # Удаляем предыдущее сообщение с предпросмотром
+    try:
+        await callback.message.delete()
+    except:
+        pass
 
-    finally:
-        db.close()
+    await state.clear()
 
 
 @router.callback_query(PostCreation.preview, F.data == "publish_priority")
-async def publish_priority(callback: CallbackQuery, state: FSMContext):
+async def publish_priority(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Приоритетная публикация"""
     await callback.answer()
 
-    db = next(get_db())
-    try:
-        priority_price = get_setting_value(db, 'priority_price', '500')
-
-        text = (
-            "⚡ <b>Приоритетная публикация</b>\n\n"
-            f"Стоимость: {priority_price}₽\n\n"
-            "Преимущества:\n"
-            "• Публикация в выбранное вами время\n"
-            "• Гарантированное размещение\n"
-            "• Приоритет над обычной очередью\n\n"
-            "⚠️ Функционал оплаты будет добавлен позже.\n"
-            "Пока вы можете опубликовать пост в обычной очереди.\n\n"
-            "Вернуться к выбору?"
-        )
+    priority_price = (await get_settings(db)).priority_price
 
-        from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text="🕐 Опубликовать в очереди", callback_data="publish_queue")],
-            [InlineKeyboardButton(text="💾 Сохранить в черновики", callback_data="save_draft")],
-            [InlineKeyboardButton(text="◀️ Назад к предпросмотру", callback_data="back_to_preview")]
-        ])
+    text = (
+        "⚡ <b>Приоритетная публикация</b>\n\n"
+        f"Стоимость: {priority_price}₽\n\n"
+        "Преимущества:\n"
+        "• Публикация в выбранное вами время\n"
+        "• Гарантированное размещение\n"
+        "• Приоритет над обычной очередью\n\n"
+        "⚠️ Функционал оплаты будет добавлен позже.\n"
+        "Пока вы можете опубликовать пост в обычной очереди.\n\n"
+        "Вернуться к выбору?"
+    )
 
-        # Удаляем старое сообщение с фото и отправляем новое текстовое
-        try:
-            await callback.message.delete()
-        except:
-            pass
+    keyboard = get_priority_unavailable_keyboard()
 
-        await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+    # Удаляем старое сообщение с фото и отправляем новое текстовое
+    try:
+        await callback.message.delete()
+    except:
+        pass
 
-    finally:
-        db.close()
+    await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
 
 @router.callback_query(PostCreation.preview, F.data == "back_to_preview")
-async def back_to_preview(callback: CallbackQuery, state: FSMContext):
+async def back_to_preview(callback: CallbackQuery, state: FSMContext, db: AsyncSession):
     """Возврат к предпросмотру"""
     await callback.answer()
-    await show_preview(callback, state)
+    await show_preview(callback, state, db)
 
 
 @router.callback_query(PostCreation.preview, F.data == "publish_now")
-async def publish_now(callback: CallbackQuery, state: FSMContext):
+async def publish_now(callback: CallbackQuery, state: FSMContext, db: AsyncSession, user: Optional[UserIdentity]):
     """Немедленная публикация (только для админов)"""
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-
-        # Проверка прав администратора
-        if not config.is_admin(user.telegram_id):
-            await callback.answer("❌ Доступно только администраторам", show_alert=True)
-            return
+    # Проверка прав администратора
+    if not config.is_admin(user.telegram_id):
+        await callback.answer("❌ Доступно только администраторам", show_alert=True)
+        return
 
-        await callback.answer()
+    await callback.answer()
 
-        data = await state.get_data()
+    data = await state.get_data()
 
-        # Получение ID канала из настроек
-        from bot.database.crud import get_setting_value
-        channel_id = get_setting_value(db, 'channel_id')
+    # Получение ID канала из настроек
+    channel_id = (await get_settings(db)).channel_id
 
-        if not channel_id:
-            await callback.message.answer(
-                "❌ <b>Ошибка!</b>\n\n"
-                "ID канала не настроен. Настройте канал в админ-панели.",
-                parse_mode="HTML"
-            )
-            return
+    if not channel_id:
+        await callback.message.answer(
+            "❌ <b>Ошибка!</b>\n\n"
+            "ID канала не настроен. Настройте канал в админ-панели.",
+            parse_mode="HTML"
+        )
+        return
 
-        # Формирование текста поста
-        from bot.utils.post_formatter import format_post_for_channel
-        post_data = {
-            'product_name': data.get('product_name'),
-            'has_payment': data.get('payment'),
-            'payment_amount': data.get('payment_amount'),
-            'marketplace': data.get('marketplace'),
-            'expected_date': data.get('expected_date'),
-            'blog_theme': data.get('blog_theme'),
-            'social_networks': [sn.strip() for sn in data.get('social_networks', '').split(',') if sn.strip()],
-            'ad_formats': data.get('ad_formats'),
-            'conditions': data.get('conditions'),
-        }
+    # Формирование текста поста
+    from bot.utils.post_formatter import format_post_for_channel
+    post_data = {
+        'product_name': data.get('product_name'),
+        'has_payment': data.get('payment'),
+        'payment_amount': data.get('payment_amount'),
+        'marketplace': data.get('marketplace'),
+        'expected_date': data.get('expected_date'),
+        'blog_theme': data.get('blog_theme'),
+        'social_networks': [sn.strip() for sn in data.get('social_networks', '').split(',') if sn.strip()],
+        'ad_formats': data.get('ad_formats'),
+        'conditions': data.get('conditions'),
+    }
 
-        text = format_post_for_channel(post_data)
+    text = format_post_for_channel(post_data)
 
-        # Отправка в канал
-        from aiogram import Bot
-        bot = Bot(token=config.BOT_TOKEN)
+    # Отправка в канал через бота из main.py: его сессия проходит через ограничитель частоты
+    bot = callback.bot
 
-        try:
-            if data.get('image_file_id'):
-                await bot.send_photo(
-                    chat_id=channel_id,
-                    photo=data['image_file_id'],
-                    caption=text,
-                    parse_mode="HTML"
-                )
-            else:
-                await bot.send_message(
-                    chat_id=channel_id,
-                    text=text,
-                    parse_mode="HTML"
-                )
-
-            # Сохранение поста в базу со статусом published
-            social_networks_str = data.get('social_networks', '')
-            social_networks_list = [sn.strip() for sn in social_networks_str.split(',') if sn.strip()]
-
-            from datetime import datetime
-            post_db_data = {
-                'user_id': user.id,
-                'product_name': data.get('product_name'),
-                'has_payment': data.get('payment'),
-                'payment_amount': data.get('payment_amount'),
-                'marketplace': data.get('marketplace'),
-                'expected_date': data.get('expected_date'),
-                'blog_theme': data.get('blog_theme'),
-                'social_networks': social_networks_list,
-                'ad_formats': data.get('ad_formats'),
-                'conditions': data.get('conditions'),
-                'image_file_id': data.get('image_file_id'),
-                'status': 'published',
-                'published_at': datetime.now()
-            }
-
-            post = create_post(db, **post_db_data)
-
-            text = (
-                "✅ <b>Пост успешно опубликован!</b>\n\n"
-                f"Пост #{post.id} был немедленно опубликован в канале.\n\n"
-                "Вы можете просмотреть его в разделе 'Мои публикации'."
+    try:
+        if data.get('image_file_id'):
+            await bot.send_photo(
+                chat_id=channel_id,
+                photo=data['image_file_id'],
+                caption=text,
+                parse_mode="HTML"
             )
-
-            keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
-            await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
-
-            try:
-                await callback.message.delete()
-            except:
-                pass
-
-            await state.clear()
-
-        except Exception as e:
-            await callback.message.answer(
-                f"❌ <b>Ошибка при публикации!</b>\n\n"
-                f"Не удалось опубликовать пост в канал.\n"
-                f"Ошибка: {str(e)}",
+        else:
+            await bot.send_message(
+                chat_id=channel_id,
+                text=text,
                 parse_mode="HTML"
             )
 
-        finally:
-            await bot.session.close()
-
-    finally:
-        db.close()
-
-
-@router.callback_query(PostCreation.preview, F.data == "save_draft")
-async def save_draft(callback: CallbackQuery, state: FSMContext):
-    """Сохранение в черновики"""
-    await callback.answer()
-
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        data = await state.get_data()
-
-        # Преобразуем social_networks в список
+        # Сохранение поста в базу со статусом published
         social_networks_str = data.get('social_networks', '')
         social_networks_list = [sn.strip() for sn in social_networks_str.split(',') if sn.strip()]
 
-        post_data = {
+        from datetime import datetime
+        post_db_data = {
             'user_id': user.id,
             'product_name': data.get('product_name'),
             'has_payment': data.get('payment'),
@@ -821,19 +760,20 @@ async def save_draft(callback: CallbackQuery, state: FSMContext):
             'ad_formats': data.get('ad_formats'),
             'conditions': data.get('conditions'),
             'image_file_id': data.get('image_file_id'),
-            'status': 'draft'
+            'image_hash': data.get('image_hash'),
+            'status': 'published',
+            'published_at': datetime.now()
         }
 
-        post = create_post(db, **post_data)
+        post = await create_post(db, **post_db_data)
 
         text = (
-            "💾 <b>Пост сохранен в черновики!</b>\n\n"
-            f"ID черновика: #{post.id}\n\n"
-            "Вы можете завершить и опубликовать его позже в разделе 'Мои черновики'."
+            "✅ <b>Пост успешно опубликован!</b>\n\n"
+            f"Пост #{post.id} был немедленно опубликован в канале.\n\n"
+            "Вы можете просмотреть его в разделе 'Мои публикации'."
         )
 
         keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
-
         await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
 
         try:
@@ -843,8 +783,60 @@ async def save_draft(callback: CallbackQuery, state: FSMContext):
 
         await state.clear()
 
-    finally:
-        db.close()
+    except Exception as e:
+        await callback.message.answer(
+            f"❌ <b>Ошибка при публикации!</b>\n\n"
+            f"Не удалось опубликовать пост в канал.\n"
+            f"Ошибка: {str(e)}",
+            parse_mode="HTML"
+        )
+
+
+@router.callback_query(PostCreation.preview, F.data == "save_draft")
+async def save_draft(callback: CallbackQuery, state: FSMContext, db: AsyncSession, user: Optional[UserIdentity]):
+    """Сохранение в черновики"""
+    await callback.answer()
+
+    data = await state.get_data()
+
+    # Преобразуем social_networks в список
+    social_networks_str = data.get('social_networks', '')
+    social_networks_list = [sn.strip() for sn in social_networks_str.split(',') if sn.strip()]
+
+    post_data = {
+        'user_id': user.id,
+        'product_name': data.get('product_name'),
+        'has_payment': data.get('payment'),
+        'payment_amount': data.get('payment_amount'),
+        'marketplace': data.get('marketplace'),
+        'expected_date': data.get('expected_date'),
+        'blog_theme': data.get('blog_theme'),
+        'social_networks': social_networks_list,
+        'ad_formats': data.get('ad_formats'),
+        'conditions': data.get('conditions'),
+        'image_file_id': data.get('image_file_id'),
+        'image_hash': data.get('image_hash'),
+        'status': 'draft'
+    }
+
+    post = await create_post(db, **post_data)
+
+    text = (
+        "💾 <b>Пост сохранен в черновики!</b>\n\n"
+        f"ID черновика: #{post.id}\n\n"
+        "Вы можете завершить и опубликовать его позже в разделе 'Мои черновики'."
+    )
+
+    keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
+
+    await callback.message.answer(text, reply_markup=keyboard, parse_mode="HTML")
+
+    try:
+        await callback.message.delete()
+    except:
+        pass
+
+    await state.clear()
 
 
 # ===== РЕДАКТИРОВАНИЕ И НАВИГАЦИЯ =====
@@ -872,26 +864,20 @@ async def back_button_handler(callback: CallbackQuery, state: FSMContext):
 # ===== ОТМЕНА СОЗДАНИЯ =====
 
 @router.callback_query(F.data == "cancel_post")
-async def cancel_post_creation(callback: CallbackQuery, state: FSMContext):
+async def cancel_post_creation(callback: CallbackQuery, state: FSMContext, db: AsyncSession, user: Optional[UserIdentity]):
     """Отмена создания поста"""
     await callback.answer()
 
-    db = next(get_db())
-    try:
-        user = get_user_by_telegram_id(db, callback.from_user.id)
-        keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
+    keyboard = get_admin_menu_keyboard() if config.is_admin(user.telegram_id) else get_main_menu_keyboard()
 
-        await callback.message.answer(
-            "❌ Создание поста отменено.",
-            reply_markup=keyboard
-        )
-
-        try:
-            await callback.message.delete()
-        except:
-            pass
+    await callback.message.answer(
+        "❌ Создание поста отменено.",
+        reply_markup=keyboard
+    )
 
-        await state.clear()
+    try:
+        await callback.message.delete()
+    except:
+        pass
 
-    finally:
-        db.close()
+    await state.clear()
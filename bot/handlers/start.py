@@ -1,19 +1,21 @@
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import config
-from bot.database import get_db
-from bot.database.crud import get_user_by_telegram_id, create_user
+from bot.database.async_crud import create_user
+from bot.database.identity import UserIdentity
 from bot.keyboards.main_menu import get_main_menu_keyboard, get_admin_menu_keyboard
 
 router = Router()
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message, state: FSMContext):
+async def cmd_start(message: Message, state: FSMContext, db: AsyncSession, user: Optional[UserIdentity]):
     """Обработчик команды /start"""
     await state.clear()
 
@@ -21,52 +23,45 @@ async def cmd_start(message: Message, state: FSMContext):
     username = message.from_user.username
     full_name = message.from_user.full_name
 
-    # Получение сессии БД
-    db = next(get_db())
-    try:
-        # Проверка существования пользователя
-        user = get_user_by_telegram_id(db, telegram_id)
+    # Пользователь уже найден UserMiddleware (None - еще не зарегистрирован)
+    if not user:
+        # Определение роли
+        role = 'admin' if config.is_admin(telegram_id) else 'advertiser'
 
-        if not user:
-            # Определение роли
-            role = 'admin' if config.is_admin(telegram_id) else 'advertiser'
+        # Создание нового пользователя
+        user = await create_user(
+            db=db,
+            telegram_id=telegram_id,
+            username=username,
+            full_name=full_name,
+            role=role
+        )
 
-            # Создание нового пользователя
-            user = create_user(
-                db=db,
-                telegram_id=telegram_id,
-                username=username,
-                full_name=full_name,
-                role=role
+        if role == 'admin':
+            await message.answer(
+                f"👋 Добро пожаловать, администратор!\n\n"
+                f"Вы получили доступ к панели администратора.",
+                reply_markup=get_admin_menu_keyboard()
+            )
+        else:
+            await message.answer(
+                f"👋 Добро пожаловать в бартерный канал для блоггеров!\n\n"
+                f"Здесь вы можете размещать свои предложения для блоггеров.\n\n"
+                f"Выберите действие из меню:",
+                reply_markup=get_main_menu_keyboard()
+            )
+    else:
+        # Пользователь уже существует
+        if user.role == 'admin':
+            await message.answer(
+                f"👋 С возвращением, администратор!",
+                reply_markup=get_admin_menu_keyboard()
             )
-
-            if role == 'admin':
-                await message.answer(
-                    f"👋 Добро пожаловать, администратор!\n\n"
-                    f"Вы получили доступ к панели администратора.",
-                    reply_markup=get_admin_menu_keyboard()
-                )
-            else:
-                await message.answer(
-                    f"👋 Добро пожаловать в бартерный канал для блоггеров!\n\n"
-                    f"Здесь вы можете размещать свои предложения для блоггеров.\n\n"
-                    f"Выберите действие из меню:",
-                    reply_markup=get_main_menu_keyboard()
-                )
         else:
-            # Пользователь уже существует
-            if user.role == 'admin':
-                await message.answer(
-                    f"👋 С возвращением, администратор!",
-                    reply_markup=get_admin_menu_keyboard()
-                )
-            else:
-                await message.answer(
-                    f"👋 С возвращением!\n\nВыберите действие из меню:",
-                    reply_markup=get_main_menu_keyboard()
-                )
-    finally:
-        db.close()
+            await message.answer(
+                f"👋 С возвращением!\n\nВыберите действие из меню:",
+                reply_markup=get_main_menu_keyboard()
+            )
 
 
 @router.message(F.text == "ℹ️ Информация")
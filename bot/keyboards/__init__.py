@@ -1,7 +1,14 @@
 from .main_menu import get_main_menu_keyboard, get_admin_menu_keyboard
 from .post_creator import *
+from .registry import get_keyboard, registered_keyboards
+# Модули admin и common строят и регистрируют свои клавиатуры при импорте
+from . import admin, common
 
 __all__ = [
     'get_main_menu_keyboard',
     'get_admin_menu_keyboard',
+    'get_keyboard',
+    'registered_keyboards',
+    'admin',
+    'common',
 ]
@@ -0,0 +1,103 @@
+from aiogram.types import InlineKeyboardMarkup
+
+from .registry import static_keyboard, cached_keyboard, buttons_markup
+
+BACK_TO_PANEL = ("◀️ Назад в админ-панель", "admin_back")
+
+
+@static_keyboard
+def get_channel_add_keyboard() -> InlineKeyboardMarkup:
+    """Настройки канала: канал не подключен"""
+    return buttons_markup([
+        ("➕ Добавить канал", "admin_add_channel"),
+        BACK_TO_PANEL,
+    ])
+
+
+@static_keyboard
+def get_channel_keyboard() -> InlineKeyboardMarkup:
+    """Настройки канала: канал подключен"""
+    return buttons_markup([
+        ("✏️ Изменить канал", "admin_change_channel"),
+        ("🔄 Проверить подключение", "admin_check_channel"),
+        BACK_TO_PANEL,
+    ])
+
+
+@static_keyboard
+def get_channel_change_keyboard() -> InlineKeyboardMarkup:
+    """Ошибка проверки канала"""
+    return buttons_markup([
+        ("✏️ Изменить канал", "admin_change_channel"),
+        ("◀️ Назад", "admin_channel"),
+    ])
+
+
+@static_keyboard
+def get_schedule_settings_keyboard() -> InlineKeyboardMarkup:
+    """Расписание публикаций"""
+    return buttons_markup([
+        ("✏️ Изменить количество постов", "admin_change_posts_count"),
+        ("⏰ Изменить время публикаций", "admin_change_schedule"),
+        BACK_TO_PANEL,
+    ])
+
+
+@static_keyboard
+def get_prices_keyboard() -> InlineKeyboardMarkup:
+    """Тарифы и цены"""
+    return buttons_markup([
+        ("✏️ Изменить цену очереди", "admin_change_queue_price"),
+        ("✏️ Изменить цену приоритета", "admin_change_priority_price"),
+        BACK_TO_PANEL,
+    ])
+
+
+@static_keyboard
+def get_queue_menu_keyboard() -> InlineKeyboardMarkup:
+    """Очередь публикаций"""
+    return buttons_markup([
+        ("📄 Список постов", "admin_queue_list:1"),
+        ("📅 Календарь публикаций", "admin_queue_calendar"),
+        ("🗑 Удалить пост", "admin_queue_delete"),
+        BACK_TO_PANEL,
+    ])
+
+
+@static_keyboard
+def get_priority_menu_keyboard() -> InlineKeyboardMarkup:
+    """Приоритетные публикации"""
+    return buttons_markup([
+        ("📄 Список постов", "admin_priority_list:1"),
+        ("📊 Статистика", "admin_priority_stats"),
+        BACK_TO_PANEL,
+    ])
+
+
+@static_keyboard
+def get_stats_menu_keyboard() -> InlineKeyboardMarkup:
+    """Статистика"""
+    return buttons_markup([
+        ("📈 Детальная статистика", "admin_stats_detailed"),
+        ("📅 Статистика по периодам", "admin_stats_period"),
+        ("💰 Финансовая статистика", "admin_stats_financial"),
+        ("📥 Экспорт отчета", "admin_stats_export"),
+        BACK_TO_PANEL,
+    ])
+
+
+@cached_keyboard
+def get_stats_periods_keyboard(prefix: str) -> InlineKeyboardMarkup:
+    """
+    Выбор периода статистики
+
+    Args:
+        prefix: Префикс callback_data (admin_stats_period или admin_stats_export)
+    """
+    return buttons_markup([
+        ("За 7 дней", f"{prefix}:7"),
+        ("За 30 дней", f"{prefix}:30"),
+        ("За 90 дней", f"{prefix}:90"),
+        ("За всё время", f"{prefix}:all"),
+        ("◀️ К статистике", "admin_stats"),
+    ])
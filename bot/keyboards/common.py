@@ -0,0 +1,15 @@
+from aiogram.types import InlineKeyboardMarkup
+
+from .registry import cached_keyboard, buttons_markup
+
+
+@cached_keyboard
+def get_back_keyboard(callback_data: str, text: str = "◀️ Назад") -> InlineKeyboardMarkup:
+    """Клавиатура с одной кнопкой возврата"""
+    return buttons_markup([(text, callback_data)])
+
+
+@cached_keyboard
+def get_cancel_keyboard(callback_data: str) -> InlineKeyboardMarkup:
+    """Клавиатура с кнопкой 'Отменить' (возврат в раздел callback_data)"""
+    return buttons_markup([("❌ Отменить", callback_data)])
@@ -1,6 +1,9 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+from .registry import static_keyboard
 
+
+@static_keyboard
 def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     """Главное меню для рекламодателя"""
     keyboard = ReplyKeyboardMarkup(
@@ -14,6 +17,7 @@ def get_main_menu_keyboard() -> ReplyKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_admin_menu_keyboard() -> ReplyKeyboardMarkup:
     """Главное меню для администратора"""
     keyboard = ReplyKeyboardMarkup(
@@ -28,6 +32,7 @@ def get_admin_menu_keyboard() -> ReplyKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_admin_panel_keyboard() -> InlineKeyboardMarkup:
     """Панель администратора"""
     keyboard = InlineKeyboardMarkup(
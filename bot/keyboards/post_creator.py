@@ -1,6 +1,9 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 
+from .registry import static_keyboard, cached_keyboard, ToggleKeyboard
 
+
+@static_keyboard
 def get_skip_cancel_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура с кнопками 'Пропустить' и 'Отменить'"""
     keyboard = InlineKeyboardMarkup(
@@ -12,6 +15,7 @@ def get_skip_cancel_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_back_cancel_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура с кнопками 'Назад' и 'Отменить'"""
     keyboard = InlineKeyboardMarkup(
@@ -23,6 +27,7 @@ def get_back_cancel_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_payment_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для выбора доплаты"""
     keyboard = InlineKeyboardMarkup(
@@ -37,6 +42,7 @@ def get_payment_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_marketplace_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для выбора маркетплейса"""
     keyboard = InlineKeyboardMarkup(
@@ -52,6 +58,7 @@ def get_marketplace_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_expected_date_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для выбора ожидаемой даты публикации"""
     keyboard = InlineKeyboardMarkup(
@@ -66,6 +73,7 @@ def get_expected_date_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
+@static_keyboard
 def get_blog_theme_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура для выбора тематики блога"""
     keyboard = InlineKeyboardMarkup(
@@ -82,59 +90,49 @@ def get_blog_theme_keyboard() -> InlineKeyboardMarkup:
     return keyboard
 
 
-def get_social_networks_keyboard(selected: list = None) -> InlineKeyboardMarkup:
-    """Клавиатура для выбора социальных сетей"""
-    if selected is None:
-        selected = []
-
-    networks = [
+_social_networks_keyboard = ToggleKeyboard(
+    options=[
         ("Instagram", "sn_instagram"),
         ("TikTok", "sn_tiktok"),
         ("Telegram", "sn_telegram"),
         ("VK", "sn_vk"),
         ("YouTube", "sn_youtube"),
+    ],
+    footer=[
+        ("Продолжить", "sn_continue"),
+        ("◀️ Назад", "back"),
+        ("❌ Отменить", "cancel_post"),
     ]
+)
 
-    keyboard_buttons = []
-    for name, callback in networks:
-        checkmark = "✅ " if name in selected else ""
-        keyboard_buttons.append([InlineKeyboardButton(text=f"{checkmark}{name}", callback_data=callback)])
-
-    keyboard_buttons.append([InlineKeyboardButton(text="Продолжить", callback_data="sn_continue")])
-    keyboard_buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data="back")])
-    keyboard_buttons.append([InlineKeyboardButton(text="❌ Отменить", callback_data="cancel_post")])
-
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-    return keyboard
-
-
-def get_conditions_keyboard(selected: list = None) -> InlineKeyboardMarkup:
-    """Клавиатура для выбора условий сотрудничества"""
-    if selected is None:
-        selected = []
-
-    conditions = [
+_conditions_keyboard = ToggleKeyboard(
+    options=[
         ("Заказ товара по поисковому запросу", "cond_search"),
         ("Выкуп с ПВЗ", "cond_pickup"),
         ("Положительный отзыв 5⭐", "cond_review"),
         ("Съемка видео по ТЗ", "cond_video"),
         ("Не удалять контент", "cond_keep"),
+    ],
+    footer=[
+        ("Добавить свои условия", "cond_custom"),
+        ("Продолжить", "cond_continue"),
+        ("◀️ Назад", "back"),
+        ("❌ Отменить", "cancel_post"),
     ]
+)
 
-    keyboard_buttons = []
-    for name, callback in conditions:
-        checkmark = "✅ " if name in selected else ""
-        keyboard_buttons.append([InlineKeyboardButton(text=f"{checkmark}{name}", callback_data=callback)])
 
-    keyboard_buttons.append([InlineKeyboardButton(text="Добавить свои условия", callback_data="cond_custom")])
-    keyboard_buttons.append([InlineKeyboardButton(text="Продолжить", callback_data="cond_continue")])
-    keyboard_buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data="back")])
-    keyboard_buttons.append([InlineKeyboardButton(text="❌ Отменить", callback_data="cancel_post")])
+def get_social_networks_keyboard(selected: list = None) -> InlineKeyboardMarkup:
+    """Клавиатура для выбора социальных сетей"""
+    return _social_networks_keyboard(selected)
 
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
-    return keyboard
+
+def get_conditions_keyboard(selected: list = None) -> InlineKeyboardMarkup:
+    """Клавиатура для выбора условий сотрудничества"""
+    return _conditions_keyboard(selected)
 
 
+@cached_keyboard
 def get_preview_keyboard(is_admin: bool = False) -> InlineKeyboardMarkup:
     """Клавиатура для предпросмотра поста"""
     buttons = [
@@ -154,3 +152,16 @@ def get_preview_keyboard(is_admin: bool = False) -> InlineKeyboardMarkup:
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
     return keyboard
+
+
+@static_keyboard
+def get_priority_unavailable_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура после выбора приоритетной публикации (оплата недоступна)"""
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="🕐 Опубликовать в очереди", callback_data="publish_queue")],
+            [InlineKeyboardButton(text="💾 Сохранить в черновики", callback_data="save_draft")],
+            [InlineKeyboardButton(text="◀️ Назад к предпросмотру", callback_data="back_to_preview")],
+        ]
+    )
+    return keyboard
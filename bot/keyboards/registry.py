@@ -0,0 +1,102 @@
+"""
+Реестр клавиатур
+
+Статические клавиатуры (меню, панели, кнопки "Назад"/"Отменить") строятся
+один раз при импорте модуля клавиатур и затем возвращаются готовым объектом:
+модели aiogram неизменяемы, поэтому один объект можно отдавать во все
+обработчики без создания и валидации pydantic на каждый апдейт.
+
+Клавиатуры с множественным выбором (ToggleKeyboard) собираются из заранее
+построенных кнопок: для каждого варианта хранятся обе кнопки - с галочкой
+и без, - и при переключении меняется только ссылка на кнопку.
+"""
+
+from functools import lru_cache, wraps
+from typing import Callable, Dict, FrozenSet, Iterable, List, Sequence, Tuple, Union
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+
+Keyboard = Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]
+
+CHECKMARK = "✅ "
+
+_keyboards: Dict[str, Keyboard] = {}
+
+
+@lru_cache(maxsize=1024)
+def button(text: str, callback_data: str) -> InlineKeyboardButton:
+    """Inline-кнопка (одинаковые кнопки создаются один раз)"""
+    return InlineKeyboardButton(text=text, callback_data=callback_data)
+
+
+def inline_markup(rows: Iterable[Iterable[InlineKeyboardButton]]) -> InlineKeyboardMarkup:
+    """
+    InlineKeyboardMarkup из готовых кнопок без повторной валидации
+
+    Кнопки уже проверены при создании (button), поэтому разметка собирается
+    через model_construct.
+    """
+    return InlineKeyboardMarkup.model_construct(inline_keyboard=[list(row) for row in rows])
+
+
+def buttons_markup(rows: Iterable[Tuple[str, str]]) -> InlineKeyboardMarkup:
+    """Клавиатура "одна кнопка в ряд" из пар (текст, callback_data)"""
+    return inline_markup([button(text, callback_data)] for text, callback_data in rows)
+
+
+def static_keyboard(builder: Callable[[], Keyboard]) -> Callable[[], Keyboard]:
+    """
+    Декоратор статической клавиатуры: строится сразу и регистрируется
+    под именем функции, функция возвращает готовый объект
+    """
+    keyboard = builder()
+    _keyboards[builder.__name__] = keyboard
+
+    @wraps(builder)
+    def get_keyboard() -> Keyboard:
+        return keyboard
+
+    return get_keyboard
+
+
+def cached_keyboard(builder: Callable[..., Keyboard]) -> Callable[..., Keyboard]:
+    """Декоратор клавиатуры с параметрами: строится один раз на набор аргументов"""
+    return lru_cache(maxsize=256)(builder)
+
+
+def get_keyboard(name: str) -> Keyboard:
+    """Статическая клавиатура из реестра по имени функции"""
+    return _keyboards[name]
+
+
+def registered_keyboards() -> List[str]:
+    """Имена статических клавиатур в реестре"""
+    return list(_keyboards)
+
+
+class ToggleKeyboard:
+    """
+    Клавиатура с множественным выбором
+
+    Args:
+        options: Варианты (текст, callback_data); в selected хранится текст
+        footer: Нижние кнопки (текст, callback_data), по одной в ряд
+    """
+
+    def __init__(self, options: Sequence[Tuple[str, str]], footer: Sequence[Tuple[str, str]]):
+        self._names = frozenset(name for name, _ in options)
+        self._options = [
+            (name, button(name, callback_data), button(f"{CHECKMARK}{name}", callback_data))
+            for name, callback_data in options
+        ]
+        self._footer = [[button(text, callback_data)] for text, callback_data in footer]
+        self._markups: Dict[FrozenSet[str], InlineKeyboardMarkup] = {}
+
+    def __call__(self, selected: Iterable[str] = None) -> InlineKeyboardMarkup:
+        # Вариантов немного (2^n), поэтому готовые разметки хранятся все
+        key = self._names.intersection(selected or ())
+        markup = self._markups.get(key)
+        if markup is None:
+            rows = [[checked if name in key else unchecked] for name, unchecked, checked in self._options]
+            markup = self._markups[key] = inline_markup(rows + self._footer)
+        return markup
@@ -1,11 +1,17 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from bot.config import config
-from bot.database import init_db
+from bot.database import init_db, AsyncSessionLocal
+from bot.database.settings import listen_settings_changes
+from bot.database.identity import listen_user_changes
 from bot.handlers import start, admin, post_creator, my_posts
+from bot.middlewares import DbSessionMiddleware, RateLimitRequestMiddleware, UserMiddleware
+from bot.states import create_fsm_storage
+from bot.utils.image_executor import shutdown_image_executor
+from bot.utils.metrics import start_metrics_server
+from bot.webhook import run_webhook
 
 # Настройка логирования
 logging.basicConfig(
@@ -33,21 +39,43 @@ async def main():
 
     # Создание бота и диспетчера
     bot = Bot(token=config.BOT_TOKEN)
-    storage = MemoryStorage()
+    # Общие с Celery лимиты на исходящие сообщения
+    bot.session.middleware(RateLimitRequestMiddleware())
+    storage = create_fsm_storage()
     dp = Dispatcher(storage=storage)
 
+    # Одна сессия БД на апдейт
+    dp.update.outer_middleware(DbSessionMiddleware(AsyncSessionLocal))
+    # Пользователь бота из кэша (использует сессию БД)
+    dp.update.outer_middleware(UserMiddleware())
+
     # Регистрация роутеров
     dp.include_router(start.router)
     dp.include_router(admin.router)
     dp.include_router(post_creator.router)
     dp.include_router(my_posts.router)
 
-    logger.info("🤖 Бот запущен и готов к работе")
+    start_metrics_server(config.METRICS_PORT)
+
+    # Сброс кэша настроек при их изменении в других процессах
+    settings_listener = asyncio.create_task(listen_settings_changes())
+    # Сброс кэша пользователей при смене роли в других процессах
+    users_listener = asyncio.create_task(listen_user_changes())
+
+    logger.info(f"🤖 Бот запущен и готов к работе (режим: {config.BOT_RUN_MODE}, FSM: {config.FSM_STORAGE})")
 
-    # Запуск polling
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if config.BOT_RUN_MODE == 'webhook':
+            # Запуск webhook сервера
+            await run_webhook(dp, bot)
+        else:
+            # Запуск polling
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
+        settings_listener.cancel()
+        users_listener.cancel()
+        shutdown_image_executor()
+        await storage.close()
         await bot.session.close()
 
 
@@ -0,0 +1,5 @@
+from .database import DbSessionMiddleware
+from .rate_limit import RateLimitRequestMiddleware
+from .user import UserMiddleware
+
+__all__ = ['DbSessionMiddleware', 'RateLimitRequestMiddleware', 'UserMiddleware']
@@ -0,0 +1,34 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Открывает одну сессию БД на апдейт и передает ее в обработчик как `db`.
+
+    При успешной обработке изменения фиксируются, при ошибке - откатываются,
+    сессия всегда возвращает соединение в пул.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker):
+        super().__init__()
+        self.session_pool = session_pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.session_pool() as db:
+            data['db'] = db
+            try:
+                result = await handler(event, data)
+                await db.commit()
+                return result
+            except Exception:
+                await db.rollback()
+                raise
@@ -0,0 +1,27 @@
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from bot.utils.rate_limiter import acquire_async
+
+
+class RateLimitRequestMiddleware(BaseRequestMiddleware):
+    """
+    Придерживает исходящие сообщения бота по общим с Celery лимитам Telegram.
+
+    Ограничиваются только методы, отправляющие сообщения (send*, forward*, copy*),
+    остальные вызовы (редактирование, ответы на callback) проходят сразу.
+    """
+
+    LIMITED_PREFIXES = ('send', 'forward', 'copy')
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> Response[TelegramType]:
+        if method.__api_method__.startswith(self.LIMITED_PREFIXES) and method.__api_method__ != 'sendChatAction':
+            await acquire_async(getattr(method, 'chat_id', None))
+        return await make_request(bot, method)
@@ -0,0 +1,34 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.database.identity import resolve_user, sync_user_names
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Передает в обработчик пользователя бота как `user` (UserIdentity или None).
+
+    Пользователь берется из кэша по Telegram ID, поэтому большинство апдейтов
+    обходится без запроса к БД. Если в Telegram изменились username или имя,
+    они сохраняются в БД. Регистрируется после DbSessionMiddleware.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user = data.get('event_from_user')
+        user = None
+
+        if from_user is not None:
+            db = data['db']
+            user = await resolve_user(db, from_user.id)
+            if user is not None:
+                user = await sync_user_names(db, user, from_user.username, from_user.full_name)
+
+        data['user'] = user
+        return await handler(event, data)
@@ -1,3 +1,4 @@
 from .post_states import PostCreation, AdminStates
+from .storage import create_fsm_storage
 
-__all__ = ['PostCreation', 'AdminStates']
+__all__ = ['PostCreation', 'AdminStates', 'create_fsm_storage']
@@ -0,0 +1,33 @@
+import json
+from functools import partial
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from bot.config import config
+
+# Компактная сериализация данных FSM: без пробелов и без \uXXXX-экранирования кириллицы
+compact_json_dumps = partial(json.dumps, ensure_ascii=False, separators=(',', ':'))
+
+
+def create_fsm_storage() -> BaseStorage:
+    """
+    Создание хранилища состояний FSM по настройке FSM_STORAGE
+
+    redis - состояния переживают рестарт и общие для всех реплик бота,
+    ключи разделены по боту (prefix:bot_id:chat:user), брошенные
+    состояния удаляются по TTL.
+    memory - для локальной разработки.
+    """
+    if config.FSM_STORAGE != 'redis':
+        return MemoryStorage()
+
+    from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+
+    return RedisStorage.from_url(
+        config.get_redis_url(config.FSM_REDIS_DB),
+        key_builder=DefaultKeyBuilder(prefix=config.FSM_KEY_PREFIX, with_bot_id=True),
+        state_ttl=config.FSM_STATE_TTL,
+        data_ttl=config.FSM_STATE_TTL,
+        json_dumps=compact_json_dumps,
+    )
@@ -1,4 +1,4 @@
 from .celery_app import celery_app
-from .publisher import check_and_publish
+from .publisher import publish_scheduled_post, publish_queue_slot
 
-__all__ = ['celery_app', 'check_and_publish']
+__all__ = ['celery_app', 'publish_scheduled_post', 'publish_queue_slot']
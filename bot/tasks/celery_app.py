@@ -1,12 +1,15 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
+
 from bot.config import config
+from bot.database.settings import start_settings_listener
 
 # Создание приложения Celery
 celery_app = Celery(
     'barter_bot',
     broker=config.get_redis_url(),
     backend=config.get_redis_url(),
-    include=['bot.tasks.publisher']
+    include=['bot.tasks.publisher', 'bot.tasks.stats', 'bot.tasks.reports']
 )
 
 # Конфигурация Celery
@@ -16,11 +19,19 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='Europe/Moscow',
     enable_utc=True,
-    # Запуск проверки каждую минуту
+    # Публикации ставит планировщик bot.tasks.scheduler (по индексу в Redis),
+    # периодический опрос БД не нужен
     beat_schedule={
-        'check-and-publish-every-minute': {
-            'task': 'bot.tasks.publisher.check_and_publish',
-            'schedule': 60.0,  # каждые 60 секунд
+        'refresh-daily-stats': {
+            'task': 'bot.tasks.stats.refresh_daily_stats',
+            'schedule': 900.0,  # каждые 15 минут
         },
     },
 )
+
+
+@worker_init.connect
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Подписка процесса воркера на сброс кэша настроек (solo/threads и prefork)"""
+    start_settings_listener()
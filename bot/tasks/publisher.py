@@ -1,50 +1,224 @@
+import re
 from datetime import datetime
 from celery import shared_task
 from sqlalchemy.orm import Session
 
 from bot.database import SessionLocal
-from bot.database.crud import get_posts_in_queue, get_scheduled_posts, update_post, recalculate_queue_positions, get_setting_value
+from bot.database.crud import (
+    get_post,
+    lock_first_post_in_queue,
+    lock_scheduled_post,
+    mark_post_published,
+    claim_publish_slot,
+    complete_publish_slot,
+    create_admin_log,
+)
+from bot.database.settings import get_settings_sync
+from bot.tasks.schedule import schedule_post
 from bot.utils.post_formatter import format_post_for_channel
 
+# Username публичного канала: буква, затем буквы, цифры и _ (5-32 символа)
+CHANNEL_USERNAME = re.compile(r'@?([A-Za-z]\w{4,31})$', re.ASCII)
 
-@shared_task(name='bot.tasks.publisher.check_and_publish')
-def check_and_publish():
+
+@shared_task(name='bot.tasks.publisher.publish_scheduled_post')
+def publish_scheduled_post(post_id: int):
     """
-    Задача Celery для проверки и публикации постов
-    Выполняется каждую минуту
+    Задача Celery для публикации приоритетного поста
+    Ставится планировщиком (bot.tasks.scheduler), когда наступает время поста
+
+    Строка поста заблокирована до отметки о публикации: вторая задача
+    для того же поста (сверка индекса, повторная постановка) его пропустит.
+    Неудачная отправка записывается в admin_logs ('publish_failed'), пост
+    остается 'scheduled' и будет отправлен снова после сверки индекса.
     """
     db = SessionLocal()
+    result = None
     try:
-        current_time = datetime.now()
-        current_time_str = current_time.strftime('%H:%M')
-
-        # 1. Проверка приоритетных постов
-        scheduled_posts = get_scheduled_posts(db)
-        for post in scheduled_posts:
-            if post.scheduled_time and post.scheduled_time <= current_time:
-                # Публикация приоритетного поста
-                publish_post_to_channel(db, post)
-
-        # 2. Проверка расписания для постов из очереди
-        schedule_times = get_setting_value(db, 'schedule_times', '10:00,13:00,16:00,19:00,22:00')
-        schedule_list = [time.strip() for time in schedule_times.split(',')]
-
-        if current_time_str in schedule_list:
-            # Время для публикации из очереди
-            queue_posts = get_posts_in_queue(db)
-            if queue_posts:
-                first_post = queue_posts[0]
-                publish_post_to_channel(db, first_post)
-                recalculate_queue_positions(db)
-
-        return f"Проверка завершена в {current_time_str}"
+        # БД - источник истины: пост могли удалить, опубликовать или перенести
+        post = lock_scheduled_post(db, post_id)
+        if not post or not post.scheduled_time:
+            return f"Пост {post_id} не ожидает публикации"
+
+        if post.scheduled_time > datetime.now():
+            db.rollback()
+            schedule_post(post_id, post.scheduled_time)
+            return f"Пост {post_id} перенесен на {post.scheduled_time}"
+
+        result = send_post_to_channel(db, post)
+        if not result:
+            db.rollback()
+            _record_failed_post(db, post_id, result)
+            return f"Пост {post_id} не отправлен"
+
+        mark_post_published(db, post, **_published_fields(db, result))
+        print(f"✅ Приоритетный пост {post_id} опубликован")
+        return f"Пост {post_id} обработан"
     except Exception as e:
-        print(f"Ошибка при проверке и публикации: {e}")
+        print(f"Ошибка при публикации поста {post_id}: {e}")
+        _finish_failed_post(db, post_id, result, e)
         return f"Ошибка: {e}"
     finally:
         db.close()
 
 
+def _finish_failed_post(db: Session, post_id: int, result, error: Exception):
+    """Записать результат приоритетного поста после исключения"""
+    try:
+        db.rollback()
+        if result:
+            # Сообщение уже в канале: пост отмечается опубликованным, а не отправляется повторно
+            mark_post_published(db, get_post(db, post_id), **_published_fields(db, result))
+        else:
+            _record_failed_post(db, post_id, result, error)
+    except Exception as e:
+        print(f"❌ Не удалось записать результат поста {post_id} "
+              f"(сообщение {result.message_id if result else None}): {e}")
+
+
+def _record_failed_post(db: Session, post_id: int, result, error: Exception = None):
+    """Записать неудачную отправку приоритетного поста в admin_logs"""
+    create_admin_log(db, None, 'publish_failed', {
+        'post_id': post_id,
+        'error_code': getattr(result, 'error_code', None),
+        'description': str(error) if error else getattr(result, 'description', None),
+    })
+
+
+@shared_task(name='bot.tasks.publisher.publish_queue_slot')
+def publish_queue_slot(slot: str):
+    """
+    Задача Celery для публикации первого поста из очереди
+    Ставится планировщиком в каждый слот из настройки schedule_times
+
+    Слот сначала занимается в журнале publish_slots, поэтому повторная
+    постановка того же слота (перезапуск планировщика, сверка индекса)
+    ничего не публикует. Если пост не отправлен (ошибка Telegram или БД),
+    слот помечается 'failed' и будет догнан планировщиком; слот упавшей
+    задачи можно занять снова через SLOT_CLAIM_TIMEOUT.
+
+    Строка поста заблокирована до отметки о публикации, а отметка поста
+    и слота делается одним commit, поэтому пост не уходит в канал дважды.
+
+    Args:
+        slot: Слот в формате YYYY-MM-DDTHH:MM
+    """
+    db = SessionLocal()
+    slot_id = None
+    post_id = None
+    result = None
+    try:
+        slot_id = claim_publish_slot(db, datetime.strptime(slot, '%Y-%m-%dT%H:%M'))
+        if slot_id is None:
+            return f"Слот {slot} уже обслужен"
+
+        first_post = lock_first_post_in_queue(db)
+        if not first_post:
+            complete_publish_slot(db, slot_id, 'empty')
+            return f"Слот {slot}: очередь пуста"
+        post_id = first_post.id
+
+        result = send_post_to_channel(db, first_post)
+        if not result:
+            db.rollback()
+            complete_publish_slot(db, slot_id, 'failed', post_id)
+            return f"Слот {slot}: пост {post_id} не отправлен"
+
+        mark_post_published(db, first_post, slot_id=slot_id, **_published_fields(db, result))
+        print(f"✅ Пост {post_id} опубликован в слот {slot}")
+        return f"Слот {slot} обработан"
+    except Exception as e:
+        print(f"Ошибка при публикации из очереди: {e}")
+        if slot_id is not None:
+            _finish_failed_slot(db, slot_id, post_id, result)
+        return f"Ошибка: {e}"
+    finally:
+        db.close()
+
+
+def _finish_failed_slot(db: Session, slot_id: int, post_id, result):
+    """Записать результат слота после исключения"""
+    try:
+        db.rollback()
+        if result:
+            # Сообщение уже в канале: пост отмечается опубликованным, а не отправляется повторно
+            post = get_post(db, post_id)
+            mark_post_published(db, post, slot_id=slot_id, **_published_fields(db, result))
+        else:
+            complete_publish_slot(db, slot_id, 'failed', post_id)
+    except Exception as e:
+        # Слот останется занятым и освободится через SLOT_CLAIM_TIMEOUT
+        print(f"❌ Не удалось записать результат слота {slot_id} (пост {post_id}, "
+              f"сообщение {result.message_id if result else None}): {e}")
+
+
+def _published_fields(db: Session, result) -> dict:
+    """Поля поста после отправки в канал"""
+    # Ссылка на пост доступна только для публичного канала: для приватного
+    # в channel_username сохранен числовой id чата (-100...)
+    match = CHANNEL_USERNAME.match(get_settings_sync(db).channel_username or '')
+    post_url = None
+    if match and result.message_id:
+        post_url = f"https://t.me/{match.group(1)}/{result.message_id}"
+
+    return {
+        'published_at': datetime.now(),
+        'channel_message_id': result.message_id,
+        'channel_post_url': post_url,
+    }
+
+
+def send_post_to_channel(db: Session, post):
+    """
+    Отправка поста в канал (без записи в БД)
+
+    Returns:
+        SendResult (False, если канал не настроен или Telegram вернул ошибку)
+    """
+    # Получение канала из настроек (кэш процесса)
+    channel_id = get_settings_sync(db).channel_id
+
+    if not channel_id:
+        print("Ошибка: ID канала не настроен")
+        return None
+
+    # Форматирование текста поста
+    post_data = {
+        'product_name': post.product_name,
+        'has_payment': post.has_payment,
+        'payment_amount': post.payment_amount,
+        'marketplace': post.marketplace,
+        'expected_date': post.expected_date,
+        'blog_theme': post.blog_theme,
+        'social_networks': post.social_networks,
+        'ad_formats': post.ad_formats,
+        'conditions': post.conditions,
+    }
+
+    text = format_post_for_channel(post_data)
+
+    # Отправка в Telegram канал
+    from bot.utils.telegram_sender import send_photo_sync, send_message_sync
+
+    if post.image_file_id:
+        result = send_photo_sync(
+            chat_id=channel_id,
+            photo=post.image_file_id,
+            caption=text,
+            parse_mode="HTML"
+        )
+    else:
+        result = send_message_sync(
+            chat_id=channel_id,
+            text=text,
+            parse_mode="HTML"
+        )
+
+    if not result:
+        print(f"❌ Не удалось опубликовать пост {post.id} в канал: {result.error_code} {result.description}")
+    return result
+
+
 def publish_post_to_channel(db: Session, post):
     """
     Публикация поста в канал
@@ -52,62 +226,22 @@ def publish_post_to_channel(db: Session, post):
     Args:
         db: Сессия базы данных
         post: Объект поста
+
+    Returns:
+        True если пост опубликован
     """
     try:
-        # Получение ID канала из настроек
-        channel_id = get_setting_value(db, 'channel_id')
-
-        if not channel_id:
-            print("Ошибка: ID канала не настроен")
-            return
-
-        # Форматирование текста поста
-        post_data = {
-            'product_name': post.product_name,
-            'has_payment': post.has_payment,
-            'payment_amount': post.payment_amount,
-            'marketplace': post.marketplace,
-            'expected_date': post.expected_date,
-            'blog_theme': post.blog_theme,
-            'social_networks': post.social_networks,
-            'ad_formats': post.ad_formats,
-            'conditions': post.conditions,
-        }
-
-        text = format_post_for_channel(post_data)
-
-        # Отправка в Telegram канал
-        from bot.utils.telegram_sender import send_photo_sync, send_message_sync
-
-        success = False
-        if post.image_file_id:
-            success = send_photo_sync(
-                chat_id=channel_id,
-                photo=post.image_file_id,
-                caption=text,
-                parse_mode="HTML"
-            )
-        else:
-            success = send_message_sync(
-                chat_id=channel_id,
-                text=text,
-                parse_mode="HTML"
-            )
-
-        if success:
-            # Обновление статуса поста
-            update_post(
-                db=db,
-                post=post,
-                status='published',
-                published_at=datetime.now()
-            )
-
-            print(f"✅ Пост {post.id} опубликован в канал {channel_id}")
-
-            # TODO: Отправка уведомления пользователю о публикации
-        else:
-            print(f"❌ Не удалось опубликовать пост {post.id} в канал")
+        result = send_post_to_channel(db, post)
+        if not result:
+            return False
+
+        # Обновление статуса поста
+        mark_post_published(db, post, **_published_fields(db, result))
+        print(f"✅ Пост {post.id} опубликован в канал")
+
+        # TODO: Отправка уведомления пользователю о публикации
+        return True
 
     except Exception as e:
         print(f"❌ Ошибка при публикации поста {post.id}: {e}")
+        return False
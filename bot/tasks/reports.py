@@ -0,0 +1,107 @@
+"""
+Фоновое формирование отчетов для администратора
+
+Состояние задания хранится в Redis (hash report:stats:<период>):
+    status   - queued / running / done / failed
+    rows     - сколько постов уже записано
+    file_id  - file_id готового документа в Telegram
+    error    - текст ошибки
+
+Готовый отчет в течение REPORT_CACHE_TTL секунд отправляется повторно
+по file_id, без нового запроса к БД и загрузки файла.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from celery import shared_task
+
+from bot.config import config
+from bot.database import SessionLocal
+from bot.utils.redis_client import get_redis, get_async_redis
+from bot.utils.reports import build_stats_report, report_filename
+from bot.utils.telegram_sender import send_document_sync, send_message_sync
+
+REPORT_KEY_PREFIX = 'report:stats'
+
+# Сколько живет состояние незавершенного задания (на случай падения воркера)
+REPORT_JOB_TTL = 3600
+
+REPORT_CAPTION = "📊 Экспорт статистики бота"
+
+
+def report_key(period: str) -> str:
+    return f"{REPORT_KEY_PREFIX}:{period}"
+
+
+async def get_report_job_async(period: str) -> Dict[str, str]:
+    """Состояние задания отчета за период (пустой словарь, если заданий не было)"""
+    return await get_async_redis().hgetall(report_key(period))
+
+
+async def enqueue_report_async(period: str, chat_id: int) -> bool:
+    """
+    Поставить формирование отчета в очередь Celery
+
+    Returns:
+        False, если отчет за этот период уже формируется
+    """
+    key = report_key(period)
+    r = get_async_redis()
+
+    # Атомарно занимаем задание: второй запрос не поставит дубль
+    if not await r.hsetnx(key, 'status', 'queued'):
+        job = await r.hgetall(key)
+        if job.get('status') in ('queued', 'running'):
+            return False
+        await r.delete(key)
+        if not await r.hsetnx(key, 'status', 'queued'):
+            return False
+
+    await r.expire(key, REPORT_JOB_TTL)
+    export_stats_report.delay(period, chat_id)
+    return True
+
+
+def _period_start(period: str) -> Optional[datetime]:
+    return None if period == 'all' else datetime.now() - timedelta(days=int(period))
+
+
+@shared_task(name='bot.tasks.reports.export_stats_report')
+def export_stats_report(period: str, chat_id: int):
+    """
+    Задача Celery: сформировать отчет за период и отправить его администратору
+
+    Args:
+        period: Количество дней или 'all'
+        chat_id: Кому отправить документ
+    """
+    key = report_key(period)
+    r = get_redis()
+    r.hset(key, mapping={'status': 'running', 'rows': 0, 'started_at': int(time.time())})
+
+    since = _period_start(period)
+    db = SessionLocal()
+    path = None
+    try:
+        path = build_stats_report(db, since=since, progress=lambda rows: r.hset(key, 'rows', rows))
+
+        result = send_document_sync(chat_id, path, filename=report_filename(since), caption=REPORT_CAPTION)
+        if not result:
+            raise RuntimeError(result.description or 'не удалось отправить документ')
+
+        r.hset(key, mapping={'status': 'done', 'file_id': result.file_id or ''})
+        r.expire(key, config.REPORT_CACHE_TTL)
+        return f"Отчет {period} отправлен"
+
+    except Exception as e:
+        r.hset(key, mapping={'status': 'failed', 'error': str(e)})
+        r.expire(key, REPORT_JOB_TTL)
+        send_message_sync(chat_id, f"❌ Ошибка при формировании отчета: {e}")
+        return f"Ошибка: {e}"
+    finally:
+        db.close()
+        if path:
+            os.remove(path)
@@ -0,0 +1,214 @@
+"""
+Индекс публикаций в Redis: sorted set, где score - время публикации (timestamp)
+
+Элементы:
+    post:<id>                - приоритетный пост с точным временем
+    slot:<YYYY-MM-DDTHH:MM>  - слот публикации из очереди
+
+Источник истины - база данных: индекс можно в любой момент пересобрать
+через reconcile(), а задачи публикации перепроверяют пост в БД.
+Обслуженные слоты записываются в журнал publish_slots: пропущенные
+(при простое воркера или планировщика) слоты догоняются с интервалом
+SLOT_CATCHUP_INTERVAL, а каждый слот публикуется не более одного раза.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from bot.config import config
+from bot.database.crud import get_scheduled_post_times, get_first_publish_slot_time, get_publish_slot_times
+from bot.database.settings import get_settings_sync
+from bot.utils.redis_client import get_redis, get_async_redis
+
+PUBLISH_SCHEDULE_KEY = 'publish:schedule'
+PUBLISH_WAKEUP_KEY = 'publish:wakeup'
+
+RECONCILE_SIGNAL = 'reconcile'
+
+# Атомарно забрать все наступившие элементы (безопасно при нескольких планировщиках)
+_POP_DUE_SCRIPT = """
+local items = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #items > 0 then
+    redis.call('ZREM', KEYS[1], unpack(items))
+end
+return items
+"""
+
+
+def post_member(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+def slot_member(slot_time: datetime) -> str:
+    return f"slot:{slot_time.strftime('%Y-%m-%dT%H:%M')}"
+
+
+def parse_member(member: str) -> Tuple[str, str]:
+    """Разобрать элемент индекса на (тип, значение)"""
+    kind, _, value = member.partition(':')
+    return kind, value
+
+
+def next_slot_occurrences(schedule_times: List[str], now: datetime) -> List[datetime]:
+    """Ближайшее будущее наступление каждого слота расписания"""
+    occurrences = []
+    for time_str in schedule_times:
+        hour, minute = (int(part) for part in time_str.split(':'))
+        slot_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if slot_time <= now:
+            slot_time += timedelta(days=1)
+        occurrences.append(slot_time)
+    return occurrences
+
+
+def slot_occurrences_between(schedule_times: List[str], start: datetime, end: datetime) -> List[datetime]:
+    """Все наступления слотов расписания в промежутке [start, end] по порядку"""
+    occurrences = []
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day <= end:
+        for time_str in schedule_times:
+            hour, minute = (int(part) for part in time_str.split(':'))
+            slot_time = day.replace(hour=hour, minute=minute)
+            if start <= slot_time <= end:
+                occurrences.append(slot_time)
+        day += timedelta(days=1)
+    return sorted(occurrences)
+
+
+def find_missed_slots(db, schedule_times: List[str], since: Optional[datetime], now: datetime) -> List[datetime]:
+    """
+    Слоты, которые должны были пройти, но не записаны в журнал
+
+    Args:
+        since: Нижняя граница (например, время изменения расписания)
+    """
+    first_slot_time = get_first_publish_slot_time(db)
+    if first_slot_time is None:
+        # Журнал пуст (первый запуск) - догонять нечего
+        return []
+
+    start = max(now - timedelta(hours=config.SLOT_CATCHUP_WINDOW), first_slot_time)
+    if since:
+        start = max(start, since)
+
+    served = get_publish_slot_times(db, start)
+    return [slot_time for slot_time in slot_occurrences_between(schedule_times, start, now)
+            if slot_time not in served]
+
+
+# === ЗАПИСЬ В ИНДЕКС ===
+
+def _add_commands(pipe, member: str, when: datetime):
+    pipe.zadd(PUBLISH_SCHEDULE_KEY, {member: when.timestamp()})
+    _wakeup_commands(pipe, member)
+
+
+def _wakeup_commands(pipe, message: str):
+    pipe.lpush(PUBLISH_WAKEUP_KEY, message)
+    pipe.ltrim(PUBLISH_WAKEUP_KEY, 0, 99)
+
+
+def schedule_post(post_id: int, when: datetime):
+    """Добавить (или перенести) приоритетный пост в индексе"""
+    with get_redis().pipeline() as pipe:
+        _add_commands(pipe, post_member(post_id), when)
+        pipe.execute()
+
+
+async def schedule_post_async(post_id: int, when: datetime):
+    """Добавить (или перенести) приоритетный пост в индексе (из обработчиков бота)"""
+    async with get_async_redis().pipeline() as pipe:
+        _add_commands(pipe, post_member(post_id), when)
+        await pipe.execute()
+
+
+def unschedule_post(post_id: int):
+    """Убрать пост из индекса"""
+    get_redis().zrem(PUBLISH_SCHEDULE_KEY, post_member(post_id))
+
+
+async def unschedule_post_async(post_id: int):
+    """Убрать пост из индекса (из обработчиков бота)"""
+    await get_async_redis().zrem(PUBLISH_SCHEDULE_KEY, post_member(post_id))
+
+
+def schedule_slot(slot_time: datetime):
+    """Добавить слот публикации из очереди"""
+    with get_redis().pipeline() as pipe:
+        _add_commands(pipe, slot_member(slot_time), slot_time)
+        pipe.execute()
+
+
+async def request_reconcile_async():
+    """Попросить планировщик пересобрать индекс (например, после смены расписания)"""
+    async with get_async_redis().pipeline() as pipe:
+        _wakeup_commands(pipe, RECONCILE_SIGNAL)
+        await pipe.execute()
+
+
+# === ЧТЕНИЕ ИНДЕКСА ===
+
+def pop_due(now: datetime, limit: int = 100) -> List[str]:
+    """Атомарно забрать элементы, время которых наступило"""
+    return get_redis().eval(_POP_DUE_SCRIPT, 1, PUBLISH_SCHEDULE_KEY, now.timestamp(), limit)
+
+
+def next_due_at() -> Optional[datetime]:
+    """Время ближайшего элемента индекса"""
+    head = get_redis().zrange(PUBLISH_SCHEDULE_KEY, 0, 0, withscores=True)
+    if not head:
+        return None
+    return datetime.fromtimestamp(head[0][1])
+
+
+def wait_for_wakeup(timeout: float) -> Optional[str]:
+    """Ждать сигнала о новом элементе не дольше timeout секунд"""
+    item = get_redis().blpop(PUBLISH_WAKEUP_KEY, timeout=timeout)
+    return item[1] if item else None
+
+
+# === СВЕРКА С БД ===
+
+def reconcile(db, now: Optional[datetime] = None) -> int:
+    """
+    Пересобрать индекс по данным БД
+
+    Приоритетные посты, ближайшие слоты очереди и пропущенные слоты
+    добавляются, элементы, которых больше нет в БД/расписании, удаляются.
+    Пропущенные слоты ставятся с интервалом SLOT_CATCHUP_INTERVAL,
+    уже стоящие в индексе сохраняют свое время.
+
+    Returns:
+        Количество элементов в индексе
+    """
+    now = now or datetime.now()
+    r = get_redis()
+
+    desired = {post_member(post_id): scheduled_time.timestamp()
+               for post_id, scheduled_time in get_scheduled_post_times(db)
+               if scheduled_time}
+
+    # Сверка идет сразу после смены расписания - кэш процесса может отставать
+    settings = get_settings_sync(db, fresh=True)
+    schedule_times = list(settings.schedule_times)
+    for slot_time in next_slot_occurrences(schedule_times, now):
+        desired[slot_member(slot_time)] = slot_time.timestamp()
+
+    current = dict(r.zrange(PUBLISH_SCHEDULE_KEY, 0, -1, withscores=True))
+
+    catchup_at = now.timestamp()
+    for slot_time in find_missed_slots(db, schedule_times, settings.updated_at.get('schedule_times'), now):
+        member = slot_member(slot_time)
+        desired[member] = current.get(member, catchup_at)
+        catchup_at = max(catchup_at, desired[member]) + config.SLOT_CATCHUP_INTERVAL
+
+    stale = set(current) - set(desired)
+
+    with r.pipeline() as pipe:
+        if stale:
+            pipe.zrem(PUBLISH_SCHEDULE_KEY, *stale)
+        if desired:
+            pipe.zadd(PUBLISH_SCHEDULE_KEY, desired)
+        pipe.execute()
+
+    return len(desired)
@@ -0,0 +1,113 @@
+"""
+Планировщик публикаций
+
+Спит до ближайшего элемента в индексе публикаций (Redis sorted set),
+забирает только наступившие элементы и ставит задачи публикации в Celery.
+Сам планировщик не обращается к БД, кроме сверки индекса при старте
+и раз в SCHEDULER_RECONCILE_INTERVAL секунд.
+
+Запуск: python -m bot.tasks.scheduler
+"""
+
+import logging
+import signal
+import time
+from datetime import datetime, timedelta
+
+from bot.config import config
+from bot.database import SessionLocal
+from bot.tasks.publisher import publish_scheduled_post, publish_queue_slot
+from bot.tasks.schedule import (
+    RECONCILE_SIGNAL,
+    pop_due,
+    next_due_at,
+    wait_for_wakeup,
+    reconcile,
+    parse_member,
+    schedule_slot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Максимальное время сна между проверками (сек.), ограничивает и время реакции на остановку
+MAX_SLEEP = 5.0
+
+
+def run_reconcile():
+    """Сверка индекса с БД"""
+    db = SessionLocal()
+    try:
+        count = reconcile(db)
+        logger.info(f"Индекс публикаций сверен с БД: {count} элементов")
+    except Exception as e:
+        logger.error(f"Ошибка при сверке индекса публикаций: {e}")
+    finally:
+        db.close()
+
+
+def dispatch(member: str):
+    """Поставить задачу публикации для элемента индекса"""
+    kind, value = parse_member(member)
+
+    if kind == 'post':
+        publish_scheduled_post.delay(int(value))
+    elif kind == 'slot':
+        publish_queue_slot.delay(value)
+        # Тот же слот на следующий день (для догоняющих слотов он может
+        # быть уже в прошлом - тогда его учтет сверка)
+        next_slot_time = datetime.strptime(value, '%Y-%m-%dT%H:%M') + timedelta(days=1)
+        if next_slot_time > datetime.now():
+            schedule_slot(next_slot_time)
+    else:
+        logger.warning(f"Неизвестный элемент индекса публикаций: {member}")
+        return
+
+    logger.info(f"Поставлена публикация {member}")
+
+
+def run_forever():
+    """Основной цикл планировщика"""
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    run_reconcile()
+    last_reconcile = time.monotonic()
+
+    while not stopping:
+        for member in pop_due(datetime.now()):
+            try:
+                dispatch(member)
+            except Exception as e:
+                logger.error(f"Ошибка при постановке публикации {member}: {e}")
+
+        if time.monotonic() - last_reconcile >= config.SCHEDULER_RECONCILE_INTERVAL:
+            run_reconcile()
+            last_reconcile = time.monotonic()
+
+        next_due = next_due_at()
+        timeout = MAX_SLEEP
+        if next_due:
+            timeout = min(MAX_SLEEP, max((next_due - datetime.now()).total_seconds(), 0))
+
+        if timeout > 0:
+            # Просыпаемся раньше, если добавлен более ранний элемент
+            message = wait_for_wakeup(timeout)
+            if message == RECONCILE_SIGNAL:
+                run_reconcile()
+                last_reconcile = time.monotonic()
+
+    logger.info("Планировщик публикаций остановлен")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO if not config.DEBUG else logging.DEBUG,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    run_forever()
@@ -0,0 +1,159 @@
+"""
+Дневная сводка статистики (таблица daily_stats)
+
+Периодическая задача пересчитывает последние дни, команда backfill
+заполняет историю:
+
+    python -m bot.tasks.stats backfill [--since YYYY-MM-DD]
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from celery import shared_task
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from bot.database import SessionLocal
+from bot.database.models import User, Post, Payment, DailyStat
+from bot.database.stats import PAID_STATUS
+
+# Сколько последних дней пересчитывать (вчера догоняет поздние изменения)
+REFRESH_DAYS = 2
+
+# Размер порции при заполнении истории, дней
+BACKFILL_CHUNK_DAYS = 31
+
+
+def _by_day(db: Session, column, start: date, end: date, *columns, where=()):
+    """Агрегаты по дням (date_trunc) для строк, где start <= column < end"""
+    day = func.date_trunc('day', column).label('day')
+    rows = db.execute(
+        select(day, *columns)
+        .where(column >= start, column < end, *where)
+        .group_by(day)
+    ).all()
+    return {row.day.date(): row for row in rows}
+
+
+def refresh_range(db: Session, start: date, end: date) -> int:
+    """
+    Пересчитать сводку за дни [start, end)
+
+    Returns:
+        Количество записанных дней
+    """
+    users = _by_day(db, User.created_at, start, end, func.count().label('count'))
+    published = _by_day(
+        db, Post.published_at, start, end, func.count().label('count'),
+        where=(Post.status == 'published',)
+    )
+    payments = _by_day(
+        db, Payment.created_at, start, end,
+        func.count().label('count'), func.sum(Payment.amount).label('revenue'),
+        where=(Payment.status == PAID_STATUS,)
+    )
+
+    posts_day = func.date_trunc('day', Post.created_at).label('day')
+    posts_by_status = {}
+    for row in db.execute(
+        select(posts_day, Post.status, func.count().label('count'))
+        .where(Post.created_at >= start, Post.created_at < end)
+        .group_by(posts_day, Post.status)
+    ):
+        posts_by_status.setdefault(row.day.date(), {})[row.status] = row.count
+
+    values = []
+    day = start
+    while day < end:
+        day_posts = posts_by_status.get(day, {})
+        day_payments = payments.get(day)
+        values.append({
+            'day': day,
+            'new_users': users[day].count if day in users else 0,
+            'new_posts': sum(day_posts.values()),
+            'posts_by_status': day_posts,
+            'published_posts': published[day].count if day in published else 0,
+            'payments': day_payments.count if day_payments else 0,
+            'revenue': day_payments.revenue if day_payments else 0,
+            'updated_at': datetime.now(),
+        })
+        day += timedelta(days=1)
+
+    if not values:
+        return 0
+
+    stmt = insert(DailyStat).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStat.day],
+        set_={column: stmt.excluded[column] for column in values[0] if column != 'day'}
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(values)
+
+
+@shared_task(name='bot.tasks.stats.refresh_daily_stats')
+def refresh_daily_stats():
+    """
+    Задача Celery для обновления сводки за последние REFRESH_DAYS дней
+    Выполняется периодически (celery beat)
+    """
+    db = SessionLocal()
+    try:
+        today = date.today()
+        count = refresh_range(db, today - timedelta(days=REFRESH_DAYS - 1), today + timedelta(days=1))
+        return f"Сводка обновлена: {count} дн."
+    except Exception as e:
+        print(f"Ошибка при обновлении сводки статистики: {e}")
+        return f"Ошибка: {e}"
+    finally:
+        db.close()
+
+
+@shared_task(name='bot.tasks.stats.backfill_daily_stats')
+def backfill_daily_stats(since: Optional[str] = None):
+    """
+    Задача Celery для заполнения сводки за всю историю
+
+    Args:
+        since: Дата начала YYYY-MM-DD (по умолчанию - самая ранняя запись)
+    """
+    db = SessionLocal()
+    try:
+        if since:
+            start = date.fromisoformat(since)
+        else:
+            first = db.execute(select(
+                func.least(
+                    select(func.min(User.created_at)).scalar_subquery(),
+                    select(func.min(Post.created_at)).scalar_subquery(),
+                    select(func.min(Payment.created_at)).scalar_subquery(),
+                )
+            )).scalar()
+            start = first.date() if first else date.today()
+
+        end = date.today() + timedelta(days=1)
+        total = 0
+        while start < end:
+            chunk_end = min(start + timedelta(days=BACKFILL_CHUNK_DAYS), end)
+            total += refresh_range(db, start, chunk_end)
+            start = chunk_end
+
+        return f"Сводка заполнена: {total} дн."
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Дневная сводка статистики')
+    parser.add_argument('command', choices=['backfill', 'refresh'])
+    parser.add_argument('--since', help='Дата начала для backfill (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        print(backfill_daily_stats(args.since))
+    else:
+        print(refresh_daily_stats())
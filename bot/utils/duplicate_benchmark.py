@@ -0,0 +1,100 @@
+"""
+Сравнение пакетной оценки дубликатов с попарным циклом
+
+    python -m bot.utils.duplicate_benchmark --candidates 100000
+
+Кандидаты генерируются случайно; результат пакетной оценки сверяется
+с попарным сравнением (check_text_similarity для каждого кандидата).
+"""
+
+import argparse
+import random
+import time
+
+from .duplicate_checker import CandidateBatch, check_text_similarity, check_duplicate, rank_duplicates
+
+WORDS = [
+    'крем', 'сыворотка', 'шампунь', 'маска', 'для', 'лица', 'волос', 'тела', 'детский',
+    'набор', 'увлажняющий', 'коврик', 'йоги', 'кружка', 'термос', 'рюкзак', 'чехол',
+    'iphone', 'наушники', 'беспроводные', 'игрушка', 'мягкая', 'плед', 'свеча', 'ароматическая',
+]
+MARKETPLACES = ['Wildberries', 'Ozon', 'Другой маркетплейс', None]
+THEMES = [
+    'Все тематики с женской ЦА', 'Все тематики с мужской ЦА', 'Детская тематика',
+    'Любая тематика', 'Бьюти и уход', None,
+]
+
+
+def _random_post(rng: random.Random) -> dict:
+    return {
+        'product_name': ' '.join(rng.choices(WORDS, k=rng.randint(2, 5))),
+        'marketplace': rng.choice(MARKETPLACES),
+        'blog_theme': rng.choice(THEMES),
+    }
+
+
+def check_duplicate_pairwise(post_data: dict, existing_posts: list, threshold: float = 80.0):
+    """Прежняя реализация check_duplicate: попарное сравнение в цикле"""
+    max_similarity = 0.0
+    most_similar_post = None
+
+    for existing_post in existing_posts:
+        similarities = []
+        if post_data.get('product_name') and existing_post.get('product_name'):
+            similarities.append(check_text_similarity(post_data['product_name'], existing_post['product_name']))
+        if post_data.get('marketplace') and existing_post.get('marketplace'):
+            similarities.append(100.0 if post_data['marketplace'] == existing_post['marketplace'] else 0.0)
+        if post_data.get('blog_theme') and existing_post.get('blog_theme'):
+            similarities.append(check_text_similarity(post_data['blog_theme'], existing_post['blog_theme']))
+
+        if similarities:
+            avg_similarity = sum(similarities) / len(similarities)
+            if avg_similarity > max_similarity:
+                max_similarity = avg_similarity
+                most_similar_post = existing_post
+
+    return max_similarity >= threshold, most_similar_post, max_similarity
+
+
+def _timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run(candidates: int, checks: int, seed: int = 1):
+    rng = random.Random(seed)
+    existing = [_random_post(rng) for _ in range(candidates)]
+
+    batch, prepare_time = _timed(CandidateBatch, existing)
+
+    loop_time = batch_time = cutoff_time = 0.0
+    for _ in range(checks):
+        post = _random_post(rng)
+
+        expected, elapsed = _timed(check_duplicate_pairwise, post, existing)
+        loop_time += elapsed
+        result, elapsed = _timed(check_duplicate, post, existing)
+        batch_time += elapsed
+        _, elapsed = _timed(rank_duplicates, post, batch, threshold=80.0, top_k=5)
+        cutoff_time += elapsed
+
+        assert result[0] == expected[0] and result[1] is expected[1], (post, result, expected)
+        assert abs(result[2] - expected[2]) < 1e-6, (post, result, expected)
+
+    rate = lambda seconds: candidates * checks / seconds
+    print(f"Кандидатов: {candidates}, проверок: {checks}")
+    print(f"Попарный цикл:         {loop_time / checks * 1000:8.1f} мс/проверка, {rate(loop_time):12,.0f} пар/с")
+    print(f"check_duplicate:       {batch_time / checks * 1000:8.1f} мс/проверка, {rate(batch_time):12,.0f} пар/с"
+          f"  (x{loop_time / batch_time:.1f})")
+    print(f"Подготовка CandidateBatch: {prepare_time * 1000:.1f} мс (один раз)")
+    print(f"rank_duplicates (80%): {cutoff_time / checks * 1000:8.1f} мс/проверка, {rate(cutoff_time):12,.0f} пар/с"
+          f"  (x{loop_time / cutoff_time:.1f})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Скорость проверки дубликатов')
+    parser.add_argument('--candidates', type=int, default=100000)
+    parser.add_argument('--checks', type=int, default=5)
+    args = parser.parse_args()
+    run(args.candidates, args.checks)
@@ -1,5 +1,7 @@
-from typing import Optional, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 from Levenshtein import ratio
+from rapidfuzz import fuzz, process, utils
+import numpy as np
 import imagehash
 from PIL import Image
 from io import BytesIO
@@ -23,6 +25,41 @@ def check_text_similarity(text1: str, text2: str) -> float:
     return similarity * 100
 
 
+IMAGE_HASH_BITS = 64
+_HASH_MASK = (1 << IMAGE_HASH_BITS) - 1
+
+
+def hash_image(image: Image.Image) -> int:
+    """
+    Perceptual hash открытого изображения (average hash, 64 бита)
+
+    Returns:
+        Хэш как целое со знаком (так он хранится в BIGINT)
+    """
+    value = int(str(imagehash.average_hash(image)), 16)
+    return value - (1 << IMAGE_HASH_BITS) if value >> (IMAGE_HASH_BITS - 1) else value
+
+
+def compute_image_hash(image_bytes: bytes) -> int:
+    """
+    Perceptual hash изображения по его байтам (см. hash_image)
+
+    Raises:
+        Exception: Если изображение не удалось открыть
+    """
+    return hash_image(Image.open(BytesIO(image_bytes)))
+
+
+def hash_distance(hash1: int, hash2: int) -> int:
+    """Расстояние Хэмминга между хэшами изображений (0-64)"""
+    return ((hash1 ^ hash2) & _HASH_MASK).bit_count()
+
+
+def hash_similarity(hash1: int, hash2: int) -> float:
+    """Процент схожести изображений по хэшам (0-100)"""
+    return (1 - hash_distance(hash1, hash2) / IMAGE_HASH_BITS) * 100
+
+
 def check_image_similarity(image1_bytes: bytes, image2_bytes: bytes) -> float:
     """
     Проверка схожести изображений с использованием perceptual hash
@@ -35,23 +72,137 @@ def check_image_similarity(image1_bytes: bytes, image2_bytes: bytes) -> float:
         Процент схожести (0-100)
     """
     try:
-        img1 = Image.open(BytesIO(image1_bytes))
-        img2 = Image.open(BytesIO(image2_bytes))
-
-        hash1 = imagehash.average_hash(img1)
-        hash2 = imagehash.average_hash(img2)
-
-        # Hamming distance (чем меньше - тем больше схожесть)
-        distance = hash1 - hash2
-
-        # Преобразуем в процент схожести (максимальная дистанция = 64 для average_hash)
-        similarity = (1 - (distance / 64)) * 100
-        return max(0, similarity)
+        return hash_similarity(compute_image_hash(image1_bytes), compute_image_hash(image2_bytes))
     except Exception as e:
         print(f"Ошибка при проверке схожести изображений: {e}")
         return 0.0
 
 
+class _Column:
+    """Значения одного поля кандидатов: уникальные значения и индекс в них для каждого кандидата"""
+
+    def __init__(self, values: Iterable[Optional[str]], lower: bool):
+        index = {'': 0}
+        codes = [index.setdefault(value or '', len(index)) for value in values]
+        self.codes = np.array(codes, dtype=np.intp)
+        self.present = self.codes != 0
+        self.values = [value.lower() if lower else value for value in index]
+        self._index = index
+
+    def code(self, value: str) -> int:
+        """Индекс значения (-1, если у кандидатов такого нет)"""
+        return self._index.get(value, -1)
+
+
+class CandidateBatch:
+    """
+    Кандидаты, подготовленные к пакетной оценке
+
+    Строки приводятся к нижнему регистру один раз, одинаковые значения
+    (тематики, маркетплейсы, повторные названия) сравниваются один раз.
+    Подготовленный набор можно переиспользовать для нескольких проверок.
+    """
+
+    def __init__(self, candidates: Sequence[dict]):
+        self.candidates = candidates
+        self.product_name = _Column((c.get('product_name') for c in candidates), lower=True)
+        self.blog_theme = _Column((c.get('blog_theme') for c in candidates), lower=True)
+        self.marketplace = _Column((c.get('marketplace') for c in candidates), lower=False)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+
+def score_candidates(
+    post_data: dict,
+    candidates: Union[Sequence[dict], CandidateBatch],
+    threshold: float = 0.0,
+    reordered: bool = False
+) -> np.ndarray:
+    """
+    Схожесть нового поста с каждым кандидатом (0-100), одним вызовом
+
+    Оценка та же, что у попарного сравнения: среднее схожести названия,
+    совпадения маркетплейса (100 или 0) и схожести тематики по полям,
+    заполненным у обоих постов. Тексты сравниваются rapidfuzz.process.cdist
+    (тот же ratio, что у Levenshtein), маркетплейс - маской NumPy.
+
+    Args:
+        post_data: Данные нового поста
+        candidates: Существующие посты (словари с теми же ключами) или CandidateBatch
+        threshold: Порог, %; названия, при схожести которых порог
+            недостижим, не досчитываются (их оценка ниже threshold)
+        reordered: Сравнивать названия без учета порядка слов, регистра
+            и знаков (эмодзи, пунктуации) - token_sort_ratio вместо ratio
+
+    Returns:
+        Массив оценок в порядке candidates
+    """
+    batch = candidates if isinstance(candidates, CandidateBatch) else CandidateBatch(candidates)
+    size = len(batch)
+    total = np.zeros(size, dtype=np.float64)
+    count = np.zeros(size, dtype=np.int8)
+
+    marketplace = post_data.get('marketplace')
+    if marketplace:
+        column = batch.marketplace
+        total += np.where(column.codes == column.code(marketplace), 100.0, 0.0)
+        count += column.present
+
+    # Если прочие поля совпадут полностью, название должно набрать не меньше
+    # threshold * (k + 1) - 100 * k, где k - число прочих полей нового поста
+    others = sum(1 for field in ('marketplace', 'blog_theme') if post_data.get(field))
+    name_cutoff = max(threshold * (others + 1) - 100.0 * others, 0.0)
+
+    name_scorer, name_processor = (fuzz.token_sort_ratio, utils.default_process) if reordered else (fuzz.ratio, None)
+
+    for field, column, cutoff, scorer, processor in (
+        ('product_name', batch.product_name, name_cutoff, name_scorer, name_processor),
+        ('blog_theme', batch.blog_theme, 0.0, fuzz.ratio, None),
+    ):
+        text = post_data.get(field)
+        if not text:
+            continue
+        scores = process.cdist(
+            [text.lower()], column.values,
+            scorer=scorer, processor=processor, score_cutoff=cutoff or None, dtype=np.float64
+        )[0]
+        total += np.where(column.present, scores[column.codes], 0.0)
+        count += column.present
+
+    return np.divide(total, count, out=np.zeros(size, dtype=np.float64), where=count > 0)
+
+
+def rank_duplicates(
+    post_data: dict,
+    candidates: Union[Sequence[dict], CandidateBatch],
+    threshold: float = 0.0,
+    top_k: int = 5
+) -> List[Tuple[dict, float]]:
+    """
+    Самые похожие на новый пост кандидаты
+
+    Args:
+        threshold: Минимальная схожесть, %
+        top_k: Сколько кандидатов вернуть
+
+    Returns:
+        Список (пост, схожесть) по убыванию схожести (при равной - в порядке candidates)
+    """
+    batch = candidates if isinstance(candidates, CandidateBatch) else CandidateBatch(candidates)
+    if not len(batch):
+        return []
+
+    scores = score_candidates(post_data, batch, threshold)
+    matched = np.flatnonzero((scores >= threshold) & (scores > 0))
+    if len(matched) > top_k:
+        # Оставляем k лучших вместе с равными k-му, чтобы при равенстве победил первый
+        kth = np.partition(scores[matched], len(matched) - top_k)[len(matched) - top_k]
+        matched = matched[scores[matched] >= kth]
+    matched = matched[np.lexsort((matched, -scores[matched]))][:top_k]
+    return [(batch.candidates[i], float(scores[i])) for i in matched]
+
+
 def check_duplicate(post_data: dict, existing_posts: list, threshold: float = 80.0) -> Tuple[bool, Optional[dict], float]:
     """
     Проверка на дубликаты постов
@@ -64,42 +215,9 @@ def check_duplicate(post_data: dict, existing_posts: list, threshold: float = 80
     Returns:
         Tuple (is_duplicate, similar_post, similarity_score)
     """
-    max_similarity = 0.0
-    most_similar_post = None
-
-    for existing_post in existing_posts:
-        similarities = []
-
-        # Проверка схожести названия
-        if post_data.get('product_name') and existing_post.get('product_name'):
-            name_similarity = check_text_similarity(
-                post_data['product_name'],
-                existing_post['product_name']
-            )
-            similarities.append(name_similarity)
-
-        # Проверка схожести маркетплейса
-        if post_data.get('marketplace') and existing_post.get('marketplace'):
-            if post_data['marketplace'] == existing_post['marketplace']:
-                similarities.append(100.0)
-            else:
-                similarities.append(0.0)
-
-        # Проверка схожести тематики
-        if post_data.get('blog_theme') and existing_post.get('blog_theme'):
-            theme_similarity = check_text_similarity(
-                post_data['blog_theme'],
-                existing_post['blog_theme']
-            )
-            similarities.append(theme_similarity)
-
-        # Средняя схожесть
-        if similarities:
-            avg_similarity = sum(similarities) / len(similarities)
-
-            if avg_similarity > max_similarity:
-                max_similarity = avg_similarity
-                most_similar_post = existing_post
-
-    is_duplicate = max_similarity >= threshold
-    return is_duplicate, most_similar_post, max_similarity
+    matches = rank_duplicates(post_data, existing_posts, top_k=1)
+    if not matches:
+        return False, None, 0.0
+
+    most_similar_post, max_similarity = matches[0]
+    return max_similarity >= threshold, most_similar_post, max_similarity
@@ -0,0 +1,170 @@
+"""
+Анализ изображений в пуле процессов
+
+Открытие фото в PIL и вычисление хэша нагружают процессор: в обработчике
+aiogram это останавливало бы event loop для всех пользователей. Поэтому
+анализ выполняется в ProcessPoolExecutor из IMAGE_WORKERS процессов:
+
+    info = await analyze_image_async(image_bytes)
+    if info:
+        info.image_hash, info.width, info.height, info.format
+
+Очередь ограничена: если в пуле уже IMAGE_QUEUE_SIZE задач, новая сразу
+отклоняется, а не ждет. Ожидание результата ограничено IMAGE_TIMEOUT
+секундами. В обоих случаях, как и при ошибке, возвращается None -
+проверка фото не должна мешать созданию поста.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+from bot.config import config
+from .duplicate_checker import hash_image
+from .metrics import IMAGE_ANALYSIS_SECONDS, IMAGE_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Результат анализа изображения"""
+    image_hash: int  # aHash, 64 бита со знаком (как posts.image_hash)
+    width: int
+    height: int
+    format: Optional[str]  # 'JPEG', 'PNG', ...
+
+
+def analyze_image(image_bytes: bytes) -> ImageInfo:
+    """Анализ изображения (выполняется в процессе пула)"""
+    with Image.open(BytesIO(image_bytes)) as image:
+        return ImageInfo(
+            image_hash=hash_image(image),
+            width=image.width,
+            height=image.height,
+            format=image.format,
+        )
+
+
+class ImageExecutor:
+    """Пул процессов с ограниченной очередью задач"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Задачи в пуле: ожидают свободный процесс или выполняются"""
+        return self._pending
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: процессы не наследуют event loop и соединения бота
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._pool
+
+    def _task_done(self, future: Future):
+        # Вызывается из потока пула, когда процесс закончил задачу
+        with self._lock:
+            self._pending -= 1
+        IMAGE_QUEUE_DEPTH.dec()
+
+    def submit(self, image_bytes: bytes) -> Optional[Future]:
+        """Поставить анализ в очередь (None - очередь заполнена)"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+        IMAGE_QUEUE_DEPTH.inc()
+
+        try:
+            try:
+                future = self._get_pool().submit(analyze_image, image_bytes)
+            except BrokenProcessPool:
+                # Процесс пула аварийно завершился: пул больше не принимает задачи
+                logger.warning("Пул анализа изображений сломан, создаю заново")
+                self.shutdown()
+                future = self._get_pool().submit(analyze_image, image_bytes)
+        except BaseException:
+            self._task_done(None)
+            raise
+        # Задача освобождает место в очереди, только когда процесс ее закончил
+        future.add_done_callback(self._task_done)
+        return future
+
+    async def analyze(self, image_bytes: bytes, timeout: Optional[float] = None) -> Optional[ImageInfo]:
+        """
+        Проанализировать изображение, не блокируя event loop
+
+        Args:
+            image_bytes: Байты файла (например, фото из Telegram)
+            timeout: Сколько секунд ждать результат (по умолчанию IMAGE_TIMEOUT)
+
+        Returns:
+            ImageInfo или None, если очередь заполнена, истек таймаут или файл не открылся
+        """
+        if timeout is None:
+            timeout = config.IMAGE_TIMEOUT
+        started = time.perf_counter()
+        result = 'ok'
+        try:
+            future = self.submit(image_bytes)
+            if future is None:
+                result = 'rejected'
+                logger.warning(f"Очередь анализа изображений заполнена ({self.max_pending})")
+                return None
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            result = 'timeout'
+            logger.warning(f"Анализ изображения не завершился за {timeout} с")
+            return None
+        except Exception as e:
+            result = 'error'
+            logger.warning(f"Не удалось проанализировать изображение: {e}")
+            return None
+        finally:
+            IMAGE_ANALYSIS_SECONDS.labels(result).observe(time.perf_counter() - started)
+
+    def shutdown(self):
+        """Остановить процессы пула (невыполненные задачи отменяются)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executor: Optional[ImageExecutor] = None
+
+
+def get_image_executor() -> ImageExecutor:
+    """Получить пул анализа изображений (один на процесс бота)"""
+    global _executor
+    if _executor is None:
+        _executor = ImageExecutor(config.IMAGE_WORKERS, config.IMAGE_QUEUE_SIZE)
+    return _executor
+
+
+async def analyze_image_async(image_bytes: bytes, timeout: Optional[float] = None) -> Optional[ImageInfo]:
+    """Проанализировать изображение в пуле процессов (см. ImageExecutor.analyze)"""
+    return await get_image_executor().analyze(image_bytes, timeout)
+
+
+def shutdown_image_executor():
+    """Остановить пул анализа изображений"""
+    if _executor is not None:
+        _executor.shutdown()
@@ -0,0 +1,89 @@
+"""
+Метрики Prometheus
+
+prometheus-client опционален: без него метрики превращаются в заглушки.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import Gauge, Histogram, start_http_server
+except ImportError:
+    Gauge = None
+    Histogram = None
+    start_http_server = None
+
+
+class _NoopMetric:
+    """Заглушка метрики, когда prometheus-client не установлен"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+
+def _histogram(name: str, documentation: str, **kwargs):
+    if Histogram is None:
+        return _NoopMetric()
+    return Histogram(name, documentation, **kwargs)
+
+
+def _gauge(name: str, documentation: str, **kwargs):
+    if Gauge is None:
+        return _NoopMetric()
+    return Gauge(name, documentation, **kwargs)
+
+
+# Время ожидания свободного соединения в пуле БД
+DB_POOL_CHECKOUT_WAIT = _histogram(
+    'db_pool_checkout_wait_seconds',
+    'Время ожидания соединения из пула БД',
+    labelnames=['engine'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# Задачи анализа изображений в пуле процессов (ожидают и выполняются)
+IMAGE_QUEUE_DEPTH = _gauge(
+    'image_queue_depth',
+    'Задачи анализа изображений в пуле процессов',
+)
+
+# Время анализа изображения с учетом ожидания в очереди
+IMAGE_ANALYSIS_SECONDS = _histogram(
+    'image_analysis_seconds',
+    'Время анализа изображения в пуле процессов',
+    labelnames=['result'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def start_metrics_server(port: int) -> bool:
+    """
+    Запуск HTTP сервера с метриками
+
+    Args:
+        port: Порт сервера (0 - не запускать)
+
+    Returns:
+        True если сервер запущен
+    """
+    if not port:
+        return False
+
+    if start_http_server is None:
+        logger.warning("prometheus-client не установлен, метрики недоступны")
+        return False
+
+    start_http_server(port)
+    logger.info(f"📈 Метрики доступны на порту {port}")
+    return True
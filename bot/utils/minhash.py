@@ -0,0 +1,111 @@
+"""
+MinHash-подписи текста поста для поиска почти-дубликатов
+
+Текст (название, своя тематика, свои условия) разбивается на шинглы -
+триграммы символов внутри слов, - поэтому перестановка слов, эмодзи
+и знаки препинания на набор шинглов не влияют. Тематики и условия
+с кнопок (PRESET_PHRASES) в подпись не входят: они одинаковы у множества
+несвязанных постов. Подпись - NUM_PERM минимумов хэшей шинглов; доля
+совпадающих позиций двух подписей оценивает коэффициент Жаккара их
+наборов шинглов.
+
+Для LSH подпись делится на BANDS полос по ROWS значений: посты, у которых
+совпала хотя бы одна полоса, становятся кандидатами. При 16 x 8 кандидатом
+окажется пост с Жаккаром 0.8 с вероятностью ~95%, с Жаккаром 0.4 - ~1%.
+"""
+
+import re
+import zlib
+from hashlib import blake2b
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+
+BANDS = 16
+ROWS = 8
+NUM_PERM = BANDS * ROWS
+
+# Хэши h(x) = (a * x + b) mod p с постоянными a, b: подписи одинаковы во всех процессах
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+
+SHINGLE_SIZE = 3
+
+# Варианты кнопок тематики и условий (bot/keyboards/post_creator.py)
+PRESET_PHRASES = frozenset(phrase.lower() for phrase in (
+    'Все тематики с женской ЦА',
+    'Все тематики с мужской ЦА',
+    'Детская тематика',
+    'Любая тематика',
+    'Заказ товара по поисковому запросу',
+    'Выкуп с ПВЗ',
+    'Положительный отзыв 5⭐',
+    'Съемка видео по ТЗ',
+    'Не удалять контент',
+))
+
+_WORD = re.compile(r'\w+')
+
+
+def shingles(*texts: Optional[str]) -> Set[str]:
+    """Шинглы текстов: триграммы символов каждого слова (короткие слова - целиком)"""
+    result = set()
+    for text in texts:
+        if not text:
+            continue
+        for word in _WORD.findall(text.lower()):
+            if len(word) <= SHINGLE_SIZE:
+                result.add(word)
+            else:
+                result.update(word[i:i + SHINGLE_SIZE] for i in range(len(word) - SHINGLE_SIZE + 1))
+    return result
+
+
+def signature(items: Iterable[str]) -> Optional[np.ndarray]:
+    """MinHash-подпись набора шинглов (None для пустого набора)"""
+    hashes = np.fromiter((zlib.crc32(item.encode()) for item in items), dtype=np.uint64)
+    if not len(hashes):
+        return None
+    hashes %= _PRIME
+    values = (np.outer(hashes, _A) % _PRIME + _B) % _PRIME
+    return values.min(axis=0).astype(np.uint32)
+
+
+def free_text(text: Optional[str]) -> str:
+    """Текст без строк, выбранных кнопками (условия хранятся строками через '• ')"""
+    if not text:
+        return ''
+    lines = (line.strip().lstrip('•').strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and line.lower() not in PRESET_PHRASES)
+
+
+def post_signature(post_data: dict) -> Optional[np.ndarray]:
+    """Подпись поста по названию и введенным вручную тематике и условиям"""
+    return signature(shingles(
+        post_data.get('product_name'),
+        free_text(post_data.get('blog_theme')),
+        free_text(post_data.get('conditions')),
+    ))
+
+
+def band_hashes(sig: np.ndarray) -> List[str]:
+    """Хэши полос подписи (по одному на полосу)"""
+    return [
+        blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def estimate_jaccard(sig1: np.ndarray, sig2: np.ndarray) -> float:
+    """Оценка коэффициента Жаккара по двум подписям (0-1)"""
+    return float(np.count_nonzero(sig1 == sig2)) / NUM_PERM
+
+
+def to_hex(sig: np.ndarray) -> str:
+    return sig.astype('>u4').tobytes().hex()
+
+
+def from_hex(value: str) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(value), dtype='>u4').astype(np.uint32)
@@ -0,0 +1,124 @@
+"""
+Ограничитель частоты исходящих вызовов Bot API (token bucket в Redis)
+
+Общий для бота (aiogram) и Celery: корзины хранятся в Redis, поэтому
+лимиты соблюдаются суммарно по всем процессам.
+
+Корзины:
+    глобальная       - TELEGRAM_GLOBAL_RATE сообщений в секунду
+    группа / канал   - TELEGRAM_GROUP_RATE сообщений в минуту
+    личный чат       - TELEGRAM_PRIVATE_RATE сообщений в секунду
+
+За окно лимита корзина пропускает емкость + частота * окно сообщений,
+поэтому емкость (допустимый всплеск) - разница между лимитом Telegram
+и настроенной частотой: 30 - 25 = 5 в секунду, 20 - 18 = 2 в минуту.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple, Union
+
+from bot.config import config
+from bot.utils.redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = 'tg:bucket'
+
+# Лимиты Telegram, которые нельзя превысить даже всплеском
+GLOBAL_LIMIT = 30  # сообщений в секунду
+GROUP_LIMIT = 20  # сообщений в минуту в группу/канал
+PRIVATE_LIMIT = 1  # сообщений в секунду в личный чат
+
+# Списать по токену из обеих корзин или вернуть, сколько ждать (мс).
+# Время берется из Redis, чтобы не зависеть от часов отдельных хостов.
+_ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local wait = 0
+local states = {}
+
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local capacity = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+    if tokens < 1 then
+        wait = math.max(wait, math.ceil((1 - tokens) * 1000 / rate))
+    end
+    states[i] = tokens
+end
+
+if wait > 0 then
+    return wait
+end
+
+for i = 1, #KEYS do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local capacity = tonumber(ARGV[i * 2])
+    redis.call('HSET', KEYS[i], 'tokens', states[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], math.ceil(capacity * 1000 / rate) + 1000)
+end
+return 0
+"""
+
+
+def _capacity(limit: float, rate: float) -> float:
+    """Емкость корзины: всплеск вместе с пополнением за окно не превышает лимит"""
+    return max(1.0, limit - rate)
+
+
+def _bucket_args(chat_id: Optional[Union[int, str]]) -> Tuple[list, list]:
+    """Ключи корзин и их параметры (токенов в секунду, емкость) для чата"""
+    keys = [f"{RATE_LIMIT_KEY_PREFIX}:global"]
+    args = [config.TELEGRAM_GLOBAL_RATE, _capacity(GLOBAL_LIMIT, config.TELEGRAM_GLOBAL_RATE)]
+
+    if chat_id is not None:
+        chat = str(chat_id)
+        keys.append(f"{RATE_LIMIT_KEY_PREFIX}:chat:{chat}")
+        if chat.startswith('-') or chat.startswith('@'):
+            # Группы и каналы
+            args += [config.TELEGRAM_GROUP_RATE / 60, _capacity(GROUP_LIMIT, config.TELEGRAM_GROUP_RATE)]
+        else:
+            args += [config.TELEGRAM_PRIVATE_RATE, _capacity(PRIVATE_LIMIT, config.TELEGRAM_PRIVATE_RATE)]
+
+    return keys, args
+
+
+def acquire(chat_id: Optional[Union[int, str]] = None):
+    """
+    Дождаться разрешения на отправку (синхронно, для Celery)
+
+    При недоступности Redis отправка не блокируется.
+    """
+    keys, args = _bucket_args(chat_id)
+    while True:
+        try:
+            wait_ms = get_redis().eval(_ACQUIRE_SCRIPT, len(keys), *keys, *args)
+        except Exception as e:
+            logger.warning(f"Ограничитель частоты недоступен: {e}")
+            return
+        if not wait_ms:
+            return
+        time.sleep(wait_ms / 1000)
+
+
+async def acquire_async(chat_id: Optional[Union[int, str]] = None):
+    """
+    Дождаться разрешения на отправку (для обработчиков бота)
+
+    При недоступности Redis отправка не блокируется.
+    """
+    keys, args = _bucket_args(chat_id)
+    while True:
+        try:
+            wait_ms = await get_async_redis().eval(_ACQUIRE_SCRIPT, len(keys), *keys, *args)
+        except Exception as e:
+            logger.warning(f"Ограничитель частоты недоступен: {e}")
+            return
+        if not wait_ms:
+            return
+        await asyncio.sleep(wait_ms / 1000)
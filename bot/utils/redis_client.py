@@ -0,0 +1,29 @@
+"""
+Общие клиенты Redis: синхронный (Celery, планировщик) и асинхронный (бот)
+"""
+
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+
+from bot.config import config
+
+_redis: Optional[redis.Redis] = None
+_async_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Получить синхронный клиент Redis (один пул соединений на процесс)"""
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(config.get_redis_url(), decode_responses=True)
+    return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Получить асинхронный клиент Redis (один пул соединений на процесс)"""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.Redis.from_url(config.get_redis_url(), decode_responses=True)
+    return _async_redis
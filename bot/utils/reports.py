@@ -0,0 +1,129 @@
+"""
+Отчеты для администратора
+
+Отчет пишется построчно в gzip-файл: строки постов читаются из БД
+порциями через серверный курсор (yield_per), поэтому память не растет
+вместе с историей.
+"""
+
+import csv
+import gzip
+import os
+import tempfile
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from bot.database.models import User, Post
+from bot.database.stats import overview_stats_query
+
+# Сколько строк читать из курсора за раз
+EXPORT_BATCH_SIZE = 1000
+
+
+def report_filename(since: Optional[datetime] = None, until: Optional[datetime] = None) -> str:
+    """Имя файла отчета для отправки в Telegram"""
+    start = since.strftime('%Y%m%d') if since else 'all'
+    end = (until or datetime.now()).strftime('%Y%m%d')
+    return f"stats_{start}_{end}.csv.gz"
+
+
+def build_stats_report(
+    db: Session,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    progress: Optional[Callable[[int], None]] = None
+) -> str:
+    """
+    Сформировать CSV отчет (gzip) во временном файле
+
+    Args:
+        db: Сессия базы данных
+        since: Начало периода (None - с начала истории)
+        until: Конец периода, не включительно (None - до текущего момента)
+        progress: Вызывается с числом записанных постов после каждой порции
+
+    Returns:
+        Путь к файлу; удалить его после отправки должен вызывающий код
+    """
+    stats = db.execute(overview_stats_query(since, until)).one()
+    avg_payment = stats.revenue / stats.payments if stats.payments else 0
+
+    fd, path = tempfile.mkstemp(prefix='stats_', suffix='.csv.gz')
+    os.close(fd)
+
+    try:
+        with gzip.open(path, 'wt', encoding='utf-8-sig', newline='') as file:
+            writer = csv.writer(file)
+
+            # Общая статистика
+            writer.writerow(['=== ОБЩАЯ СТАТИСТИКА ==='])
+            writer.writerow(['Дата формирования', datetime.now().strftime('%d.%m.%Y %H:%M')])
+            writer.writerow([
+                'Период',
+                since.strftime('%d.%m.%Y') if since else 'с начала',
+                until.strftime('%d.%m.%Y') if until else 'по сегодня',
+            ])
+            writer.writerow([])
+
+            writer.writerow(['Показатель', 'Значение'])
+            writer.writerow(['Всего пользователей', stats.total_users])
+            writer.writerow(['Рекламодателей', stats.advertisers])
+            writer.writerow(['Всего постов', stats.total_posts])
+            writer.writerow(['Опубликовано', stats.published])
+            writer.writerow(['В очереди', stats.in_queue])
+            writer.writerow(['Новых пользователей за период', stats.new_users])
+            writer.writerow(['Создано постов за период', stats.new_posts])
+            writer.writerow(['Опубликовано за период', stats.published_since])
+            writer.writerow([])
+
+            # Финансы
+            writer.writerow(['=== ФИНАНСОВАЯ СТАТИСТИКА (ЗА ПЕРИОД) ==='])
+            writer.writerow(['Всего платежей', stats.payments])
+            writer.writerow(['Общий доход', f"{stats.revenue}₽"])
+            writer.writerow(['Средний чек', f"{avg_payment:.0f}₽"])
+            writer.writerow([])
+
+            # Список постов - потоково, без загрузки всей таблицы
+            writer.writerow(['=== СПИСОК ПОСТОВ ==='])
+            writer.writerow(['ID', 'Товар', 'Статус', 'Создан', 'Рекламодатель'])
+
+            query = (
+                select(
+                    Post.id,
+                    Post.product_name,
+                    Post.status,
+                    Post.created_at,
+                    func.coalesce(User.username, User.full_name),
+                )
+                .join(User, Post.user_id == User.id)
+                .order_by(Post.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            if since:
+                query = query.where(Post.created_at >= since)
+            if until:
+                query = query.where(Post.created_at < until)
+
+            rows = 0
+            for post_id, product_name, status, created_at, author in db.execute(query):
+                writer.writerow([
+                    post_id,
+                    product_name,
+                    status,
+                    created_at.strftime('%d.%m.%Y %H:%M') if created_at else '',
+                    author,
+                ])
+                rows += 1
+                if progress and rows % EXPORT_BATCH_SIZE == 0:
+                    progress(rows)
+
+            if progress:
+                progress(rows)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return path
@@ -2,13 +2,127 @@
 Утилиты для отправки сообщений в Telegram из синхронных контекстов (Celery)
 """
 
-import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from contextlib import ExitStack
+from typing import Dict, Optional, Tuple
+
 import requests
-from typing import Optional
+from requests.adapters import HTTPAdapter
+
 from bot.config import config
+from bot.utils.rate_limiter import acquire
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+
 
+@dataclass
+class SendResult:
+    """Результат вызова Bot API (в логическом контексте ведет себя как bool)"""
+    ok: bool
+    message_id: Optional[int] = None
+    file_id: Optional[str] = None  # file_id отправленного документа
+    error_code: Optional[int] = None
+    description: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+def get_session() -> requests.Session:
+    """
+    Общая сессия с пулом keep-alive соединений
+
+    Создается заново в каждом процессе: после fork воркера Celery
+    соединения родителя использовать нельзя.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.TELEGRAM_POOL_SIZE)
+        session.mount('https://', adapter)
+        _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def call_api(method: str, data: dict, files: Optional[Dict[str, Tuple[str, str]]] = None) -> SendResult:
+    """
+    Вызов метода Bot API с повторами
+
+    Перед каждой попыткой ждем разрешения общего ограничителя частоты.
+    429 - ждем retry_after из ответа Telegram, 5xx и сетевые ошибки -
+    экспоненциальная задержка. Остальные ошибки (4xx) не повторяются.
+
+    Args:
+        method: Метод Bot API (sendMessage, sendPhoto, ...)
+        data: Параметры метода
+        files: Файлы для загрузки {поле: (имя файла, путь)}, отправляются multipart
 
-def send_message_sync(chat_id: str, text: str, parse_mode: str = "HTML") -> bool:
+    Returns:
+        SendResult с message_id при успехе или кодом и описанием ошибки
+    """
+    url = f"https://api.telegram.org/bot{config.BOT_TOKEN}/{method}"
+    result = SendResult(ok=False)
+
+    for attempt in range(config.TELEGRAM_MAX_RETRIES + 1):
+        delay = None
+        acquire(data.get('chat_id'))
+        try:
+            if files:
+                # Файлы открываются заново на каждую попытку
+                with ExitStack() as stack:
+                    upload = {
+                        field: (filename, stack.enter_context(open(path, 'rb')))
+                        for field, (filename, path) in files.items()
+                    }
+                    response = get_session().post(url, data=data, files=upload, timeout=config.TELEGRAM_UPLOAD_TIMEOUT)
+            else:
+                response = get_session().post(url, json=data, timeout=config.TELEGRAM_TIMEOUT)
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+
+            if response.status_code == 200 and body.get('ok'):
+                message = body.get('result') or {}
+                return SendResult(
+                    ok=True,
+                    message_id=message.get('message_id'),
+                    file_id=(message.get('document') or {}).get('file_id'),
+                )
+
+            result = SendResult(
+                ok=False,
+                error_code=body.get('error_code', response.status_code),
+                description=body.get('description', response.reason),
+            )
+
+            if response.status_code == 429:
+                delay = (body.get('parameters') or {}).get('retry_after', 1)
+            elif response.status_code >= 500:
+                delay = config.TELEGRAM_BACKOFF_BASE * 2 ** attempt
+            else:
+                return result
+
+        except requests.RequestException as e:
+            result = SendResult(ok=False, description=str(e))
+            delay = config.TELEGRAM_BACKOFF_BASE * 2 ** attempt
+
+        if attempt < config.TELEGRAM_MAX_RETRIES:
+            delay += random.uniform(0, config.TELEGRAM_BACKOFF_BASE)
+            logger.warning(f"{method}: {result.error_code or ''} {result.description}, повтор через {delay:.1f} сек.")
+            time.sleep(delay)
+
+    return result
+
+
+def send_message_sync(chat_id: str, text: str, parse_mode: str = "HTML") -> SendResult:
     """
     Синхронная отправка текстового сообщения в Telegram
 
@@ -18,25 +132,19 @@ def send_message_sync(chat_id: str, text: str, parse_mode: str = "HTML") -> bool
         parse_mode: Режим форматирования (HTML, Markdown)
 
     Returns:
-        True если успешно, False если ошибка
+        SendResult (истинный, если сообщение отправлено)
     """
-    try:
-        url = f"https://api.telegram.org/bot{config.BOT_TOKEN}/sendMessage"
-        data = {
-            "chat_id": chat_id,
-            "text": text,
-            "parse_mode": parse_mode
-        }
+    result = call_api("sendMessage", {
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": parse_mode
+    })
+    if not result:
+        print(f"Ошибка при отправке сообщения: {result.error_code} {result.description}")
+    return result
 
-        response = requests.post(url, json=data, timeout=10)
-        return response.status_code == 200
 
-    except Exception as e:
-        print(f"Ошибка при отправке сообщения: {e}")
-        return False
-
-
-def send_photo_sync(chat_id: str, photo: str, caption: Optional[str] = None, parse_mode: str = "HTML") -> bool:
+def send_photo_sync(chat_id: str, photo: str, caption: Optional[str] = None, parse_mode: str = "HTML") -> SendResult:
     """
     Синхронная отправка фото в Telegram
 
@@ -47,25 +155,55 @@ def send_photo_sync(chat_id: str, photo: str, caption: Optional[str] = None, par
         parse_mode: Режим форматирования (HTML, Markdown)
 
     Returns:
-        True если успешно, False если ошибка
+        SendResult (истинный, если фото отправлено)
     """
-    try:
-        url = f"https://api.telegram.org/bot{config.BOT_TOKEN}/sendPhoto"
-        data = {
-            "chat_id": chat_id,
-            "photo": photo,
-            "parse_mode": parse_mode
-        }
-
-        if caption:
-            data["caption"] = caption
+    data = {
+        "chat_id": chat_id,
+        "photo": photo,
+        "parse_mode": parse_mode
+    }
+
+    if caption:
+        data["caption"] = caption
+
+    result = call_api("sendPhoto", data)
+    if not result:
+        print(f"Ошибка при отправке фото: {result.error_code} {result.description}")
+    return result
+
+
+def send_document_sync(
+    chat_id: str,
+    document: str,
+    filename: Optional[str] = None,
+    caption: Optional[str] = None
+) -> SendResult:
+    """
+    Синхронная отправка документа в Telegram
 
-        response = requests.post(url, json=data, timeout=10)
-        return response.status_code == 200
+    Args:
+        chat_id: ID чата
+        document: Путь к файлу для загрузки или file_id уже загруженного документа
+        filename: Имя файла в Telegram (для загрузки)
+        caption: Подпись к документу
 
-    except Exception as e:
-        print(f"Ошибка при отправке фото: {e}")
-        return False
+    Returns:
+        SendResult с file_id документа для повторной отправки
+    """
+    data = {"chat_id": chat_id}
+    if caption:
+        data["caption"] = caption
+
+    files = None
+    if os.path.isfile(document):
+        files = {"document": (filename or os.path.basename(document), document)}
+    else:
+        data["document"] = document
+
+    result = call_api("sendDocument", data, files=files)
+    if not result:
+        print(f"Ошибка при отправке документа: {result.error_code} {result.description}")
+    return result
 
 
 async def send_message_async(bot, chat_id: str, text: str, parse_mode: str = "HTML"):
@@ -0,0 +1,146 @@
+"""
+Запуск бота в режиме webhook (aiohttp) как альтернатива long polling
+"""
+
+import asyncio
+import logging
+import signal
+from typing import Any, Dict
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from bot.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука с ограничением числа апдейтов в обработке
+
+    Telegram получает ответ сразу, апдейт обрабатывается в фоне.
+    Если заняты все max_concurrency слотов, ответ задерживается до
+    освобождения слота - Telegram сам притормаживает отправку.
+    При остановке новые апдейты отклоняются (Telegram пришлет их повторно),
+    а начатые дорабатываются не дольше drain_timeout секунд.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        max_concurrency: int,
+        drain_timeout: float,
+        secret_token: str = None,
+        **data: Any
+    ) -> None:
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token, **data)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.drain_timeout = drain_timeout
+        self._closing = False
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self._closing:
+            return web.Response(text="Shutting down", status=503)
+        return await super().handle(request)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(task)
+        task.add_done_callback(self._background_feed_update_tasks.discard)
+        task.add_done_callback(lambda _: self._semaphore.release())
+
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot, update)
+        except Exception as e:
+            logger.exception(f"Ошибка при обработке апдейта {update.get('update_id')}: {e}")
+
+    async def drain(self) -> None:
+        """Дождаться завершения начатых апдейтов"""
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+
+        logger.info(f"Завершение обработки {len(tasks)} апдейтов...")
+        _, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Прервано {len(pending)} апдейтов по таймауту")
+
+    async def close(self) -> None:
+        self._closing = True
+        await self.drain()
+        await super().close()
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot) -> web.Application:
+    """
+    Создание aiohttp приложения для приема апдейтов
+
+    Args:
+        dispatcher: Диспетчер aiogram
+        bot: Экземпляр бота
+
+    Returns:
+        aiohttp приложение с зарегистрированным путем WEBHOOK_PATH
+    """
+    app = web.Application()
+
+    handler = BoundedRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        max_concurrency=config.WEBHOOK_MAX_CONCURRENCY,
+        drain_timeout=config.WEBHOOK_DRAIN_TIMEOUT,
+        secret_token=config.WEBHOOK_SECRET or None,
+    )
+    handler.register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dispatcher, bot=bot)
+
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot) -> None:
+    """
+    Запуск webhook сервера до получения SIGTERM/SIGINT
+
+    Если задан WEBHOOK_BASE_URL, вебхук регистрируется в Telegram при старте.
+    """
+    app = create_webhook_app(dispatcher, bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=config.WEBHOOK_HOST, port=config.WEBHOOK_PORT)
+    await site.start()
+
+    if config.WEBHOOK_BASE_URL:
+        await bot.set_webhook(
+            url=config.WEBHOOK_BASE_URL.rstrip('/') + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            max_connections=min(config.WEBHOOK_MAX_CONCURRENCY, 100),
+        )
+
+    logger.info(f"🌐 Webhook сервер слушает {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    try:
+        await stop_event.wait()
+    finally:
+        # on_shutdown: перестаем принимать апдейты и дожидаемся начатых
+        await runner.cleanup()
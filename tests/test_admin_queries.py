@@ -0,0 +1,86 @@
+"""
+Число SQL-запросов при выводе списков админ-панели
+
+Авторы постов загружаются вместе со списком, поэтому число запросов
+не зависит от количества постов и авторов.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from bot.database.models import Post, User
+from bot.handlers import admin
+
+
+class FakeMessage:
+    def __init__(self):
+        self.text = None
+
+    async def edit_text(self, text, **kwargs):
+        self.text = text
+
+
+class FakeCallback:
+    def __init__(self, data: str):
+        self.data = data
+        self.message = FakeMessage()
+        self.alert = None
+
+    async def answer(self, text=None, **kwargs):
+        self.alert = text
+
+
+def create_posts(session_factory, count: int, status: str):
+    """count постов со статусом status, у каждого свой автор"""
+    now = datetime.now()
+    with session_factory() as db:
+        users = [User(telegram_id=number, username=f"author{number}") for number in range(1, count + 1)]
+        db.add_all(users)
+        db.flush()
+        db.add_all(
+            Post(
+                user_id=user.id,
+                status=status,
+                product_name=f"Товар {number}",
+                queue_position=number if status == 'queue' else None,
+                scheduled_time=now + timedelta(hours=number) if status == 'scheduled' else None,
+            )
+            for number, user in enumerate(users, start=1)
+        )
+        db.commit()
+
+
+def render(make_async_engine, count_queries, handler, data: str) -> int:
+    """Вызвать обработчик списка и вернуть число SQL-запросов"""
+    async def scenario():
+        engine = make_async_engine()
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                # Соединение открывается заранее: запросы диалекта при подключении не считаются
+                await db.connection()
+                callback = FakeCallback(data)
+                with count_queries(engine) as queries:
+                    await handler(callback, db)
+                assert callback.message.text, callback.alert
+                return queries.count
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+# Кэш количества в Redis в тестах недоступен: считается худший случай (запрос COUNT)
+@pytest.mark.parametrize('handler, data, status, queries', [
+    (admin.admin_queue_handler, 'admin_queue', 'queue', 2),
+    (admin.admin_queue_list_handler, 'admin_queue_list:1', 'queue', 2),
+    (admin.admin_priority_list_handler, 'admin_priority_list:1', 'scheduled', 2),
+    (admin.admin_queue_delete_handler, 'admin_queue_delete', 'queue', 1),
+])
+@pytest.mark.parametrize('posts', [12, 40])
+def test_list_render_query_count_is_fixed(session_factory, make_async_engine, count_queries,
+                                          handler, data, status, queries, posts):
+    create_posts(session_factory, posts, status)
+    assert render(make_async_engine, count_queries, handler, data) == queries
@@ -0,0 +1,58 @@
+"""
+Постановка в очередь (enqueue_post) под параллельной нагрузкой
+
+Сотни одновременных постановок должны получить уникальные номера
+в очереди без пропусков: 1..N.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from bot.database import async_crud, crud
+from bot.database.models import User
+
+ENQUEUE_COUNT = 300
+ENQUEUE_WORKERS = 20
+
+
+def create_author(session_factory) -> int:
+    with session_factory() as db:
+        user = User(telegram_id=1, username='author')
+        db.add(user)
+        db.commit()
+        return user.id
+
+
+def test_parallel_enqueue_positions_are_unique_and_gapless(session_factory):
+    user_id = create_author(session_factory)
+
+    def enqueue(number: int) -> int:
+        with session_factory() as db:
+            return crud.enqueue_post(db, user_id, product_name=f"Пост {number}").queue_position
+
+    with ThreadPoolExecutor(max_workers=ENQUEUE_WORKERS) as pool:
+        positions = list(pool.map(enqueue, range(ENQUEUE_COUNT)))
+
+    assert sorted(positions) == list(range(1, ENQUEUE_COUNT + 1))
+
+
+def test_parallel_async_enqueue_positions_are_unique_and_gapless(session_factory, make_async_engine):
+    user_id = create_author(session_factory)
+
+    async def scenario():
+        engine = make_async_engine()
+        sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+        async def enqueue(number: int) -> int:
+            async with sessions() as db:
+                return (await async_crud.enqueue_post(db, user_id, product_name=f"Пост {number}")).queue_position
+
+        try:
+            return await asyncio.gather(*(enqueue(number) for number in range(ENQUEUE_COUNT)))
+        finally:
+            await engine.dispose()
+
+    positions = asyncio.run(scenario())
+    assert sorted(positions) == list(range(1, ENQUEUE_COUNT + 1))
@@ -0,0 +1,171 @@
+"""
+Вебхук (bot.webhook) против локального отправителя апдейтов
+
+Апдейты отправляются в приложение create_webhook_app через aiohttp
+TestClient; Telegram и база данных не нужны.
+"""
+
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.config import config
+from bot.webhook import BoundedRequestHandler, create_webhook_app
+
+SECRET = 'test-secret'
+MAX_CONCURRENCY = 2
+
+
+def make_update(update_id: int) -> dict:
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': 1, 'type': 'private'},
+            'from': {'id': 1, 'is_bot': False, 'first_name': 'Test'},
+            'text': 'test',
+        },
+    }
+
+
+class SlowHandler:
+    """Обработчик сообщений, который ждет release() и считает одновременные апдейты"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.active = 0
+        self.max_active = 0
+        self.done = []
+
+    async def handle(self, message: Message):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await self.gate.wait()
+            self.done.append(message.message_id)
+        finally:
+            self.active -= 1
+
+    def release(self):
+        self.gate.set()
+
+
+@pytest.fixture(autouse=True)
+def webhook_config(monkeypatch):
+    monkeypatch.setattr(config, 'WEBHOOK_SECRET', SECRET)
+    monkeypatch.setattr(config, 'WEBHOOK_MAX_CONCURRENCY', MAX_CONCURRENCY)
+    monkeypatch.setattr(config, 'WEBHOOK_DRAIN_TIMEOUT', 5)
+
+
+async def start_client(slow: SlowHandler) -> TestClient:
+    router = Router()
+    router.message.register(slow.handle)
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+
+    client = TestClient(TestServer(create_webhook_app(dispatcher, Bot('42:TEST'))))
+    await client.start_server()
+    return client
+
+
+def post_update(client: TestClient, update_id: int, secret: str = SECRET):
+    headers = {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+    return client.post(config.WEBHOOK_PATH, json=make_update(update_id), headers=headers)
+
+
+def get_request_handler(client: TestClient) -> BoundedRequestHandler:
+    for route in client.app.router.routes():
+        handler = getattr(route.handler, '__self__', None)
+        if isinstance(handler, BoundedRequestHandler):
+            return handler
+    raise AssertionError('Обработчик вебхука не зарегистрирован')
+
+
+async def wait_until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, 'Условие не выполнилось'
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize('secret', ['wrong-secret', None])
+def test_rejects_wrong_or_missing_secret(secret):
+    async def scenario():
+        slow = SlowHandler()
+        slow.release()
+        client = await start_client(slow)
+        try:
+            response = await post_update(client, 1, secret=secret)
+            assert response.status == 401
+            await asyncio.sleep(0.05)
+            assert slow.done == []
+        finally:
+            await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_bounded():
+    async def scenario():
+        slow = SlowHandler()
+        client = await start_client(slow)
+        try:
+            requests = [asyncio.create_task(post_update(client, update_id)) for update_id in range(1, 6)]
+            await wait_until(lambda: slow.active == MAX_CONCURRENCY)
+            await asyncio.sleep(0.1)
+            assert slow.max_active == MAX_CONCURRENCY
+
+            slow.release()
+            responses = await asyncio.gather(*requests)
+            assert [response.status for response in responses] == [200] * 5
+            await wait_until(lambda: len(slow.done) == 5)
+            assert slow.max_active == MAX_CONCURRENCY
+        finally:
+            await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_rejects_updates_while_closing_and_drains_in_flight():
+    async def scenario():
+        slow = SlowHandler()
+        client = await start_client(slow)
+        try:
+            response = await post_update(client, 1)
+            assert response.status == 200
+            await wait_until(lambda: slow.active == 1)
+
+            # Остановка ждет начатый апдейт, новые апдейты получают 503
+            closing = asyncio.create_task(get_request_handler(client).close())
+            await asyncio.sleep(0.05)
+            assert not closing.done()
+            response = await post_update(client, 2)
+            assert response.status == 503
+
+            slow.release()
+            await asyncio.wait_for(closing, 2)
+            assert slow.done == [1]
+        finally:
+            await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_shutdown_drains_in_flight_updates():
+    async def scenario():
+        slow = SlowHandler()
+        client = await start_client(slow)
+        responses = [await post_update(client, update_id) for update_id in (1, 2)]
+        assert [response.status for response in responses] == [200, 200]
+        await wait_until(lambda: slow.active == 2)
+
+        asyncio.get_running_loop().call_later(0.1, slow.release)
+        # Остановка сервера (on_shutdown) дожидается начатых апдейтов
+        await client.close()
+        assert sorted(slow.done) == [1, 2]
+
+    asyncio.run(scenario())